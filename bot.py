@@ -1,26 +1,37 @@
 import os
+import io
 import json
 import logging
 import asyncio
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Set
+from datetime import datetime, timezone
+from typing import Dict, List, Mapping, Optional, Set
+from collections import OrderedDict, deque
+from array import array
+from bisect import bisect_left
 import time
+import heapq
+import hashlib
+import random
 import sys
 
 import discord
 from discord.ext import tasks, commands
-import requests
 from dotenv import load_dotenv
 import httpx
 import feedparser
-from web3 import Web3
+from web3 import Web3, AsyncWeb3, WebsocketProviderV2
 from web3.datastructures import AttributeDict
+from eth_utils import event_abi_to_log_topic
 from eth_account import Account
 import aiohttp
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import config
-from web3.middleware import geth_poa_middleware
+from web3.middleware import async_geth_poa_middleware
+from web3.providers.async_base import AsyncJSONBaseProvider
 from twilio.rest import Client
 
 # Configure logging
@@ -42,6 +53,18 @@ BASESCAN_API_KEY = os.getenv('BASESCAN_API_KEY')
 
 # Constants
 DEXSCREENER_API_URL = "https://api.dexscreener.com/token-profiles/latest/v1"
+DEXSCREENER_HEADERS = {
+    'Accept': '*/*',
+    'User-Agent': 'Mozilla/5.0'
+}
+DEXSCREENER_TOKENS_URL = "https://api.dexscreener.com/latest/dex/tokens"
+DEXSCREENER_TOKENS_PER_CALL = 30  # adresses par requête multi-token (limite de l'API)
+DEXSCREENER_MAX_CONCURRENT = 4  # requêtes multi-token en vol simultanément
+# Surveillance volume Dexscreener : intervalle de vérification selon l'âge du token (âge max en s, intervalle en s)
+VOLUME_CHECK_SCHEDULE = [(300, 10), (900, 30), (3600, 120)]
+VOLUME_TRACK_SECONDS = 3600  # durée de surveillance d'un token après son déploiement
+VOLUME_SCHEDULER_TICK = 2  # seconds
+VOLUME_SPIKE_FRACTION = 0.5  # au-delà de cette fraction du seuil 24h, le token repasse à l'intervalle le plus court
 TRUTH_SOCIAL_RSS_URL = "https://truthsocial.com/users/realDonaldTrump/feed.rss"
 CLANKER_API_URL = "https://www.clanker.world/api"
 BASESCAN_API_URL = "https://api.basescan.org/api"
@@ -188,6 +211,86 @@ FEY_FACTORY_ABI = [
         "type": "event"
     }
 ]
+# Fonctions de déploiement de la factory Fey (IFey.sol), pour décoder les tx en attente :
+# DeploymentConfig a exactement la structure de celle de Clanker V4, d'où la même entrée deployToken
+FEY_FACTORY_DEPLOY_ABI = [
+    next(item for item in CLANKER_FACTORY_V4_ABI if item.get("name") == "deployToken"),
+    {"inputs":[{"components":next(item for item in CLANKER_FACTORY_V4_ABI if item.get("name") == "deployToken")["inputs"][0]["components"][0]["components"],"internalType":"struct IFey.TokenConfig","name":"tokenConfig","type":"tuple"}],"name":"deployTokenZeroSupply","outputs":[{"internalType":"address","name":"tokenAddress","type":"address"}],"stateMutability":"nonpayable","type":"function"},
+]
+# Correspondance champ du tokenConfig -> argument de l'event TokenCreated (None = absent du log)
+CLANKER_V3_EVENT_FIELDS = {
+    "name": "name",
+    "symbol": "symbol",
+    "image": None,
+    "metadata": "metadata",
+    "context": None
+}
+CLANKER_V4_EVENT_FIELDS = {
+    "name": "tokenName",
+    "symbol": "tokenSymbol",
+    "image": "tokenImage",
+    "metadata": "tokenMetadata",
+    "context": "tokenContext"
+}
+
+def fey_event_fields(args) -> List[tuple]:
+    """Champs (nom, valeur, inline) propres à l'event TokenCreated Fey : pool, hook, locker, extensions"""
+    def address(raw) -> Optional[str]:
+        return Web3.to_checksum_address(raw) if raw and raw != ZERO_ADDRESS else None
+
+    def link(addr: Optional[str], label: Optional[str] = None) -> str:
+        if not addr:
+            return "Aucun"
+        base = f"[{addr}](https://basescan.org/address/{addr})"
+        return f"{base} ({label})" if label else base
+
+    msg_sender = address(args.get("msgSender"))
+    token_admin = address(args.get("tokenAdmin"))
+    pool_hook = address(args.get("poolHook"))
+    hook_label = "FeyHookStaticFeeV2" if pool_hook and pool_hook.lower() == FEY_HOOK_STATIC_FEE_ADDRESS.lower() else None
+    starting_tick = args.get("startingTick")
+    extensions = [address(ext) for ext in args.get("extensions", []) if address(ext)]
+    ext_value = "\n".join(link(ext) for ext in extensions[:5]) or "Aucune"
+    if len(extensions) > 5:
+        ext_value += f"\n… +{len(extensions) - 5} autres"
+    fields = [
+        ("Déployeur (msgSender)", f"`{msg_sender}`" if msg_sender else "Inconnu", True),
+        ("Admin", f"`{token_admin}`" if token_admin else "Non communiqué", True),
+        ("Tick initial", str(starting_tick) if starting_tick is not None else "N/A", True),
+        ("Hook", link(pool_hook, hook_label) if pool_hook else "Aucun (deployTokenZeroSupply ?)", False),
+        ("Token pairé", link(address(args.get("pairedToken"))), False),
+        ("Locker", link(address(args.get("locker"))), True),
+        ("Module MEV", link(address(args.get("mevModule"))), True),
+        ("Supply extensions", f"{args.get('extensionsSupply', 0):,}", True),
+        ("Extensions", ext_value, False),
+    ]
+    pool_id = args.get("poolId")
+    if pool_id:
+        fields.append(("PoolId", f"`{Web3.to_hex(pool_id)}`", False))
+    return fields
+
+# Présentation des alertes on-chain par launchpad (un nouveau launchpad s'ajoute ici) :
+# project_link = lien vers la page du token sur le launchpad, event_fields = champs propres à son event
+LAUNCHPAD_DISPLAY = {
+    "clanker_v3": {
+        "label": "Clanker",
+        "market_button": ("Voir sur Photon", "https://photon-base.tinyastro.io/en/lp/{token}"),
+        "project_link": ("Lien Clanker", "Voir sur Clanker.world", "https://www.clanker.world/clanker/{token}"),
+        "event_fields": None,
+    },
+    "clanker_v4": {
+        "label": "Clanker V4",
+        "market_button": ("Voir sur DexScreener", "https://dexscreener.com/base/{token}"),
+        "project_link": ("Lien Clanker", "Voir sur Clanker.world", "https://www.clanker.world/clanker/{token}"),
+        "event_fields": None,
+    },
+    "fey": {
+        "label": "Fey",
+        "market_button": ("Voir sur DexScreener", "https://dexscreener.com/base/{token}"),
+        "project_link": None,
+        "event_fields": fey_event_fields,
+    },
+}
 MONITORED_CHAINS = {
     "base": "Base",
     "solana": "Solana"
@@ -195,15 +298,191 @@ MONITORED_CHAINS = {
 POLL_INTERVAL = 2  # seconds
 SEEN_TOKENS_FILE = "seen_tokens.json"
 SEEN_CLANKER_TOKENS_FILE = "seen_clanker_tokens.json"
+SEEN_CLANKER_JOURNAL_FILE = "seen_clanker_tokens.journal"
+DEDUPE_TTL_SECONDS = 14 * 24 * 3600  # au-delà, un token n'est plus considéré comme vu
+DEDUPE_MAX_ENTRIES = 50000  # éviction LRU au-delà
+# Compteurs glissants de déploiements par FID / adresse créatrice
+DEPLOY_RATE_WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600}
+DEPLOY_RATE_BUCKET_SECONDS = 60
+AUTO_BAN_WINDOW = '1h'  # fenêtre de la règle d'auto-ban (seuil dans bot_preferences, 0 = désactivée)
 TRACKED_WALLETS_FILE = "tracked_wallets.json"
 BANNED_FIDS_FILE = "banned_fids.json"
 WHITELISTED_FIDS_FILE = "whitelisted_fids.json"
 KEYWORD_WHITELIST_FILE = "keyword_whitelist.json"
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{os.getenv('TELEGRAM_BOT_TOKEN')}/sendMessage"
 TELEGRAM_USER_ID = os.getenv('TELEGRAM_USER_ID')
+ENRICHMENT_CACHE_SIZE = 256  # transactions préchargées gardées en mémoire
+
+# Ajout de la variable d'environnement pour QuickNode WebSocket
+QUICKNODE_WSS = os.getenv('QUICKNODE_WSS')
+# Endpoint HTTP QuickNode pour les appels RPC ponctuels (dérivé du WSS si non fourni)
+QUICKNODE_HTTP = os.getenv('QUICKNODE_HTTP') or (QUICKNODE_WSS or '').replace('wss://', 'https://', 1).replace('ws://', 'http://', 1)
+
+# Endpoints RPC mis en concurrence (séparés par des virgules), QuickNode puis le RPC public en secours
+RPC_HTTP_URLS = [url.strip() for url in (os.getenv('RPC_HTTP_URLS') or f"{QUICKNODE_HTTP},https://mainnet.base.org").split(',') if url.strip()]
+RPC_WSS_URLS = [url.strip() for url in (os.getenv('RPC_WSS_URLS') or QUICKNODE_WSS or '').split(',') if url.strip()]
+RPC_REQUEST_TIMEOUT = 10  # seconds
+RPC_RACE_FANOUT = 3  # nombre d'endpoints interrogés en parallèle pour une lecture
+RPC_LATENCY_EWMA_ALPHA = 0.2
+RPC_DEMOTE_ERROR_RATE = 0.5  # taux d'erreur (EWMA) au-delà duquel un endpoint est écarté
+RPC_DEMOTE_SECONDS = 60
+# Lectures idempotentes que l'on peut envoyer à plusieurs endpoints à la fois.
+# Exclues : eth_getLogs (le [] d'un endpoint en retard gagnerait la course et le
+# backfill sauterait ces blocs), eth_blockNumber (ne sert qu'à borner ces eth_getLogs :
+# head et logs viennent ainsi du même endpoint) et eth_getTransactionCount (nonce périmé).
+RACED_RPC_METHODS = {
+    "eth_chainId",
+    "eth_gasPrice",
+    "eth_getTransactionByHash",
+    "eth_getTransactionReceipt",
+    "eth_getBlockByNumber",
+    "eth_getBlockByHash",
+    "eth_getBalance",
+    "eth_call",
+}
+
+class RPCEndpointHealth:
+    """Latence et taux d'erreur (moyennes mobiles exponentielles) d'un endpoint RPC"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.provider = AsyncWeb3.AsyncHTTPProvider(url, request_kwargs={'timeout': RPC_REQUEST_TIMEOUT})
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.demoted_until = 0.0
+
+    @property
+    def is_demoted(self) -> bool:
+        return time.time() < self.demoted_until
+
+    @property
+    def score(self) -> float:
+        """Plus bas = meilleur ; un endpoint jamais mesuré passe en premier pour être évalué"""
+        if self.latency is None:
+            return RPC_REQUEST_TIMEOUT * (1 + 10 * self.error_rate) if self.errors else 0.0
+        return self.latency * (1 + 10 * self.error_rate)
+
+    def record_success(self, elapsed: float):
+        self.requests += 1
+        self.error_rate *= 1 - RPC_LATENCY_EWMA_ALPHA
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += RPC_LATENCY_EWMA_ALPHA * (elapsed - self.latency)
+
+    def record_error(self):
+        self.requests += 1
+        self.errors += 1
+        self.error_rate += RPC_LATENCY_EWMA_ALPHA * (1 - self.error_rate)
+        if self.error_rate > RPC_DEMOTE_ERROR_RATE and not self.is_demoted:
+            self.demoted_until = time.time() + RPC_DEMOTE_SECONDS
+            logger.warning(f"[RPC] Endpoint {self.url} écarté {RPC_DEMOTE_SECONDS}s (taux d'erreur {self.error_rate:.0%})")
+
+class RacingHTTPProvider(AsyncJSONBaseProvider):
+    """Provider async qui met plusieurs endpoints HTTP en concurrence.
+
+    Les lectures de RACED_RPC_METHODS partent vers les RPC_RACE_FANOUT
+    meilleurs endpoints et la première réponse valide gagne ; les autres
+    requêtes se terminent en tâche de fond pour alimenter les statistiques.
+    Les écritures (sendRawTransaction...) vont au meilleur endpoint, avec
+    bascule sur le suivant en cas d'erreur réseau."""
+
+    def __init__(self, urls: List[str]):
+        super().__init__()
+        if not urls:
+            raise ValueError("Aucun endpoint RPC configuré")
+        self.endpoints = [RPCEndpointHealth(url) for url in urls]
+        self.batch_client = None  # client httpx partagé pour les requêtes batch
+
+    def ranked_endpoints(self) -> List[RPCEndpointHealth]:
+        healthy = sorted((ep for ep in self.endpoints if not ep.is_demoted), key=lambda ep: ep.score)
+        demoted = sorted((ep for ep in self.endpoints if ep.is_demoted), key=lambda ep: ep.demoted_until)
+        return healthy + demoted
+
+    async def _timed_request(self, endpoint: RPCEndpointHealth, method, params):
+        start = time.monotonic()
+        try:
+            response = await endpoint.provider.make_request(method, params)
+        except Exception:
+            endpoint.record_error()
+            raise
+        endpoint.record_success(time.monotonic() - start)
+        return response
+
+    async def make_request(self, method, params):
+        endpoints = self.ranked_endpoints()
+        if method not in RACED_RPC_METHODS:
+            last_error = None
+            for endpoint in endpoints:
+                try:
+                    return await self._timed_request(endpoint, method, params)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+        pending = {
+            asyncio.create_task(self._timed_request(endpoint, method, params)): endpoint
+            for endpoint in endpoints[:RPC_RACE_FANOUT]
+        }
+        fallback = None
+        last_error = None
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                endpoint = pending.pop(task)
+                try:
+                    response = task.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                # Un résultat null (tx pas encore propagée) ou une erreur ne clôt pas la course
+                if "error" in response or response.get("result") is None:
+                    if fallback is None or "error" in fallback:
+                        fallback = response
+                    continue
+                endpoint.wins += 1
+                for loser in pending:
+                    loser.add_done_callback(lambda t: t.exception())  # évite "exception never retrieved"
+                return response
+        if fallback is not None:
+            return fallback
+        raise last_error
+
+    async def make_batch_request(self, calls: List[tuple]) -> List[Dict]:
+        """Envoie plusieurs appels (method, params) en une seule requête JSON-RPC batch.
+        Les réponses brutes sont renvoyées dans l'ordre des appels."""
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in enumerate(calls)
+        ]
+        if self.batch_client is None:
+            self.batch_client = httpx.AsyncClient(timeout=RPC_REQUEST_TIMEOUT)
+        last_error = None
+        for endpoint in self.ranked_endpoints():
+            start = time.monotonic()
+            try:
+                resp = await self.batch_client.post(endpoint.url, json=payload)
+                resp.raise_for_status()
+                responses = resp.json()
+                if not isinstance(responses, list):
+                    raise ValueError(f"Réponse batch invalide: {str(responses)[:200]}")
+            except Exception as e:
+                endpoint.record_error()
+                last_error = e
+                continue
+            endpoint.record_success(time.monotonic() - start)
+            by_id = {response.get("id"): response for response in responses}
+            return [
+                by_id.get(request_id, {"error": {"code": -32603, "message": "réponse manquante"}})
+                for request_id in range(len(calls))
+            ]
+        raise last_error
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider('https://mainnet.base.org'))
+# Initialize Web3 (provider async pour ne pas bloquer la boucle d'événements discord.py)
+w3 = AsyncWeb3(RacingHTTPProvider(RPC_HTTP_URLS))
 account = Account.from_key(config.WALLET_PRIVATE_KEY)
 
 # Initialize database
@@ -265,6 +544,37 @@ def init_db():
     conn.close()
     logger.info("Database initialized with all tables")
 
+# Pool de connexions PostgreSQL (et nombre de threads DB hors boucle d'événements)
+DB_POOL_MIN = 1
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '5'))
+
+# Change feed : propagation des mutations d'état entre instances partageant la base
+STATE_CHANGE_CHANNEL = 'bot_state_changes'
+STATE_POLL_INTERVAL = 2  # seconds (fallback SQLite)
+STATE_CHANGE_BATCH_LIMIT = 10000
+STATE_CHANGE_RETENTION = 86400  # seconds de journal state_changes gardées (SQLite)
+# Colonne clé de chaque table d'état surveillée
+STATE_KEY_COLUMNS = {
+    'banned_fids': 'fid',
+    'whitelisted_fids': 'fid',
+    'keyword_whitelist': 'keyword',
+    'tracked_addresses': 'address',
+    'bot_preferences': 'key',
+}
+# Mutations de mots-clés regroupées : l'automate est recompilé une fois par rafale
+KEYWORD_REBUILD_DELAY = 0.25  # seconds
+
+# Journal des déploiements vus (table deployments), écrit par lots
+DEPLOYMENT_JOURNAL_FLUSH_INTERVAL = 1.0  # seconds
+DEPLOYMENT_JOURNAL_BATCH_SIZE = 100
+DEPLOYMENT_JOURNAL_COLUMNS = (
+    'launchpad', 'block_number', 'tx_hash', 'token_address', 'fid', 'creator_address',
+    'name', 'symbol', 'image', 'verdict', 'rule', 'alert_latency_ms', 'seen_at',
+)
+
+# Tokens sous surveillance volume (table tracked_tokens), resynchronisés par lots
+TRACKED_TOKENS_FLUSH_INTERVAL = 1.0  # seconds
+
 class DatabaseManager:
     """Gestionnaire de base de données pour toutes les listes et préférences"""
     
@@ -274,14 +584,14 @@ class DatabaseManager:
         if self.database_url and self.database_url.startswith('postgresql://'):
             try:
                 import psycopg2
+                import psycopg2.pool
                 from psycopg2.extras import RealDictCursor
-                # Tester la connexion
-                test_conn = psycopg2.connect(self.database_url)
-                test_conn.close()
+                # Le pool ouvre DB_POOL_MIN connexions : sert aussi de test de connexion
+                self.pool = psycopg2.pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, self.database_url)
                 self.db_type = 'postgresql'
                 self.psycopg2 = psycopg2
                 self.RealDictCursor = RealDictCursor
-                logger.info("Successfully connected to PostgreSQL database")
+                logger.info(f"Successfully connected to PostgreSQL database (pool {DB_POOL_MIN}-{DB_POOL_MAX})")
             except Exception as e:
                 logger.warning(f"Failed to connect to PostgreSQL: {e}. Falling back to SQLite.")
                 self.db_type = 'sqlite'
@@ -289,237 +599,535 @@ class DatabaseManager:
         else:
             self.db_type = 'sqlite'
             self.db_path = 'snipes.db'
+
+        if self.db_type == 'sqlite':
+            # Une seule connexion longue durée, partagée entre threads sous verrou
+            self.sqlite_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.sqlite_conn.execute("PRAGMA journal_mode=WAL")
+            self.sqlite_conn.execute("PRAGMA synchronous=NORMAL")
+            self.sqlite_lock = threading.RLock()
+
+        # Pas plus de threads que de connexions du pool : getconn() ne peut pas s'épuiser
+        self.executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
         
         # Initialiser les tables
         self._init_tables()
     
     def _init_tables(self):
         """Initialise toutes les tables nécessaires"""
-        conn = self._get_connection()
-        c = conn.cursor()
+        with self._connection() as conn:
+            c = conn.cursor()
         
-        try:
-            if self.db_type == 'postgresql':
-                # Tables PostgreSQL
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS banned_fids (
-                        fid VARCHAR(50) PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS whitelisted_fids (
-                        fid VARCHAR(50) PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS keyword_whitelist (
-                        keyword VARCHAR(100) PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS bot_preferences (
-                        key VARCHAR(50) PRIMARY KEY,
-                        value TEXT
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS active_snipes (
-                        id SERIAL PRIMARY KEY,
-                        contract_address VARCHAR(42) UNIQUE,
-                        token_name VARCHAR(100),
-                        token_symbol VARCHAR(20),
-                        fid VARCHAR(50),
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS tracked_addresses (
-                        address VARCHAR(42) PRIMARY KEY,
-                        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-            else:
-                # Tables SQLite
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS banned_fids (
-                        fid TEXT PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS whitelisted_fids (
-                        fid TEXT PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS keyword_whitelist (
-                        keyword TEXT PRIMARY KEY
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS bot_preferences (
-                        key TEXT PRIMARY KEY,
-                        value TEXT
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS active_snipes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        contract_address TEXT UNIQUE,
-                        token_name TEXT,
-                        token_symbol TEXT,
-                        fid TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS tracked_addresses (
-                        address TEXT PRIMARY KEY,
-                        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+            try:
+                if self.db_type == 'postgresql':
+                    # Tables PostgreSQL
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS banned_fids (
+                            fid VARCHAR(50) PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS whitelisted_fids (
+                            fid VARCHAR(50) PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS keyword_whitelist (
+                            keyword VARCHAR(100) PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS bot_preferences (
+                            key VARCHAR(50) PRIMARY KEY,
+                            value TEXT
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS active_snipes (
+                            id SERIAL PRIMARY KEY,
+                            contract_address VARCHAR(42) UNIQUE,
+                            token_name VARCHAR(100),
+                            token_symbol VARCHAR(20),
+                            fid VARCHAR(50),
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS tracked_addresses (
+                            address VARCHAR(42) PRIMARY KEY,
+                            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS deployments (
+                            id BIGSERIAL PRIMARY KEY,
+                            launchpad VARCHAR(20),
+                            block_number BIGINT,
+                            tx_hash VARCHAR(66),
+                            token_address VARCHAR(42) UNIQUE,
+                            fid VARCHAR(50),
+                            creator_address VARCHAR(42),
+                            name TEXT,
+                            symbol TEXT,
+                            image TEXT,
+                            verdict VARCHAR(20),
+                            rule VARCHAR(30),
+                            alert_latency_ms REAL,
+                            seen_at DOUBLE PRECISION
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS tracked_tokens (
+                            token_address VARCHAR(42) PRIMARY KEY,
+                            first_seen DOUBLE PRECISION NOT NULL,
+                            state TEXT
+                        )
+                    """)
+                else:
+                    # Tables SQLite
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS banned_fids (
+                            fid TEXT PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS whitelisted_fids (
+                            fid TEXT PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS keyword_whitelist (
+                            keyword TEXT PRIMARY KEY
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS bot_preferences (
+                            key TEXT PRIMARY KEY,
+                            value TEXT
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS active_snipes (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            contract_address TEXT UNIQUE,
+                            token_name TEXT,
+                            token_symbol TEXT,
+                            fid TEXT,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS tracked_addresses (
+                            address TEXT PRIMARY KEY,
+                            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS deployments (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            launchpad TEXT,
+                            block_number INTEGER,
+                            tx_hash TEXT,
+                            token_address TEXT UNIQUE,
+                            fid TEXT,
+                            creator_address TEXT,
+                            name TEXT,
+                            symbol TEXT,
+                            image TEXT,
+                            verdict TEXT,
+                            rule TEXT,
+                            alert_latency_ms REAL,
+                            seen_at REAL
+                        )
+                    """)
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS tracked_tokens (
+                            token_address TEXT PRIMARY KEY,
+                            first_seen REAL NOT NULL,
+                            state TEXT
+                        )
+                    """)
+
+                # Index des requêtes d'historique (compteurs au démarrage, lastclankerv4)
+                c.execute("CREATE INDEX IF NOT EXISTS idx_deployments_seen_at ON deployments (seen_at)")
+                c.execute("CREATE INDEX IF NOT EXISTS idx_deployments_launchpad_block ON deployments (launchpad, block_number)")
+
+                self._init_change_feed(c)
             
-            conn.commit()
-            logger.info("Database tables initialized successfully")
+                conn.commit()
+                logger.info("Database tables initialized successfully")
             
-        except Exception as e:
-            logger.error(f"Error initializing database tables: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
+            except Exception as e:
+                logger.error(f"Error initializing database tables: {e}")
+                conn.rollback()
     
-    def _get_connection(self):
+    def _init_change_feed(self, c):
+        """Triggers qui publient chaque mutation des tables d'état (NOTIFY sur PostgreSQL, table state_changes sur SQLite)"""
+        if self.db_type == 'postgresql':
+            c.execute(f"""
+                CREATE OR REPLACE FUNCTION notify_state_change() RETURNS trigger AS $$
+                DECLARE
+                    changed RECORD;
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        changed := OLD;
+                    ELSE
+                        changed := NEW;
+                    END IF;
+                    IF TG_TABLE_NAME = 'bot_preferences' THEN
+                        IF changed.key LIKE '{LOG_CURSOR_PREFERENCE_PREFIX}%' THEN
+                            RETURN NULL;
+                        END IF;
+                    END IF;
+                    PERFORM pg_notify('{STATE_CHANGE_CHANNEL}', json_build_object(
+                        'table', TG_TABLE_NAME, 'op', TG_OP, 'row', row_to_json(changed)
+                    )::text);
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            for table in STATE_KEY_COLUMNS:
+                c.execute(f"DROP TRIGGER IF EXISTS {table}_state_change ON {table}")
+                c.execute(f"""
+                    CREATE TRIGGER {table}_state_change
+                    AFTER INSERT OR UPDATE OR DELETE ON {table}
+                    FOR EACH ROW EXECUTE PROCEDURE notify_state_change()
+                """)
+        else:
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS state_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    table_name TEXT,
+                    op TEXT,
+                    row_key TEXT,
+                    row_value TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            for table, column in STATE_KEY_COLUMNS.items():
+                for op, alias in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+                    value = f"{alias}.value" if table == 'bot_preferences' else "NULL"
+                    when = f"WHEN {alias}.key NOT LIKE '{LOG_CURSOR_PREFERENCE_PREFIX}%'" if table == 'bot_preferences' else ""
+                    c.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_state_{op.lower()}
+                        AFTER {op} ON {table} {when}
+                        BEGIN
+                            INSERT INTO state_changes (table_name, op, row_key, row_value)
+                            VALUES ('{table}', '{op}', {alias}.{column}, {value});
+                        END
+                    """)
+
+    def latest_state_change_id(self) -> int:
+        """Dernier id du journal state_changes (SQLite)"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM state_changes")
+            return c.fetchone()[0]
+
+    def get_state_changes_since(self, last_id: int, limit: int = STATE_CHANGE_BATCH_LIMIT) -> List[Dict]:
+        """Mutations journalisées après last_id (SQLite), au même format que les payloads NOTIFY"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute(
+                "SELECT id, table_name, op, row_key, row_value FROM state_changes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, limit)
+            )
+            rows = c.fetchall()
+        return [
+            {
+                'id': row_id,
+                'table': table,
+                'op': op,
+                'row': {STATE_KEY_COLUMNS[table]: key, 'value': value},
+            }
+            for row_id, table, op, key, value in rows
+        ]
+
+    def prune_state_changes(self, max_age_seconds: int):
+        """Purge le journal state_changes (SQLite)"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM state_changes WHERE created_at < datetime('now', ?)", (f"-{int(max_age_seconds)} seconds",))
+            conn.commit()
+
+    def open_listen_connection(self):
+        """Connexion PostgreSQL dédiée (hors pool, autocommit) abonnée au canal des mutations"""
+        conn = self.psycopg2.connect(self.database_url, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+        conn.autocommit = True
+        conn.cursor().execute(f"LISTEN {STATE_CHANGE_CHANNEL}")
+        return conn
+
+    def close_listen_connection(self, conn):
+        """Ferme la connexion LISTEN, même cassée ou déjà fermée (elle n'occupe pas de place dans le pool)"""
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"[STATE] Fermeture de la connexion LISTEN: {e}")
+
+    @contextmanager
+    def _connection(self):
+        """Connexion empruntée au pool (PostgreSQL) ou connexion SQLite partagée, rendue en sortie de bloc"""
+        if self.db_type == 'postgresql':
+            conn = self.pool.getconn()
+            try:
+                yield conn
+            except Exception:
+                if not conn.closed:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                raise
+            finally:
+                # Une connexion cassée est fermée plutôt que remise dans le pool
+                self.pool.putconn(conn, close=bool(conn.closed))
+        else:
+            with self.sqlite_lock:
+                try:
+                    yield self.sqlite_conn
+                except Exception:
+                    self.sqlite_conn.rollback()
+                    raise
+
+    async def run(self, func, *args):
+        """Exécute un appel DB bloquant dans le pool de threads dédié, hors de la boucle d'événements"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def close(self):
+        """Ferme les connexions et le pool de threads"""
+        self.executor.shutdown(wait=True)
         if self.db_type == 'postgresql':
-            return self.psycopg2.connect(self.database_url)
+            self.pool.closeall()
         else:
-            return sqlite3.connect(self.db_path)
+            self.sqlite_conn.close()
     
     # Gestion des FIDs bannis
     def get_banned_fids(self) -> Set[str]:
         """Récupère tous les FIDs bannis"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT fid FROM banned_fids")
-        fids = {row[0] for row in c.fetchall()}
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT fid FROM banned_fids")
+            fids = {row[0] for row in c.fetchall()}
         return fids
     
     def add_banned_fid(self, fid: str):
         """Ajoute un FID à la liste des bannis"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("INSERT INTO banned_fids (fid) VALUES (%s) ON CONFLICT (fid) DO NOTHING", (fid,))
-        else:
-            c.execute("INSERT OR REPLACE INTO banned_fids (fid) VALUES (?)", (fid,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("INSERT INTO banned_fids (fid) VALUES (%s) ON CONFLICT (fid) DO NOTHING", (fid,))
+            else:
+                c.execute("INSERT OR REPLACE INTO banned_fids (fid) VALUES (?)", (fid,))
+            conn.commit()
     
     def remove_banned_fid(self, fid: str):
         """Retire un FID de la liste des bannis"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("DELETE FROM banned_fids WHERE fid = %s", (fid,))
-        else:
-            c.execute("DELETE FROM banned_fids WHERE fid = ?", (fid,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM banned_fids WHERE fid = %s", (fid,))
+            else:
+                c.execute("DELETE FROM banned_fids WHERE fid = ?", (fid,))
+            conn.commit()
     
     # Gestion des FIDs whitelistés
     def get_whitelisted_fids(self) -> Set[str]:
         """Récupère tous les FIDs whitelistés"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT fid FROM whitelisted_fids")
-        fids = {row[0] for row in c.fetchall()}
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT fid FROM whitelisted_fids")
+            fids = {row[0] for row in c.fetchall()}
         return fids
     
     def add_whitelisted_fid(self, fid: str):
         """Ajoute un FID à la whitelist"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("INSERT INTO whitelisted_fids (fid) VALUES (%s) ON CONFLICT (fid) DO NOTHING", (fid,))
-        else:
-            c.execute("INSERT OR REPLACE INTO whitelisted_fids (fid) VALUES (?)", (fid,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("INSERT INTO whitelisted_fids (fid) VALUES (%s) ON CONFLICT (fid) DO NOTHING", (fid,))
+            else:
+                c.execute("INSERT OR REPLACE INTO whitelisted_fids (fid) VALUES (?)", (fid,))
+            conn.commit()
     
     def remove_whitelisted_fid(self, fid: str):
         """Retire un FID de la whitelist"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("DELETE FROM whitelisted_fids WHERE fid = %s", (fid,))
-        else:
-            c.execute("DELETE FROM whitelisted_fids WHERE fid = ?", (fid,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM whitelisted_fids WHERE fid = %s", (fid,))
+            else:
+                c.execute("DELETE FROM whitelisted_fids WHERE fid = ?", (fid,))
+            conn.commit()
+    
+    def bulk_add_fids(self, table: str, fids: List[str]) -> int:
+        """Insère un lot de FIDs dans banned_fids ou whitelisted_fids en une seule transaction.
+        PostgreSQL : COPY dans une table temporaire puis INSERT ... ON CONFLICT ; SQLite : executemany."""
+        if table not in ('banned_fids', 'whitelisted_fids'):
+            raise ValueError(f"Table FID inconnue: {table}")
+        if not fids:
+            return 0
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("CREATE TEMP TABLE fid_import (fid VARCHAR(50)) ON COMMIT DROP")
+                c.copy_from(io.StringIO("\n".join(fids) + "\n"), 'fid_import', columns=('fid',))
+                c.execute(f"INSERT INTO {table} (fid) SELECT fid FROM fid_import ON CONFLICT (fid) DO NOTHING")
+                inserted = c.rowcount
+            else:
+                before = conn.total_changes
+                c.executemany(f"INSERT OR IGNORE INTO {table} (fid) VALUES (?)", ((fid,) for fid in fids))
+                inserted = conn.total_changes - before
+            conn.commit()
+        return inserted
+    
+    # Journal des déploiements
+    def insert_deployments(self, rows: List[Dict]):
+        """Insère un lot de déploiements en une transaction (doublons de token ignorés)"""
+        if not rows:
+            return
+        columns = ", ".join(DEPLOYMENT_JOURNAL_COLUMNS)
+        values = [tuple(row.get(column) for column in DEPLOYMENT_JOURNAL_COLUMNS) for row in rows]
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                placeholders = ", ".join(["%s"] * len(DEPLOYMENT_JOURNAL_COLUMNS))
+                c.executemany(f"INSERT INTO deployments ({columns}) VALUES ({placeholders}) ON CONFLICT (token_address) DO NOTHING", values)
+            else:
+                placeholders = ", ".join(["?"] * len(DEPLOYMENT_JOURNAL_COLUMNS))
+                c.executemany(f"INSERT OR IGNORE INTO deployments ({columns}) VALUES ({placeholders})", values)
+            conn.commit()
+
+    def get_latest_deployment(self, launchpad: str) -> Optional[Dict]:
+        """Dernier déploiement journalisé pour une factory"""
+        columns = ", ".join(DEPLOYMENT_JOURNAL_COLUMNS)
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute(f"SELECT {columns} FROM deployments WHERE launchpad = %s ORDER BY block_number DESC, id DESC LIMIT 1", (launchpad,))
+            else:
+                c.execute(f"SELECT {columns} FROM deployments WHERE launchpad = ? ORDER BY block_number DESC, id DESC LIMIT 1", (launchpad,))
+            row = c.fetchone()
+        return dict(zip(DEPLOYMENT_JOURNAL_COLUMNS, row)) if row else None
+
+    def get_deployment_activity_since(self, since: float) -> List[tuple]:
+        """(fid, creator_address, seen_at) des déploiements journalisés depuis `since`, dans l'ordre"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("SELECT fid, creator_address, seen_at FROM deployments WHERE seen_at >= %s ORDER BY seen_at", (since,))
+            else:
+                c.execute("SELECT fid, creator_address, seen_at FROM deployments WHERE seen_at >= ? ORDER BY seen_at", (since,))
+            return c.fetchall()
+    
+    def sync_tracked_tokens(self, upserts: List[tuple], deletes: List[str]):
+        """Écrit en une transaction les tokens suivis modifiés (token, first_seen, state JSON) et retirés"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                if upserts:
+                    c.executemany("""
+                        INSERT INTO tracked_tokens (token_address, first_seen, state) VALUES (%s, %s, %s)
+                        ON CONFLICT (token_address) DO UPDATE SET first_seen = EXCLUDED.first_seen, state = EXCLUDED.state
+                    """, upserts)
+                if deletes:
+                    c.executemany("DELETE FROM tracked_tokens WHERE token_address = %s", [(token,) for token in deletes])
+            else:
+                if upserts:
+                    c.executemany("INSERT OR REPLACE INTO tracked_tokens (token_address, first_seen, state) VALUES (?, ?, ?)", upserts)
+                if deletes:
+                    c.executemany("DELETE FROM tracked_tokens WHERE token_address = ?", [(token,) for token in deletes])
+            conn.commit()
+
+    def load_tracked_tokens(self, since: float) -> List[tuple]:
+        """(token, first_seen, state JSON) des tokens suivis depuis `since` ; les plus anciens sont purgés"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM tracked_tokens WHERE first_seen < %s", (since,))
+                c.execute("SELECT token_address, first_seen, state FROM tracked_tokens ORDER BY first_seen")
+            else:
+                c.execute("DELETE FROM tracked_tokens WHERE first_seen < ?", (since,))
+                c.execute("SELECT token_address, first_seen, state FROM tracked_tokens ORDER BY first_seen")
+            rows = c.fetchall()
+            conn.commit()
+            return rows
     
     # Gestion des mots-clés whitelistés
     def get_keyword_whitelist(self) -> Set[str]:
         """Récupère tous les mots-clés whitelistés"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT keyword FROM keyword_whitelist")
-        keywords = {row[0] for row in c.fetchall()}
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT keyword FROM keyword_whitelist")
+            keywords = {row[0] for row in c.fetchall()}
         return keywords
     
     def add_keyword(self, keyword: str):
         """Ajoute un mot-clé à la whitelist"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("INSERT INTO keyword_whitelist (keyword) VALUES (%s) ON CONFLICT (keyword) DO NOTHING", (keyword,))
-        else:
-            c.execute("INSERT OR REPLACE INTO keyword_whitelist (keyword) VALUES (?)", (keyword,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("INSERT INTO keyword_whitelist (keyword) VALUES (%s) ON CONFLICT (keyword) DO NOTHING", (keyword,))
+            else:
+                c.execute("INSERT OR REPLACE INTO keyword_whitelist (keyword) VALUES (?)", (keyword,))
+            conn.commit()
     
     def remove_keyword(self, keyword: str):
         """Retire un mot-clé de la whitelist"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("DELETE FROM keyword_whitelist WHERE keyword = %s", (keyword,))
-        else:
-            c.execute("DELETE FROM keyword_whitelist WHERE keyword = ?", (keyword,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM keyword_whitelist WHERE keyword = %s", (keyword,))
+            else:
+                c.execute("DELETE FROM keyword_whitelist WHERE keyword = ?", (keyword,))
+            conn.commit()
     
     def clear_keywords(self):
         """Vide complètement la whitelist de mots-clés"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("DELETE FROM keyword_whitelist")
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM keyword_whitelist")
+            conn.commit()
     
     # Gestion des préférences
     def get_preference(self, key: str, default: str = None) -> str:
         """Récupère une préférence"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("SELECT value FROM bot_preferences WHERE key = %s", (key,))
-        else:
-            c.execute("SELECT value FROM bot_preferences WHERE key = ?", (key,))
-        result = c.fetchone()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("SELECT value FROM bot_preferences WHERE key = %s", (key,))
+            else:
+                c.execute("SELECT value FROM bot_preferences WHERE key = ?", (key,))
+            result = c.fetchone()
         return result[0] if result else default
     
     def set_preference(self, key: str, value: str):
         """Définit une préférence"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("INSERT INTO bot_preferences (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (key, value))
-        else:
-            c.execute("INSERT OR REPLACE INTO bot_preferences (key, value) VALUES (?, ?)", (key, value))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("INSERT INTO bot_preferences (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (key, value))
+            else:
+                c.execute("INSERT OR REPLACE INTO bot_preferences (key, value) VALUES (?, ?)", (key, value))
+            conn.commit()
+    
+    def delete_preference(self, key: str):
+        """Supprime une préférence"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM bot_preferences WHERE key = %s", (key,))
+            else:
+                c.execute("DELETE FROM bot_preferences WHERE key = ?", (key,))
+            conn.commit()
+
+    def ping(self):
+        """Vérifie que la connexion répond"""
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT 1")
+            c.fetchone()
     
     def get_volume_threshold(self) -> float:
         """Récupère le seuil de volume par défaut"""
@@ -541,34 +1149,225 @@ class DatabaseManager:
     
     def get_tracked_addresses(self) -> Set[str]:
         """Récupère toutes les adresses trackées"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        c.execute("SELECT address FROM tracked_addresses")
-        addresses = {row[0] for row in c.fetchall()}
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            c.execute("SELECT address FROM tracked_addresses")
+            addresses = {row[0] for row in c.fetchall()}
         return addresses
     
     def add_tracked_address(self, address: str):
         """Ajoute une adresse à la liste des trackées"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("INSERT INTO tracked_addresses (address) VALUES (%s) ON CONFLICT (address) DO NOTHING", (address,))
-        else:
-            c.execute("INSERT OR IGNORE INTO tracked_addresses (address) VALUES (?)", (address,))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("INSERT INTO tracked_addresses (address) VALUES (%s) ON CONFLICT (address) DO NOTHING", (address,))
+            else:
+                c.execute("INSERT OR IGNORE INTO tracked_addresses (address) VALUES (?)", (address,))
+            conn.commit()
     
     def remove_tracked_address(self, address: str):
         """Retire une adresse de la liste des trackées"""
-        conn = self._get_connection()
-        c = conn.cursor()
-        if self.db_type == 'postgresql':
-            c.execute("DELETE FROM tracked_addresses WHERE address = %s", (address,))
+        with self._connection() as conn:
+            c = conn.cursor()
+            if self.db_type == 'postgresql':
+                c.execute("DELETE FROM tracked_addresses WHERE address = %s", (address,))
+            else:
+                c.execute("DELETE FROM tracked_addresses WHERE address = ?", (address,))
+            conn.commit()
+
+class StateChangeFeed:
+    """Flux des mutations d'état faites par n'importe quelle instance partageant la base.
+
+    PostgreSQL : LISTEN sur le canal alimenté par les triggers (resynchronisation
+    complète après chaque reconnexion, les NOTIFY manqués étant perdus).
+    SQLite : polling de la table state_changes remplie par les triggers.
+    Les mutations de l'instance elle-même reviennent aussi : les appliquer est idempotent."""
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.on_change = None  # async callback(liste de mutations {table, op, row})
+        self.on_resync = None  # async callback() : rechargement complet de l'état
+        self.last_change_id = None  # curseur du journal state_changes (SQLite)
+        self.last_prune = 0.0
+
+    def mark_loaded(self):
+        """À appeler avant le chargement initial de l'état : le polling repartira de ce point"""
+        if self.db.db_type == 'sqlite':
+            self.last_change_id = self.db.latest_state_change_id()
+
+    async def run(self):
+        if self.db.db_type == 'postgresql':
+            await self._listen()
         else:
-            c.execute("DELETE FROM tracked_addresses WHERE address = ?", (address,))
-        conn.commit()
-        conn.close()
+            await self._poll()
+
+    async def _listen(self):
+        """LISTEN PostgreSQL sur une connexion dédiée, lue via le sélecteur de la boucle"""
+        loop = asyncio.get_running_loop()
+        connected_once = False
+        while True:
+            conn = None
+            fd = None  # descripteur enregistré auprès de la boucle (fileno() lève une fois la connexion fermée)
+            try:
+                conn = await self.db.run(self.db.open_listen_connection)
+                queue: asyncio.Queue = asyncio.Queue()
+
+                def on_readable():
+                    try:
+                        conn.poll()
+                    except Exception as e:
+                        queue.put_nowait(e)
+                        return
+                    while conn.notifies:
+                        queue.put_nowait(conn.notifies.pop(0))
+
+                fd = conn.fileno()
+                loop.add_reader(fd, on_readable)
+                logger.info(f"[STATE] LISTEN {STATE_CHANGE_CHANNEL} actif")
+                if connected_once and self.on_resync:
+                    await self.on_resync()
+                connected_once = True
+                while True:
+                    notifications = [await queue.get()]
+                    while not queue.empty():
+                        notifications.append(queue.get_nowait())
+                    for item in notifications:
+                        if isinstance(item, Exception):
+                            raise item
+                    await self._dispatch([json.loads(notify.payload) for notify in notifications])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[STATE] Erreur du change feed PostgreSQL: {e}")
+            finally:
+                if fd is not None:
+                    try:
+                        loop.remove_reader(fd)
+                    except Exception as e:
+                        logger.warning(f"[STATE] Désinscription du lecteur LISTEN: {e}")
+                if conn is not None:
+                    self.db.close_listen_connection(conn)
+            await asyncio.sleep(LOG_SUBSCRIPTION_RECONNECT_DELAY)
+
+    async def _poll(self):
+        """Fallback SQLite : relit le journal state_changes à intervalle régulier"""
+        if self.last_change_id is None:
+            self.last_change_id = await self.db.run(self.db.latest_state_change_id)
+        while True:
+            await asyncio.sleep(STATE_POLL_INTERVAL)
+            try:
+                changes = await self.db.run(self.db.get_state_changes_since, self.last_change_id)
+                if changes:
+                    self.last_change_id = changes[-1]['id']
+                    await self._dispatch(changes)
+                if time.time() - self.last_prune > 3600:
+                    self.last_prune = time.time()
+                    await self.db.run(self.db.prune_state_changes, STATE_CHANGE_RETENTION)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[STATE] Erreur du polling state_changes: {e}")
+
+    async def _dispatch(self, changes: List[Dict]):
+        if not self.on_change:
+            return
+        try:
+            await self.on_change(changes)
+        except Exception as e:
+            logger.error(f"[STATE] Erreur lors de l'application de {len(changes)} mutation(s): {e}")
+
+class DeploymentJournal:
+    """Journal des déploiements normalisés (table deployments).
+
+    record() ne touche pas la base : les lignes sont écrites par lots dans le
+    pool de threads DB, toutes les DEPLOYMENT_JOURNAL_FLUSH_INTERVAL secondes
+    ou dès que DEPLOYMENT_JOURNAL_BATCH_SIZE lignes sont en attente."""
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.pending: List[Dict] = []
+        self.wakeup = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.written = 0
+
+    def record(self, row: Dict):
+        self.pending.append(row)
+        if len(self.pending) >= DEPLOYMENT_JOURNAL_BATCH_SIZE:
+            self.wakeup.set()
+
+    async def flush(self):
+        """Écrit les lignes en attente (appelé aussi avant les requêtes d'historique)"""
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            try:
+                await self.db.run(self.db.insert_deployments, batch)
+                self.written += len(batch)
+            except Exception as e:
+                logger.error(f"[JOURNAL] Échec d'écriture de {len(batch)} déploiement(s): {e}")
+                # Conservé pour le prochain lot, sans croître indéfiniment si la base est indisponible
+                self.pending = (batch + self.pending)[-DEPLOYMENT_JOURNAL_BATCH_SIZE * 10:]
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), DEPLOYMENT_JOURNAL_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+class TrackedTokenStore:
+    """Copie persistante de tracked_clanker_tokens (table tracked_tokens).
+
+    mark() note un token modifié ; flush() écrit l'état courant des tokens notés
+    (upsert s'il est toujours suivi, suppression sinon) en une transaction, toutes
+    les TRACKED_TOKENS_FLUSH_INTERVAL secondes. Au démarrage, load() relit les
+    tokens encore dans leur fenêtre de surveillance."""
+
+    def __init__(self, db: DatabaseManager, tracked: Dict[str, Dict]):
+        self.db = db
+        self.tracked = tracked
+        self.dirty: Set[str] = set()
+        self.flush_lock = asyncio.Lock()
+
+    def mark(self, token: str):
+        self.dirty.add(token)
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.dirty:
+                return
+            tokens, self.dirty = self.dirty, set()
+            upserts, deletes = [], []
+            for token in tokens:
+                info = self.tracked.get(token)
+                if info is None:
+                    deletes.append(token)
+                else:
+                    state = {key: value for key, value in info.items() if key != 'first_seen'}
+                    upserts.append((token, info['first_seen'], json.dumps(state)))
+            try:
+                await self.db.run(self.db.sync_tracked_tokens, upserts, deletes)
+            except Exception as e:
+                logger.error(f"[VOLUME TRACK] Échec de sauvegarde de {len(tokens)} token(s) suivi(s): {e}")
+                self.dirty |= tokens
+
+    async def load(self, ttl: float) -> List[tuple]:
+        """(token, info) des tokens suivis depuis moins de ttl secondes, du plus ancien au plus récent"""
+        rows = await self.db.run(self.db.load_tracked_tokens, time.time() - ttl)
+        restored = []
+        for token, first_seen, state in rows:
+            info = json.loads(state) if state else {}
+            info['first_seen'] = first_seen
+            restored.append((token, info))
+        return restored
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(TRACKED_TOKENS_FLUSH_INTERVAL)
+            await self.flush()
 
 # Remplace l'ABI du router Uniswap V3
 UNISWAP_V3_ROUTER_ABI = [
@@ -600,8 +1399,29 @@ UNISWAP_V3_ROUTER_ABI = [
 # Réinitialise le router avec la bonne ABI
 router = w3.eth.contract(address=config.UNISWAP_V3_ROUTER, abi=UNISWAP_V3_ROUTER_ABI)
 
-# Ajoute l'ABI minimale pour WETH (approve)
+# Ajoute l'ABI minimale pour WETH (deposit, allowance, approve)
 WETH_ABI = [
+    {
+        "constant": False,
+        "inputs": [],
+        "name": "deposit",
+        "outputs": [],
+        "payable": True,
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [
+            {"name": "_owner", "type": "address"},
+            {"name": "_spender", "type": "address"}
+        ],
+        "name": "allowance",
+        "outputs": [
+            {"name": "", "type": "uint256"}
+        ],
+        "type": "function"
+    },
     {
         "constant": False,
         "inputs": [
@@ -618,8 +1438,931 @@ WETH_ABI = [
 
 weth = w3.eth.contract(address=config.WETH_ADDRESS, abi=WETH_ABI)
 
-# Ajout de la variable d'environnement pour QuickNode WebSocket
-QUICKNODE_WSS = os.getenv('QUICKNODE_WSS')
+LOG_SUBSCRIPTION_RECONNECT_DELAY = 5  # seconds
+LOG_CURSOR_PREFERENCE_PREFIX = "log_cursor_"
+BACKFILL_CHUNK_SIZE = 500  # blocs par appel eth_getLogs
+MAX_BACKFILL_BLOCKS = 43200  # ~24h de blocs Base (2s)
+CURSOR_SAVE_INTERVAL = 10  # seconds
+LOG_BURST_WINDOW = 0.005  # seconds d'attente pour regrouper une rafale de logs
+REORG_WINDOW_BLOCKS = 64  # hashes de blocs récents gardés pour détecter les reorgs
+# Profondeur de confirmation par classe d'alerte (0 = alerte dès que le log est vu)
+ALERT_CONFIRMATION_DEPTHS = {
+    "snipe": 0,
+    "tracked": 0,
+    "premium": 1,
+    "keyword": 0,
+    "plain": 0,
+}
+
+# Surveillance optionnelle du mempool (ex: node local) : désactivée si non configurée
+MEMPOOL_WSS = os.getenv('MEMPOOL_WSS')
+MEMPOOL_SEEN_TX_LIMIT = 5000  # hashes de tx en attente déjà traités gardés en mémoire
+MEMPOOL_ARM_TTL = 120  # un snipe armé dont la tx n'est pas incluse dans ce délai repasse en 'pending'
+BUY_WEBHOOK_URL = "https://clankersniper-production.up.railway.app/buy_webhook"
+# Statuts d'un snipe encore actif ('armed' = achat préparé pour un deployToken vu dans le mempool)
+SNIPE_ACTIVE_STATUSES = ('pending', 'armed')
+
+# Volume on-chain : events Swap des pools des tokens suivis (Uniswap v3 + PoolManager v4)
+UNISWAP_V3_FACTORY_ADDRESS = "0x33128a8fC17869897dcE68Ed026d694621f6FDfD"
+UNISWAP_V4_POOL_MANAGER_ADDRESS = "0x498581fF718922c3f8e6A244956aF099B2652b2b"
+USDC_ADDRESS = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+# Pool WETH/USDC 0,05% (token0 = WETH, token1 = USDC) dont slot0 donne le prix de l'ETH
+ETH_USD_POOL_ADDRESS = os.getenv('ETH_USD_POOL_ADDRESS') or "0xd0b53D9277642d899DF5C87A3966A349A798F224"
+ETH_PRICE_REFRESH_SECONDS = 60
+# Tokens de cotation reconnus : adresse -> décimales (ETH natif pour les pools v4)
+SWAP_QUOTE_DECIMALS = {
+    ZERO_ADDRESS: 18,
+    config.WETH_ADDRESS.lower(): 18,
+    USDC_ADDRESS.lower(): 6,
+}
+# Volume par token : buckets de 10s sur 24h (array circulaire), sommes par fenêtre tenues à jour
+VOLUME_WINDOWS = {'1m': 60, '5m': 300, '1h': 3600, '24h': 24 * 3600}
+VOLUME_BUCKET_SECONDS = 10
+VOLUME_VELOCITY_RATIO = 2.0  # alerte si le volume de la dernière minute atteint ce multiple de la précédente
+VOLUME_VELOCITY_MIN_USD = 1000  # volume minimal sur la dernière minute pour l'alerte d'accélération
+SWAP_RESUBSCRIBE_DELAY = 1.0  # seconds : regroupe les ajouts de pools avant de resouscrire
+SWAP_SEEN_LOG_LIMIT = 5000  # logs Swap déjà comptés (doublons pendant une resouscription)
+UNISWAP_V3_POOL_ABI = [
+    {"anonymous":False,"inputs":[{"indexed":True,"internalType":"address","name":"sender","type":"address"},{"indexed":True,"internalType":"address","name":"recipient","type":"address"},{"indexed":False,"internalType":"int256","name":"amount0","type":"int256"},{"indexed":False,"internalType":"int256","name":"amount1","type":"int256"},{"indexed":False,"internalType":"uint160","name":"sqrtPriceX96","type":"uint160"},{"indexed":False,"internalType":"uint128","name":"liquidity","type":"uint128"},{"indexed":False,"internalType":"int24","name":"tick","type":"int24"}],"name":"Swap","type":"event"},
+    {"inputs":[],"name":"slot0","outputs":[{"internalType":"uint160","name":"sqrtPriceX96","type":"uint160"},{"internalType":"int24","name":"tick","type":"int24"},{"internalType":"uint16","name":"observationIndex","type":"uint16"},{"internalType":"uint16","name":"observationCardinality","type":"uint16"},{"internalType":"uint16","name":"observationCardinalityNext","type":"uint16"},{"internalType":"uint8","name":"feeProtocol","type":"uint8"},{"internalType":"bool","name":"unlocked","type":"bool"}],"stateMutability":"view","type":"function"}
+]
+UNISWAP_V4_POOL_MANAGER_ABI = [
+    {"anonymous":False,"inputs":[{"indexed":True,"internalType":"PoolId","name":"id","type":"bytes32"},{"indexed":True,"internalType":"address","name":"sender","type":"address"},{"indexed":False,"internalType":"int128","name":"amount0","type":"int128"},{"indexed":False,"internalType":"int128","name":"amount1","type":"int128"},{"indexed":False,"internalType":"uint160","name":"sqrtPriceX96","type":"uint160"},{"indexed":False,"internalType":"uint128","name":"liquidity","type":"uint128"},{"indexed":False,"internalType":"int24","name":"tick","type":"int24"},{"indexed":False,"internalType":"uint24","name":"fee","type":"uint24"}],"name":"Swap","type":"event"}
+]
+UNISWAP_V3_FACTORY_ABI = [
+    {"inputs":[{"internalType":"address","name":"","type":"address"},{"internalType":"address","name":"","type":"address"},{"internalType":"uint24","name":"","type":"uint24"}],"name":"getPool","outputs":[{"internalType":"address","name":"","type":"address"}],"stateMutability":"view","type":"function"}
+]
+
+def get_event_topic(abi: List[Dict], event_name: str) -> str:
+    """Retourne le topic0 (hash de signature) d'un event à partir de l'ABI"""
+    for item in abi:
+        if item.get("type") == "event" and item.get("name") == event_name:
+            return Web3.to_hex(event_abi_to_log_topic(item))
+    raise ValueError(f"Event {event_name} introuvable dans l'ABI")
+
+class LogSubscriptionEngine:
+    """Moteur de souscription eth_subscribe("logs") sur le WebSocket QuickNode.
+
+    Une seule souscription couvre toutes les factories enregistrées (liste
+    d'adresses + topics) et chaque log est routé vers son handler via une
+    table de dispatch (adresse, topic0). Les logs sont poussés par le node
+    dès qu'il les voit, dans un seul flux ordonné.
+
+    Chaque route garde un curseur (dernier bloc traité) dans bot_preferences :
+    à chaque (re)connexion, les blocs manqués sont rattrapés par eth_getLogs
+    découpé en tranches avant de passer en live.
+
+    Une souscription newHeads alimente une fenêtre des derniers hashes de
+    blocs : un parentHash qui ne correspond plus, ou un log `removed: true`,
+    déclenche on_reorg / on_removed pour retirer les alertes orphelines. Les
+    callbacks différés via run_when_confirmed attendent leur profondeur de
+    confirmation et sont abandonnés si leur bloc est réorganisé.
+
+    Avec plusieurs URLs WebSocket, une erreur de connexion bascule sur la
+    suivante (le backfill couvre les blocs manqués pendant la bascule).
+
+    Les logs reçus ensemble (même rafale ou même tranche de backfill) passent
+    d'abord par `enricher`, qui peut regrouper leurs appels RPC en un lot."""
+
+    def __init__(self, wss_urls, rpc_w3=None, db=None):
+        self.wss_urls = [wss_urls] if isinstance(wss_urls, str) else list(wss_urls)
+        self.wss_index = 0
+        self.rpc_w3 = rpc_w3  # client HTTP async pour le backfill eth_getLogs
+        self.db = db
+        self.routes = {}  # (address lower, topic0) -> (label, handler)
+        self.cursors: Dict[str, int] = {}  # label -> dernier bloc traité
+        self.cursors_loaded = False
+        self.live_from_block = 0
+        self.last_cursor_save = 0.0
+        self.head_block = 0
+        self.block_hashes: Dict[int, str] = {}  # numéro de bloc -> hash (fenêtre récente)
+        self.pending_confirmations = []  # (block_number, block_hash, depth, log_key, callback)
+        self.on_reorg = None  # async callback(set de hashes de blocs orphelins)
+        self.on_removed = None  # async callback(log retiré)
+        self.enricher = None  # async callback(liste de logs) appelé avant leur distribution
+        self.log_received_at: Dict[tuple, float] = {}  # clé de log -> réception WebSocket (logs live en cours de traitement)
+        self.w3 = None
+
+    def register(self, label: str, address: str, topic0: str, handler):
+        """Enregistre un handler appelé pour chaque log correspondant à (address, topic0)"""
+        self.routes[(address.lower(), topic0.lower())] = (label, handler)
+
+    def _read_cursors(self, labels: List[str]) -> Dict[str, int]:
+        """Curseurs sauvegardés des routes (appel DB bloquant, exécuté via db.run)"""
+        cursors = {}
+        for label in labels:
+            saved = self.db.get_preference(f"{LOG_CURSOR_PREFERENCE_PREFIX}{label}")
+            if saved is not None:
+                cursors[label] = int(saved)
+        return cursors
+
+    def _filter_params(self) -> Dict:
+        addresses = sorted({address for address, _ in self.routes})
+        topics = sorted({topic0 for _, topic0 in self.routes})
+        return {
+            "address": [Web3.to_checksum_address(address) for address in addresses],
+            "topics": [topics]
+        }
+
+    async def run(self):
+        """Maintient la connexion WebSocket et distribue les logs reçus aux handlers"""
+        while True:  # Boucle principale de reconnexion
+            try:
+                if self.db and not self.cursors_loaded:
+                    # Relus une fois, dans le pool de threads DB, avant le premier rattrapage
+                    labels = sorted({label for label, _ in self.routes.values()} - set(self.cursors))
+                    self.cursors.update(await self.db.run(self._read_cursors, labels))
+                    self.cursors_loaded = True
+                wss_url = self.wss_urls[self.wss_index % len(self.wss_urls)]
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(wss_url)) as ws_w3:
+                    self.w3 = ws_w3
+                    # Souscrire d'abord pour ne rien perdre pendant le rattrapage
+                    subscription_id = await ws_w3.eth.subscribe("logs", self._filter_params())
+                    heads_subscription_id = await ws_w3.eth.subscribe("newHeads")
+                    logger.info(f"[LOGS] Souscription active pour {len(self.routes)} route(s) ({subscription_id})")
+                    await self._backfill()
+
+                    # Lecture du socket dans une tâche dédiée : les messages arrivés en rafale
+                    # (plusieurs deploys d'un même bloc) sont traités ensemble
+                    queue: asyncio.Queue = asyncio.Queue()
+                    reader = asyncio.create_task(self._read_websocket(ws_w3, queue))
+                    try:
+                        while True:
+                            responses = [await queue.get()]
+                            # Courte fenêtre pour regrouper les logs d'un même bloc arrivés en rafale
+                            if responses[0] and responses[0].get("subscription") == subscription_id:
+                                await asyncio.sleep(LOG_BURST_WINDOW)
+                            while not queue.empty():
+                                responses.append(queue.get_nowait())
+                            if responses[-1] is None:
+                                await self._process_responses(responses[:-1], subscription_id, heads_subscription_id)
+                                break
+                            await self._process_responses(responses, subscription_id, heads_subscription_id)
+                    finally:
+                        reader.cancel()
+                    await reader  # relance l'éventuelle erreur de lecture
+                logger.warning("[LOGS] Connexion WebSocket fermée, reconnexion...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[LOGS] Erreur de souscription WebSocket: {e}")
+                if len(self.wss_urls) > 1:
+                    self.wss_index += 1
+                    logger.info(f"[LOGS] Bascule sur l'endpoint WebSocket #{self.wss_index % len(self.wss_urls) + 1}")
+            finally:
+                self.w3 = None
+                self._save_cursors(force=True)
+            await asyncio.sleep(LOG_SUBSCRIPTION_RECONNECT_DELAY)
+
+    @staticmethod
+    async def _read_websocket(ws_w3, queue: asyncio.Queue):
+        try:
+            async for response in ws_w3.ws.listen_to_websocket():
+                queue.put_nowait(response)
+        finally:
+            queue.put_nowait(None)  # fin de flux
+
+    async def _process_responses(self, responses, subscription_id, heads_subscription_id):
+        """Traite une rafale de messages dans l'ordre, en enrichissant les logs consécutifs par lot"""
+        received_at = time.time()
+        logs = []
+        for response in responses:
+            if response.get("subscription") == subscription_id:
+                log = response["result"]
+                if log.get("removed"):
+                    await self._dispatch_logs(logs)
+                    logs = []
+                    await self._on_removed_log(log)
+                # Déjà couvert par le backfill sinon
+                elif log["blockNumber"] >= self.live_from_block:
+                    self.log_received_at[self._log_key(log)] = received_at
+                    logs.append(log)
+            elif response.get("subscription") == heads_subscription_id:
+                await self._dispatch_logs(logs)
+                logs = []
+                await self._on_new_head(response["result"])
+        await self._dispatch_logs(logs)
+
+    async def _dispatch_logs(self, logs):
+        """Précharge en un seul lot les données nécessaires aux logs, puis les distribue"""
+        if not logs:
+            return
+        if self.enricher:
+            try:
+                await self.enricher(logs)
+            except Exception as e:
+                logger.error(f"[LOGS] Erreur lors de l'enrichissement groupé: {e}")
+        for log in logs:
+            await self._dispatch(log)
+
+    async def _backfill(self):
+        """Rattrape les logs émis entre le dernier curseur et le bloc courant"""
+        if not self.rpc_w3:
+            return
+        head = await self.rpc_w3.eth.block_number
+        self.head_block = max(self.head_block, head)
+        labels = {label for label, _ in self.routes.values()}
+        known = [self.cursors[label] for label in labels if label in self.cursors]
+        if known:
+            from_block = max(min(known) + 1, head - MAX_BACKFILL_BLOCKS)
+            if from_block <= head:
+                logger.info(f"[LOGS] Backfill des blocs {from_block} -> {head}")
+            total = 0
+            for chunk_start in range(from_block, head + 1, BACKFILL_CHUNK_SIZE):
+                chunk_end = min(chunk_start + BACKFILL_CHUNK_SIZE - 1, head)
+                params = self._filter_params()
+                params["fromBlock"] = chunk_start
+                params["toBlock"] = chunk_end
+                logs = await self.rpc_w3.eth.get_logs(params)
+                missed = []
+                for log in sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"])):
+                    route = self._route_for(log)
+                    # Route sans curseur (nouvelle factory) : on démarre au bloc courant
+                    if route and log["blockNumber"] <= self.cursors.get(route[0], head):
+                        continue
+                    missed.append(log)
+                await self._dispatch_logs(missed)
+                total += len(missed)
+            if total:
+                logger.info(f"[LOGS] Backfill terminé: {total} log(s) rattrapé(s)")
+        for label in labels:
+            self.cursors[label] = max(self.cursors.get(label, head), head)
+        self.live_from_block = head + 1
+        self._save_cursors(force=True)
+
+    @staticmethod
+    def _log_key(log):
+        return (Web3.to_hex(log["transactionHash"]), int(log["logIndex"]))
+
+    async def run_when_confirmed(self, log, depth: int, callback):
+        """Exécute callback une fois le bloc du log enfoui sous `depth` confirmations.
+
+        Avec depth <= 0 (ou un bloc déjà assez profond) le callback est exécuté
+        immédiatement ; sinon il est mis en attente jusqu'au newHead suffisant
+        et abandonné si le bloc du log est réorganisé entre-temps."""
+        if depth <= 0 or self.head_block >= log["blockNumber"] + depth:
+            await callback()
+            return
+        logger.info(f"[REORG] Alerte en attente de {depth} confirmation(s) (bloc {log['blockNumber']})")
+        self.pending_confirmations.append(
+            (log["blockNumber"], Web3.to_hex(log["blockHash"]), depth, self._log_key(log), callback)
+        )
+
+    async def _on_new_head(self, head):
+        """Met à jour la fenêtre de hashes, détecte les reorgs et libère les confirmations"""
+        number = head["number"]
+        block_hash = Web3.to_hex(head["hash"])
+        parent_hash = Web3.to_hex(head["parentHash"])
+
+        # Blocs remplacés : même hauteur ou plus haut que le nouveau head, puis parents divergents
+        orphaned = {n: h for n, h in self.block_hashes.items() if n >= number and h != block_hash}
+        expected_parent = parent_hash
+        n = number - 1
+        while n in self.block_hashes and self.block_hashes[n] != expected_parent:
+            orphaned[n] = self.block_hashes[n]
+            if n - 1 not in self.block_hashes or not self.rpc_w3:
+                break
+            try:
+                expected_parent = Web3.to_hex((await self.rpc_w3.eth.get_block(n))["parentHash"])
+            except Exception as e:
+                logger.error(f"[REORG] Impossible de remonter la chaîne au bloc {n}: {e}")
+                break
+            n -= 1
+
+        for n in orphaned:
+            self.block_hashes.pop(n, None)
+        self.block_hashes[number] = block_hash
+        self.block_hashes[number - 1] = parent_hash
+        for n in [n for n in self.block_hashes if n <= number - REORG_WINDOW_BLOCKS]:
+            del self.block_hashes[n]
+        self.head_block = number
+
+        if orphaned:
+            orphaned_hashes = set(orphaned.values())
+            logger.warning(f"[REORG] Reorg détecté au bloc {min(orphaned)} ({len(orphaned)} bloc(s) orphelin(s))")
+            self.pending_confirmations = [
+                item for item in self.pending_confirmations if item[1] not in orphaned_hashes
+            ]
+            if self.on_reorg:
+                try:
+                    await self.on_reorg(orphaned_hashes)
+                except Exception as e:
+                    logger.error(f"[REORG] Erreur dans le handler de reorg: {e}")
+
+        ready = [item for item in self.pending_confirmations if number >= item[0] + item[2]]
+        if not ready:
+            return
+        self.pending_confirmations = [item for item in self.pending_confirmations if item not in ready]
+        for block_number, log_block_hash, _, _, callback in ready:
+            canonical = self.block_hashes.get(block_number)
+            if canonical and canonical != log_block_hash:
+                logger.info(f"[REORG] Alerte abandonnée : bloc {block_number} réorganisé avant confirmation")
+                continue
+            # En tâche de fond pour ne pas retarder le flux de logs
+            asyncio.create_task(self._run_deferred(callback))
+
+    async def _run_deferred(self, callback):
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"[REORG] Erreur dans une alerte différée: {e}")
+
+    async def _on_removed_log(self, log):
+        """Un log déjà émis a été retiré de la chaîne canonique"""
+        log_key = self._log_key(log)
+        logger.warning(f"[REORG] Log retiré par le node : tx {log_key[0]} (index {log_key[1]})")
+        self.pending_confirmations = [item for item in self.pending_confirmations if item[3] != log_key]
+        if self.on_removed:
+            try:
+                await self.on_removed(log)
+            except Exception as e:
+                logger.error(f"[REORG] Erreur dans le handler de log retiré: {e}")
+
+    def _route_for(self, log):
+        if not log.get("topics"):
+            return None
+        key = (log["address"].lower(), Web3.to_hex(log["topics"][0]).lower())
+        return self.routes.get(key)
+
+    async def _dispatch(self, log):
+        """Route un log vers le handler de sa factory"""
+        route = self._route_for(log)
+        if not route:
+            self.log_received_at.pop(self._log_key(log), None)
+            return
+        label, handler = route
+        try:
+            await handler(log)
+        except Exception as e:
+            logger.error(f"[LOGS] Erreur dans le handler {label}: {e}")
+        finally:
+            self.log_received_at.pop(self._log_key(log), None)
+        self.cursors[label] = max(self.cursors.get(label, 0), log["blockNumber"])
+        self._save_cursors()
+
+    def _save_cursors(self, force: bool = False):
+        """Persiste les curseurs dans bot_preferences (au plus une fois par intervalle)"""
+        if not self.db or not self.cursors:
+            return
+        now = time.time()
+        if not force and now - self.last_cursor_save < CURSOR_SAVE_INTERVAL:
+            return
+        self.last_cursor_save = now
+        # Écriture dans le pool de threads DB : la boucle d'événements n'attend pas la base
+        self.db.executor.submit(self._write_cursors, dict(self.cursors))
+
+    def _write_cursors(self, cursors: Dict[str, int]):
+        try:
+            for label, block in cursors.items():
+                self.db.set_preference(f"{LOG_CURSOR_PREFERENCE_PREFIX}{label}", str(block))
+        except Exception as e:
+            logger.error(f"[LOGS] Erreur lors de la sauvegarde des curseurs: {e}")
+
+class MempoolWatcher:
+    """Surveillance des transactions en attente envoyées aux factories.
+
+    Souscrit à newPendingTransactions (transactions complètes si le node le
+    permet, sinon simples hashes résolus via le client HTTP) et décode le
+    calldata deployToken avec l'ABI de la factory visée, avant que le bloc
+    ne soit produit."""
+
+    def __init__(self, wss_url: str, rpc_w3=None):
+        self.wss_url = wss_url
+        self.rpc_w3 = rpc_w3
+        self.factories = {}  # address lower -> (label, contract)
+        self.handler = None  # async callback(label, tx, token_config)
+        self.seen_tx_hashes: Dict[str, float] = {}
+        self.w3 = None
+
+    def register(self, label: str, contract):
+        """Décode les transactions en attente vers l'adresse de ce contrat"""
+        self.factories[contract.address.lower()] = (label, contract)
+
+    async def run(self):
+        """Maintient la souscription newPendingTransactions (boucle de reconnexion)"""
+        while True:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.wss_url)) as ws_w3:
+                    self.w3 = ws_w3
+                    subscription_id = await ws_w3.eth.subscribe("newPendingTransactions", True)
+                    logger.info(f"[MEMPOOL] Souscription active pour {len(self.factories)} factory(ies) ({subscription_id})")
+                    async for response in ws_w3.ws.listen_to_websocket():
+                        await self.handle_response(response, subscription_id)
+                logger.warning("[MEMPOOL] Connexion WebSocket fermée, reconnexion...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[MEMPOOL] Erreur de souscription: {e}")
+            finally:
+                self.w3 = None
+            await asyncio.sleep(LOG_SUBSCRIPTION_RECONNECT_DELAY)
+
+    @staticmethod
+    def tx_hash(tx) -> str:
+        """Hash hex d'une tx en attente (bytes via web3, déjà hex dans un message brut)"""
+        value = tx["hash"]
+        return value if isinstance(value, str) else Web3.to_hex(value)
+
+    async def handle_response(self, response, subscription_id):
+        """Traite un message de la souscription (transaction complète, ou simple hash à résoudre)"""
+        if response.get("subscription") != subscription_id:
+            return
+        tx = response["result"]
+        if not isinstance(tx, Mapping):  # AttributeDict côté web3, pas un dict
+            # Node sans support des transactions complètes : on ne reçoit que le hash
+            if not self.rpc_w3:
+                return
+            try:
+                tx = await self.rpc_w3.eth.get_transaction(tx)
+            except Exception:
+                return  # déjà minée ou abandonnée
+        await self.process_transaction(tx)
+
+    async def process_transaction(self, tx):
+        """Décode une transaction en attente et la transmet au handler si c'est un déploiement"""
+        to = tx.get("to")
+        if not to or to.lower() not in self.factories:
+            return
+        tx_hash = MempoolWatcher.tx_hash(tx)
+        if tx_hash in self.seen_tx_hashes:
+            return
+        self.seen_tx_hashes[tx_hash] = time.time()
+        if len(self.seen_tx_hashes) > MEMPOOL_SEEN_TX_LIMIT:
+            for old_hash in list(self.seen_tx_hashes)[:len(self.seen_tx_hashes) - MEMPOOL_SEEN_TX_LIMIT]:
+                del self.seen_tx_hashes[old_hash]
+
+        decoded = self.decode_deploy(tx)
+        if not decoded:
+            return
+        label, token_config = decoded
+        logger.info(f"[MEMPOOL] deployToken en attente sur {label}: {token_config.get('name')} ({token_config.get('symbol')}) tx {tx_hash}")
+        if self.handler:
+            try:
+                await self.handler(label, tx, token_config)
+            except Exception as e:
+                logger.error(f"[MEMPOOL] Erreur dans le handler {label}: {e}")
+
+    def decode_deploy(self, tx) -> Optional[tuple]:
+        """(label, tokenConfig) si la transaction est un deployToken vers une factory enregistrée"""
+        to = tx.get("to")
+        if not to or to.lower() not in self.factories:
+            return None
+        label, contract = self.factories[to.lower()]
+        try:
+            func_obj, func_args = contract.decode_function_input(tx["input"])
+        except Exception:
+            return None  # pas une fonction connue de l'ABI (claim, admin...)
+        if 'deploymentConfig' in func_args:
+            return label, dict(func_args['deploymentConfig']['tokenConfig'])
+        if 'tokenConfig' in func_args:
+            return label, dict(func_args['tokenConfig'])
+        return None
+
+    async def predict_token_address(self, tx) -> Optional[str]:
+        """Adresse du token que créera le deployToken en attente.
+
+        L'appel est simulé (eth_call sur l'état pending, même expéditeur et même
+        calldata) : deployToken renvoie l'adresse CREATE2 du token en premier mot."""
+        if not self.rpc_w3:
+            return None
+        call = {'from': tx['from'], 'to': tx['to'], 'data': tx['input'], 'value': tx.get('value', 0)}
+        try:
+            result = await self.rpc_w3.eth.call(call, 'pending')
+        except Exception as e:
+            logger.warning(f"[MEMPOOL] Simulation du deployToken {self.tx_hash(tx)} impossible: {e}")
+            return None
+        if len(result) < 32:
+            return None
+        return Web3.to_checksum_address(result[12:32])
+
+class DedupeIndex:
+    """Index de déduplication des tokens déjà traités, clé (chain, adresse).
+
+    Partagé par les listeners on-chain (SnipeMonitor en garde une instance
+    sans journal pour les tokens snipés) : add() est un test-et-ajout atomique, O(1). La mémoire reste bornée par un TTL
+    et une éviction LRU ; chaque ajout/retrait est écrit dans un journal
+    append-only, rejoué puis compacté au démarrage."""
+
+    def __init__(self, journal_path: Optional[str] = SEEN_CLANKER_JOURNAL_FILE,
+                 ttl: float = DEDUPE_TTL_SECONDS, max_entries: int = DEDUPE_MAX_ENTRIES):
+        self.journal_path = journal_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, float]" = OrderedDict()  # clé -> timestamp du premier passage
+        if journal_path:
+            self._load()
+
+    @staticmethod
+    def _key(address: str, chain: str = "base") -> str:
+        return f"{chain}:{address.lower()}"
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, address: str) -> bool:
+        return self.seen(address)
+
+    def seen(self, address: str, chain: str = "base") -> bool:
+        key = self._key(address, chain)
+        first_seen = self.entries.get(key)
+        if first_seen is None:
+            return False
+        if time.time() - first_seen > self.ttl:
+            del self.entries[key]
+            return False
+        self.entries.move_to_end(key)
+        return True
+
+    def add(self, address: str, chain: str = "base") -> bool:
+        """Marque le token comme vu ; renvoie False s'il l'était déjà"""
+        if self.seen(address, chain):
+            return False
+        key = self._key(address, chain)
+        now = time.time()
+        self.entries[key] = now
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._append(f"+ {now:.0f} {key}")
+        return True
+
+    def discard(self, address: str, chain: str = "base"):
+        key = self._key(address, chain)
+        if self.entries.pop(key, None) is not None:
+            self._append(f"- {time.time():.0f} {key}")
+
+    def _append(self, line: str):
+        if not self.journal_path:
+            return
+        try:
+            with open(self.journal_path, 'a') as f:
+                f.write(line + "\n")
+        except Exception as e:
+            logger.error(f"Error writing dedupe journal: {e}")
+
+    def _load(self):
+        """Rejoue le journal (ou migre l'ancien fichier JSON), puis le compacte"""
+        now = time.time()
+        try:
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r') as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) != 3:
+                            continue
+                        op, ts, key = parts
+                        if op == "+":
+                            self.entries[key] = float(ts)
+                            self.entries.move_to_end(key)
+                        else:
+                            self.entries.pop(key, None)
+            elif os.path.exists(SEEN_CLANKER_TOKENS_FILE):
+                with open(SEEN_CLANKER_TOKENS_FILE, 'r') as f:
+                    for address in json.load(f):
+                        self.entries[self._key(address)] = now
+                logger.info(f"Migrated {len(self.entries)} seen Clanker tokens from {SEEN_CLANKER_TOKENS_FILE}")
+        except Exception as e:
+            logger.error(f"Error loading seen Clanker tokens: {e}")
+
+        for key in [key for key, first_seen in self.entries.items() if now - first_seen > self.ttl]:
+            del self.entries[key]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.compact()
+
+    def compact(self):
+        """Réécrit le journal avec les seules entrées vivantes"""
+        try:
+            tmp_path = f"{self.journal_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                for key, first_seen in self.entries.items():
+                    f.write(f"+ {first_seen:.0f} {key}\n")
+            os.replace(tmp_path, self.journal_path)
+        except Exception as e:
+            logger.error(f"Error compacting dedupe journal: {e}")
+
+class KeywordMatcher:
+    """Automate Aho-Corasick sur les mots-clés whitelistés (insensible à la casse).
+
+    Construit une seule fois par version de la liste de mots-clés ; find_all()
+    parcourt chaque texte en une passe, quel que soit le nombre de mots-clés,
+    et renvoie tous les mots-clés trouvés."""
+
+    def __init__(self, keywords):
+        self.keywords = frozenset(keyword.lower() for keyword in keywords if keyword)
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[tuple] = [()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] += (keyword,)
+
+        # Liens d'échec en largeur : chaque état hérite des sorties de son suffixe
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def find_all(self, *texts: str) -> Set[str]:
+        """Tous les mots-clés présents dans au moins un des textes"""
+        found: Set[str] = set()
+        if not self.keywords:
+            return found
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        for text in texts:
+            state = 0
+            for char in (text or "").lower():
+                while state and char not in transitions[state]:
+                    state = fail[state]
+                state = transitions[state].get(char, 0)
+                if outputs[state]:
+                    found.update(outputs[state])
+        return found
+
+class FidSet:
+    """Ensemble compact de FIDs Farcaster : tableau trié d'entiers non signés 32 bits.
+
+    Accepte indifféremment des FIDs int ou str décimaux ; l'itération rend des str
+    pour rester compatible avec la base et les fichiers JSON.
+    """
+
+    TYPECODE = 'I'
+    MAX_FID = 0xFFFFFFFF
+
+    def __init__(self, fids=()):
+        values = {value for value in map(self._coerce, fids) if value is not None}
+        self.values = array(self.TYPECODE, sorted(values))
+
+    @classmethod
+    def _from_sorted(cls, values) -> 'FidSet':
+        fid_set = cls.__new__(cls)
+        fid_set.values = array(cls.TYPECODE, values)
+        return fid_set
+
+    @classmethod
+    def _coerce(cls, fid) -> Optional[int]:
+        """FID -> int, ou None si ce n'est pas un FID valide"""
+        if isinstance(fid, int) and not isinstance(fid, bool):
+            value = fid
+        elif isinstance(fid, str) and fid.strip().isdigit():
+            value = int(fid)
+        else:
+            return None
+        return value if 0 <= value <= cls.MAX_FID else None
+
+    def _index(self, value: int) -> int:
+        index = bisect_left(self.values, value)
+        return index if index < len(self.values) and self.values[index] == value else -1
+
+    def __contains__(self, fid) -> bool:
+        value = self._coerce(fid)
+        return value is not None and self._index(value) >= 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return (str(value) for value in self.values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FidSet):
+            return self.values == other.values
+        return NotImplemented
+
+    def add(self, fid):
+        value = self._coerce(fid)
+        if value is None:
+            raise ValueError(f"FID invalide: {fid!r}")
+        index = bisect_left(self.values, value)
+        if index == len(self.values) or self.values[index] != value:
+            self.values.insert(index, value)
+
+    def discard(self, fid):
+        value = self._coerce(fid)
+        if value is not None:
+            index = self._index(value)
+            if index >= 0:
+                del self.values[index]
+
+    def remove(self, fid):
+        if fid not in self:
+            raise KeyError(fid)
+        self.discard(fid)
+
+    def clear(self):
+        self.values = array(self.TYPECODE)
+
+    def update(self, fids):
+        """Ajout en masse : une seule fusion au lieu d'un insert par FID"""
+        merged = self | (fids if isinstance(fids, FidSet) else FidSet(fids))
+        self.values = merged.values
+
+    def __or__(self, other: 'FidSet') -> 'FidSet':
+        a, b = self.values, other.values
+        i = j = 0
+        merged = []
+        while i < len(a) and j < len(b):
+            if a[i] < b[j]:
+                merged.append(a[i])
+                i += 1
+            elif a[i] > b[j]:
+                merged.append(b[j])
+                j += 1
+            else:
+                merged.append(a[i])
+                i += 1
+                j += 1
+        merged.extend(a[i:])
+        merged.extend(b[j:])
+        return self._from_sorted(merged)
+
+    def __and__(self, other: 'FidSet') -> 'FidSet':
+        small, large = sorted((self, other), key=len)
+        return self._from_sorted(value for value in small.values if large._index(value) >= 0)
+
+    def __sub__(self, other: 'FidSet') -> 'FidSet':
+        return self._from_sorted(value for value in self.values if other._index(value) < 0)
+
+    def isdisjoint(self, other: 'FidSet') -> bool:
+        return not (self & other)
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par le tableau (objet compris)"""
+        return sys.getsizeof(self.values)
+
+class SlidingWindowCounter:
+    """Compteurs d'événements par clé sur plusieurs fenêtres glissantes.
+
+    Un anneau de buckets (un dict clé -> nombre par DEPLOY_RATE_BUCKET_SECONDS)
+    couvre la plus grande fenêtre ; chaque fenêtre tient un total par clé, décrémenté
+    quand un bucket en sort. Lecture d'un compteur en O(1), avance en O(clés expirées)."""
+
+    def __init__(self, windows: Dict[str, int], bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.spans = {name: max(1, seconds // bucket_seconds) for name, seconds in windows.items()}
+        self.size = max(self.spans.values())
+        self.ring: List[Dict[str, int]] = [{} for _ in range(self.size)]
+        self.totals: Dict[str, Dict[str, int]] = {name: {} for name in windows}
+        self.current = None  # index absolu du bucket courant
+
+    def _advance(self, now: float):
+        bucket = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket
+            return
+        if bucket <= self.current:
+            return
+        if bucket - self.current >= self.size:
+            # Silence plus long que la plus grande fenêtre : tout a expiré
+            self.ring = [{} for _ in range(self.size)]
+            self.totals = {name: {} for name in self.totals}
+        else:
+            for new in range(self.current + 1, bucket + 1):
+                for name, span in self.spans.items():
+                    totals = self.totals[name]
+                    for key, count in self.ring[(new - span) % self.size].items():
+                        remaining = totals.get(key, 0) - count
+                        if remaining > 0:
+                            totals[key] = remaining
+                        else:
+                            totals.pop(key, None)
+                self.ring[new % self.size] = {}
+        self.current = bucket
+
+    def add(self, key: str, now: Optional[float] = None) -> Dict[str, int]:
+        """Compte un événement à la date `now` ; retourne les totaux actuels de la clé par fenêtre.
+
+        Un événement antérieur au bucket courant (log rattrapé) va dans son propre
+        bucket et ne compte que dans les fenêtres qui le couvrent encore."""
+        now = time.time() if now is None else now
+        self._advance(now)
+        index = int(now // self.bucket_seconds)
+        age = self.current - index
+        if age < self.size:
+            bucket = self.ring[index % self.size]
+            bucket[key] = bucket.get(key, 0) + 1
+            for name, totals in self.totals.items():
+                if age < self.spans[name]:
+                    totals[key] = totals.get(key, 0) + 1
+        return self.counts(key)
+
+    def counts(self, key: str, now: Optional[float] = None) -> Dict[str, int]:
+        if now is not None:
+            self._advance(now)
+        return {name: totals.get(key, 0) for name, totals in self.totals.items()}
+
+    def top(self, window: str, min_count: int = 1, now: Optional[float] = None) -> List[tuple]:
+        """Clés ayant au moins min_count événements sur la fenêtre, les plus actives d'abord"""
+        self._advance(time.time() if now is None else now)
+        return sorted(
+            ((key, count) for key, count in self.totals[window].items() if count >= min_count),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+class Deployment:
+    """Déploiement de token normalisé, quelle que soit la factory (ou le mempool) d'origine"""
+
+    def __init__(self, launchpad: str, token_address: str, name: str, symbol: str,
+                 image: Optional[str] = None, metadata: Optional[str] = None, context: Optional[str] = None,
+                 creator_address: Optional[str] = None, tx_hash=None):
+        self.launchpad = launchpad
+        self.token_address = token_address
+        self.name = name
+        self.symbol = symbol
+        self.image = image
+        self.metadata = metadata
+        self.context = context
+        self.creator_address = creator_address
+        self.tx_hash = Web3.to_hex(tx_hash) if isinstance(tx_hash, bytes) else tx_hash
+        self.fid = self.extract_fid(context)
+
+    @classmethod
+    def from_token_config(cls, launchpad: str, token_address: str, token_config: Dict,
+                          creator_address: Optional[str] = None, tx_hash=None) -> "Deployment":
+        return cls(
+            launchpad,
+            token_address,
+            token_config.get('name'),
+            token_config.get('symbol'),
+            image=token_config.get('image'),
+            metadata=token_config.get('metadata'),
+            context=token_config.get('context'),
+            creator_address=creator_address,
+            tx_hash=tx_hash
+        )
+
+    @staticmethod
+    def extract_fid(context: Optional[str]) -> Optional[str]:
+        """FID Farcaster depuis le context JSON (champ id)"""
+        try:
+            fid = json.loads(context).get('id')
+        except Exception:
+            return None
+        return str(fid) if fid not in (None, "") else None
+
+class DeploymentClassifier:
+    """Chaîne de règles unique qui attribue un verdict à un déploiement.
+
+    Les règles sont évaluées dans l'ordre et la première qui correspond donne
+    le verdict (tracked / drop / premium / keyword) ; sinon "plain". Elles lisent
+    l'état courant du ClankerMonitor (listes rechargées depuis la base) à
+    chaque appel. Le nombre d'évaluations et leur coût cumulé sont mesurés."""
+
+    def __init__(self, monitor):
+        self.rules = [
+            ("tracked_address",
+             lambda d: d.creator_address is not None and d.creator_address in monitor.tracked_addresses,
+             "tracked"),
+            ("banned_fid",
+             lambda d: d.fid is not None and d.fid in monitor.banned_fids,
+             "drop"),
+            ("premium_only",
+             lambda d: d.fid is not None and monitor.premium_only and d.fid not in monitor.whitelisted_fids,
+             "drop"),
+            ("whitelisted_fid",
+             lambda d: d.fid is not None and d.fid in monitor.whitelisted_fids,
+             "premium"),
+            ("keyword",
+             lambda d: d.fid is None and monitor._check_keyword_match(d.name or "", d.symbol or ""),
+             "keyword"),
+        ]
+        self.evaluations = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.verdict_counts: Dict[str, int] = {}
+
+    def classify(self, deployment: Deployment) -> tuple:
+        """Renvoie (verdict, nom de la règle appliquée)"""
+        start = time.perf_counter_ns()
+        verdict, rule_name = "plain", "default"
+        for name, predicate, rule_verdict in self.rules:
+            if predicate(deployment):
+                verdict, rule_name = rule_verdict, name
+                break
+        elapsed = time.perf_counter_ns() - start
+        self.evaluations += 1
+        self.total_ns += elapsed
+        self.max_ns = max(self.max_ns, elapsed)
+        self.verdict_counts[verdict] = self.verdict_counts.get(verdict, 0) + 1
+        return verdict, rule_name
 
 # Twilio client for phone calls
 twilio_client = None
@@ -696,10 +2439,418 @@ async def make_emergency_call(token_name: str, token_symbol: str, volume_24h: fl
     except Exception as e:
         logger.error(f"[TWILIO ERROR] Failed to make emergency call: {e}")
 
+class VolumeCheckScheduler:
+    """Échéancier des vérifications volume : chaque token a sa prochaine échéance.
+
+    Les échéances sont dans un tas (entrées périmées ignorées au dépilement) et
+    l'intervalle dépend de l'âge du token (VOLUME_CHECK_SCHEDULE) : serré juste
+    après le déploiement, espacé ensuite. Les expirations sont dans une file
+    dans l'ordre d'ajout (même durée pour tous) : retirer un token expiré est en O(1)."""
+
+    def __init__(self, schedule=VOLUME_CHECK_SCHEDULE, ttl: int = VOLUME_TRACK_SECONDS):
+        self.schedule = schedule
+        self.ttl = ttl
+        self.heap: List[tuple] = []  # (échéance, token)
+        self.due: Dict[str, float] = {}  # token -> échéance en vigueur (absent = vérification en cours)
+        self.first_seen: Dict[str, float] = {}
+        self.expiries = deque()  # (expiration, token), croissant
+
+    def __len__(self) -> int:
+        return len(self.first_seen)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.first_seen
+
+    def interval(self, age: float) -> float:
+        for max_age, interval in self.schedule:
+            if age < max_age:
+                return interval
+        return self.schedule[-1][1]
+
+    def add(self, token: str, first_seen: float, next_check: Optional[float] = None):
+        """Suit un token : première vérification après l'intervalle de son âge (ou à next_check)"""
+        self.first_seen[token] = first_seen
+        self.expiries.append((first_seen + self.ttl, token))
+        self._push(token, first_seen + self.interval(0) if next_check is None else next_check)
+
+    def discard(self, token: str):
+        self.first_seen.pop(token, None)
+        self.due.pop(token, None)
+
+    def _push(self, token: str, due: float):
+        self.due[token] = due
+        heapq.heappush(self.heap, (due, token))
+        # Les entrées périmées s'accumulent avec les réveils : reconstruction si le tas grossit trop
+        if len(self.heap) > 4 * len(self.due) + 64:
+            self.heap = [(due, token) for token, due in self.due.items()]
+            heapq.heapify(self.heap)
+
+    def reschedule(self, token: str, now: float, dense: bool = False):
+        """Reprogramme un token après sa vérification (intervalle le plus court si dense)"""
+        if token not in self.first_seen:
+            return
+        interval = self.schedule[0][1] if dense else self.interval(now - self.first_seen[token])
+        self._push(token, now + interval)
+
+    def wake(self, token: str, now: float):
+        """Avance la prochaine vérification à maintenant (pic de volume)"""
+        due = self.due.get(token)
+        if due is not None and due > now:
+            self._push(token, now)
+
+    def pop_due(self, now: float) -> List[str]:
+        """Tokens dont l'échéance est passée ; à reprogrammer par l'appelant après vérification"""
+        ready = []
+        while self.heap and self.heap[0][0] <= now:
+            due, token = heapq.heappop(self.heap)
+            if self.due.get(token) == due:
+                del self.due[token]
+                ready.append(token)
+        return ready
+
+    def pop_expired(self, now: float) -> List[str]:
+        expired = []
+        while self.expiries and self.expiries[0][0] <= now:
+            expires_at, token = self.expiries.popleft()
+            first_seen = self.first_seen.get(token)
+            # Token retiré ou suivi à nouveau depuis : cette expiration ne compte plus
+            if first_seen is not None and first_seen + self.ttl == expires_at:
+                self.discard(token)
+                expired.append(token)
+        return expired
+
+class DexscreenerProfilePoller:
+    """Lecture des derniers profils de tokens Dexscreener sans bloquer la boucle.
+
+    Un client httpx persistant garde la connexion ouverte entre les ticks ; les
+    validateurs renvoyés par l'API (ETag / Last-Modified) sont rejoués en requête
+    conditionnelle, et un hash du corps écarte les réponses identiques quand l'API
+    n'en fournit pas. fetch() indique si la liste a changé depuis le dernier appel."""
+
+    def __init__(self, url: str = DEXSCREENER_API_URL):
+        self.url = url
+        self.client: Optional[httpx.AsyncClient] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.digest: Optional[bytes] = None
+        self.tokens: List[Dict] = []
+        self.stats = {'requests': 0, 'not_modified': 0, 'unchanged': 0, 'changed': 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=10.0, headers=DEXSCREENER_HEADERS)
+        return self.client
+
+    async def fetch(self) -> tuple:
+        """(tokens, changed) : la dernière liste connue et si elle diffère de la précédente"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        self.stats['requests'] += 1
+        resp = await self._get_client().get(self.url, headers=headers)
+        if resp.status_code == 304:
+            self.stats['not_modified'] += 1
+            return self.tokens, False
+        resp.raise_for_status()
+        self.etag = resp.headers.get('ETag')
+        self.last_modified = resp.headers.get('Last-Modified')
+        digest = hashlib.blake2b(resp.content, digest_size=16).digest()
+        if digest == self.digest:
+            self.stats['unchanged'] += 1
+            return self.tokens, False
+        self.digest = digest
+        self.tokens = resp.json()
+        self.stats['changed'] += 1
+        return self.tokens, True
+
+class DexscreenerVolumePoller:
+    """Récupère les paires Dexscreener de nombreux tokens en peu d'appels.
+
+    Les adresses sont regroupées par DEXSCREENER_TOKENS_PER_CALL dans l'endpoint
+    multi-token, les lots partent en parallèle (au plus DEXSCREENER_MAX_CONCURRENT)
+    sur un client httpx unique gardant ses connexions ouvertes."""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore = asyncio.Semaphore(DEXSCREENER_MAX_CONCURRENT)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=DEXSCREENER_MAX_CONCURRENT, max_keepalive_connections=DEXSCREENER_MAX_CONCURRENT)
+            )
+        return self.client
+
+    async def _fetch_batch(self, addresses: List[str]) -> List[Dict]:
+        async with self.semaphore:
+            resp = await self._get_client().get(f"{DEXSCREENER_TOKENS_URL}/{','.join(addresses)}")
+            resp.raise_for_status()
+            return resp.json().get('pairs') or []
+
+    async def fetch_pairs(self, addresses: List[str]) -> Dict[str, Dict]:
+        """Adresse (minuscule) -> première paire renvoyée pour ce token (comme pairs[0] en appel unitaire)"""
+        batches = [
+            addresses[i:i + DEXSCREENER_TOKENS_PER_CALL]
+            for i in range(0, len(addresses), DEXSCREENER_TOKENS_PER_CALL)
+        ]
+        results = await asyncio.gather(*(self._fetch_batch(batch) for batch in batches), return_exceptions=True)
+        pairs_by_token: Dict[str, Dict] = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(f"[VOLUME ERROR] Lot Dexscreener de {len(batch)} token(s) en échec: {result}")
+                continue
+            for pair in result:
+                token_address = (pair.get('baseToken', {}).get('address') or '').lower()
+                if token_address and token_address not in pairs_by_token:
+                    pairs_by_token[token_address] = pair
+        return pairs_by_token
+
+class VolumeRingBuffer:
+    """Volume d'un token en buckets de VOLUME_BUCKET_SECONDS sur la plus grande fenêtre.
+
+    Les buckets sont un array('d') circulaire (8640 doubles pour 24h) et chaque
+    fenêtre garde sa somme courante : ajout et lecture d'une fenêtre en O(1),
+    avance du temps en O(buckets sortis), borné par la taille de l'anneau."""
+
+    def __init__(self, windows: Dict[str, int] = VOLUME_WINDOWS, bucket_seconds: int = VOLUME_BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.spans = {name: max(1, seconds // bucket_seconds) for name, seconds in windows.items()}
+        self.size = max(self.spans.values())
+        self.buckets = array('d', bytes(8 * self.size))
+        self.sums = dict.fromkeys(windows, 0.0)
+        self.current = None  # index absolu du bucket courant
+
+    def _advance(self, now: float):
+        bucket = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket
+            return
+        if bucket <= self.current:
+            return
+        if bucket - self.current >= self.size:
+            self.buckets = array('d', bytes(8 * self.size))
+            self.sums = dict.fromkeys(self.sums, 0.0)
+        else:
+            for new in range(self.current + 1, bucket + 1):
+                # Le bucket new - span sort de chaque fenêtre (lu avant d'être réutilisé)
+                for name, span in self.spans.items():
+                    remaining = self.sums[name] - self.buckets[(new - span) % self.size]
+                    self.sums[name] = remaining if remaining > 1e-9 else 0.0
+                self.buckets[new % self.size] = 0.0
+        self.current = bucket
+
+    def add(self, amount: float, now: Optional[float] = None):
+        self._advance(time.time() if now is None else now)
+        self.buckets[self.current % self.size] += amount
+        for name in self.sums:
+            self.sums[name] += amount
+
+    def metrics(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Sommes par fenêtre, plus 'prev_1m' (la minute précédant la dernière) pour l'accélération"""
+        self._advance(time.time() if now is None else now)
+        metrics = dict(self.sums)
+        if '1m' in self.spans and self.current is not None:
+            span = self.spans['1m']
+            metrics['prev_1m'] = sum(self.buckets[(self.current - k) % self.size] for k in range(span, 2 * span))
+        return metrics
+
+class SwapVolumeEngine:
+    """Volume on-chain des tokens suivis, cumulé depuis les events Swap de leurs pools.
+
+    Les pools Uniswap v3 sont souscrites par adresse, les pools v4 via les Swap du
+    PoolManager filtrés sur leur poolId (topic1). Chaque swap est valorisé en USD
+    côté token de cotation (WETH/ETH au prix slot0 de la pool WETH/USDC, ou USDC)
+    et cumulé par token dans des fenêtres glissantes ; on_volume reçoit les totaux
+    à chaque swap, sans attendre l'agrégation de Dexscreener.
+    Chaque token suivi a son VolumeRingBuffer, libéré quand sa pool n'est plus suivie.
+
+    La souscription est refaite (nouvelle puis ancienne retirée) quand l'ensemble
+    des pools suivies change ; les doublons pendant la bascule sont ignorés."""
+
+    def __init__(self, wss_urls, rpc_w3=None):
+        self.wss_urls = [wss_urls] if isinstance(wss_urls, str) else list(wss_urls)
+        self.wss_index = 0
+        self.rpc_w3 = rpc_w3  # client HTTP async pour le prix de l'ETH
+        self.v3_pools: Dict[str, tuple] = {}  # adresse de pool -> (token, token de cotation)
+        self.v4_pools: Dict[str, tuple] = {}  # poolId hex -> (token, token de cotation)
+        self.volumes: Dict[str, VolumeRingBuffer] = {}
+        self.seen_logs: OrderedDict = OrderedDict()
+        self.subscriptions: List[str] = []
+        self.pools_changed = asyncio.Event()
+        self.eth_usd = 0.0
+        self.eth_usd_updated = 0.0
+        self.v3_swap_topic = get_event_topic(UNISWAP_V3_POOL_ABI, "Swap")
+        self.v4_swap_topic = get_event_topic(UNISWAP_V4_POOL_MANAGER_ABI, "Swap")
+        self.on_volume = None  # async callback(token, métriques USD par fenêtre)
+        self.w3 = None
+
+    def watch(self, token: str, quote_token: str, pool: Optional[str] = None, pool_id: Optional[str] = None):
+        """Suit les swaps d'un token sur sa pool v3 (adresse) ou v4 (poolId)"""
+        quote_token = (quote_token or ZERO_ADDRESS).lower()
+        if quote_token not in SWAP_QUOTE_DECIMALS:
+            logger.info(f"[SWAP VOLUME] Token de cotation {quote_token} non valorisable, {token} ignoré")
+            return
+        entry = (token.lower(), quote_token)
+        if pool_id:
+            pool_id = Web3.to_hex(pool_id) if isinstance(pool_id, bytes) else Web3.to_hex(hexstr=pool_id)
+            self.v4_pools[pool_id.lower()] = entry
+        elif pool and pool != ZERO_ADDRESS:
+            self.v3_pools[pool.lower()] = entry
+        else:
+            return
+        self.volumes.setdefault(entry[0], VolumeRingBuffer())
+        self.pools_changed.set()
+
+    def unwatch(self, token: str):
+        token = token.lower()
+        for pools in (self.v3_pools, self.v4_pools):
+            for key in [key for key, (pool_token, _) in pools.items() if pool_token == token]:
+                del pools[key]
+                self.pools_changed.set()
+        self.volumes.pop(token, None)
+
+    def is_watching(self, token: str) -> bool:
+        token = token.lower()
+        return any(pool_token == token for pools in (self.v3_pools, self.v4_pools) for pool_token, _ in pools.values())
+
+    def metrics(self, token: str) -> Dict[str, float]:
+        ring = self.volumes.get(token.lower())
+        return ring.metrics() if ring else {}
+
+    async def run(self):
+        """Maintient la connexion WebSocket et resouscrit quand les pools suivies changent"""
+        while True:
+            try:
+                wss_url = self.wss_urls[self.wss_index % len(self.wss_urls)]
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(wss_url)) as ws_w3:
+                    self.w3 = ws_w3
+                    self.subscriptions = []
+                    self.pools_changed.clear()
+                    await self._resubscribe()
+                    reader = asyncio.create_task(self._read_websocket(ws_w3))
+                    try:
+                        while not reader.done():
+                            changed = asyncio.create_task(self.pools_changed.wait())
+                            await asyncio.wait({reader, changed}, return_when=asyncio.FIRST_COMPLETED)
+                            changed.cancel()
+                            if self.pools_changed.is_set() and not reader.done():
+                                await asyncio.sleep(SWAP_RESUBSCRIBE_DELAY)
+                                self.pools_changed.clear()
+                                await self._resubscribe()
+                    finally:
+                        if not reader.done():
+                            reader.cancel()
+                    await reader  # relance l'éventuelle erreur de lecture
+                logger.warning("[SWAP VOLUME] Connexion WebSocket fermée, reconnexion...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[SWAP VOLUME] Erreur de souscription WebSocket: {e}")
+                if len(self.wss_urls) > 1:
+                    self.wss_index += 1
+            finally:
+                self.w3 = None
+            await asyncio.sleep(LOG_SUBSCRIPTION_RECONNECT_DELAY)
+
+    async def _resubscribe(self):
+        """Souscrit aux Swap des pools suivies, puis retire les anciennes souscriptions"""
+        subscriptions = []
+        if self.v3_pools:
+            subscriptions.append(await self.w3.eth.subscribe("logs", {
+                "address": [Web3.to_checksum_address(pool) for pool in sorted(self.v3_pools)],
+                "topics": [self.v3_swap_topic]
+            }))
+        if self.v4_pools:
+            subscriptions.append(await self.w3.eth.subscribe("logs", {
+                "address": Web3.to_checksum_address(UNISWAP_V4_POOL_MANAGER_ADDRESS),
+                "topics": [self.v4_swap_topic, sorted(self.v4_pools)]
+            }))
+        for subscription_id in self.subscriptions:
+            try:
+                await self.w3.eth.unsubscribe(subscription_id)
+            except Exception as e:
+                logger.warning(f"[SWAP VOLUME] Désinscription de {subscription_id} impossible: {e}")
+        self.subscriptions = subscriptions
+        logger.info(f"[SWAP VOLUME] Souscription Swap pour {len(self.v3_pools)} pool(s) v3 et {len(self.v4_pools)} pool(s) v4")
+
+    async def _read_websocket(self, ws_w3):
+        async for response in ws_w3.ws.listen_to_websocket():
+            log = response.get("result")
+            if not isinstance(log, Mapping) or log.get("removed"):
+                continue  # swap réorganisé : déjà compté ou jamais confirmé, on l'ignore
+            try:
+                await self._on_swap_log(log)
+            except Exception as e:
+                logger.error(f"[SWAP VOLUME] Erreur lors du traitement d'un swap: {e}")
+
+    def _route(self, log) -> Optional[tuple]:
+        topics = [Web3.to_hex(topic).lower() for topic in log.get("topics", [])]
+        if not topics:
+            return None
+        if topics[0] == self.v3_swap_topic:
+            return self.v3_pools.get(log["address"].lower())
+        if topics[0] == self.v4_swap_topic and len(topics) > 1 and log["address"].lower() == UNISWAP_V4_POOL_MANAGER_ADDRESS.lower():
+            return self.v4_pools.get(topics[1])
+        return None
+
+    async def _on_swap_log(self, log):
+        route = self._route(log)
+        if not route:
+            return
+        log_key = LogSubscriptionEngine._log_key(log)
+        if log_key in self.seen_logs:
+            return
+        self.seen_logs[log_key] = None
+        while len(self.seen_logs) > SWAP_SEEN_LOG_LIMIT:
+            self.seen_logs.popitem(last=False)
+
+        token, quote_token = route
+        data = log["data"]
+        data = Web3.to_bytes(hexstr=data) if isinstance(data, str) else bytes(data)
+        # amount0 / amount1 (int256 en v3, int128 en v4) occupent les deux premiers mots
+        amounts = (int.from_bytes(data[0:32], "big", signed=True), int.from_bytes(data[32:64], "big", signed=True))
+        # currency0 < currency1 : le token de cotation est token0 s'il a la plus petite adresse
+        quote_amount = abs(amounts[0] if quote_token < token else amounts[1])
+        price = await self._quote_price_usd(quote_token)
+        if not price:
+            return
+        ring = self.volumes.get(token)
+        if ring is None:
+            return
+        ring.add(quote_amount / 10 ** SWAP_QUOTE_DECIMALS[quote_token] * price)
+        if self.on_volume:
+            await self.on_volume(token, ring.metrics())
+
+    async def _quote_price_usd(self, quote_token: str) -> float:
+        if quote_token == USDC_ADDRESS.lower():
+            return 1.0
+        if time.time() - self.eth_usd_updated > ETH_PRICE_REFRESH_SECONDS:
+            await self._refresh_eth_price()
+        return self.eth_usd
+
+    async def _refresh_eth_price(self):
+        """Prix de l'ETH en USD depuis slot0 de la pool WETH/USDC"""
+        self.eth_usd_updated = time.time()
+        if not self.rpc_w3:
+            return
+        try:
+            pool = self.rpc_w3.eth.contract(address=Web3.to_checksum_address(ETH_USD_POOL_ADDRESS), abi=UNISWAP_V3_POOL_ABI)
+            sqrt_price_x96 = (await pool.functions.slot0().call())[0]
+            # prix token0 (WETH, 18 déc.) en token1 (USDC, 6 déc.)
+            self.eth_usd = (sqrt_price_x96 / 2 ** 96) ** 2 * 10 ** (18 - 6)
+        except Exception as e:
+            logger.error(f"[SWAP VOLUME] Impossible de rafraîchir le prix de l'ETH: {e}")
+
 class TokenMonitor(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.seen_tokens: Set[str] = self._load_seen_tokens()
+        self.profile_poller = DexscreenerProfilePoller()
+        # Liste à réexaminer même inchangée (une chaîne vient d'être réactivée)
+        self.rescan_profiles = False
         self.channel = None
         self.active_chains = {
             "base": True,
@@ -737,6 +2888,7 @@ class TokenMonitor(commands.Cog):
     async def baseon(self, ctx):
         """Activer le monitoring pour Base"""
         self.active_chains["base"] = True
+        self.rescan_profiles = True
         await ctx.send("✅ Monitoring activé pour Base")
 
     @commands.command()
@@ -749,6 +2901,7 @@ class TokenMonitor(commands.Cog):
     async def solanaon(self, ctx):
         """Activer le monitoring pour Solana"""
         self.active_chains["solana"] = True
+        self.rescan_profiles = True
         await ctx.send("✅ Monitoring activé pour Solana")
 
     @commands.command()
@@ -795,15 +2948,11 @@ class TokenMonitor(commands.Cog):
             # Send initial message
             status_msg = await ctx.send("🔍 Recherche du dernier token...")
             
-            # Fetch latest tokens
-            headers = {
-                'Accept': '*/*',
-                'User-Agent': 'Mozilla/5.0'
-            }
-            
-            response = requests.get(DEXSCREENER_API_URL, headers=headers)
-            response.raise_for_status()
-            tokens = response.json()
+            # Fetch latest tokens (dernière liste connue si l'API répond 304)
+            tokens, changed = await self.profile_poller.fetch()
+            if changed:
+                # Le changement est consommé ici : le prochain tick de monitor_tokens doit quand même traiter la liste
+                self.rescan_profiles = True
 
             # Find the latest token from monitored chains
             latest_token = None
@@ -1026,15 +3175,11 @@ class TokenMonitor(commands.Cog):
     async def monitor_tokens(self):
         """Monitor for new tokens on monitored blockchains."""
         try:
-            headers = {
-                'Accept': '*/*',
-                'User-Agent': 'Mozilla/5.0'
-            }
-            
-            logger.info("Fetching latest token profiles...")
-            response = requests.get(DEXSCREENER_API_URL, headers=headers)
-            response.raise_for_status()
-            tokens = response.json()
+            tokens, changed = await self.profile_poller.fetch()
+            if not changed and not self.rescan_profiles:
+                logger.debug("Token profiles unchanged since last poll")
+                return
+            self.rescan_profiles = False
             logger.info(f"Received {len(tokens)} tokens from API")
 
             # Filter for monitored blockchain tokens
@@ -1054,19 +3199,19 @@ class TokenMonitor(commands.Cog):
             for token in new_tokens:
                 await self._send_token_notification(token, self.channel)
 
-            # Save updated seen tokens
-            self._save_seen_tokens()
-
             if new_tokens:
+                # Save updated seen tokens (uniquement quand l'ensemble a changé)
+                self._save_seen_tokens()
                 logger.info(f"Found {len(new_tokens)} new tokens")
             else:
                 logger.debug("No new tokens found")
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error fetching tokens: {e}")
+            logger.error(f"Response status: {e.response.status_code}")
+            logger.error(f"Response text: {e.response.text}")
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching tokens: {e}")
-            if hasattr(e, 'response') and e.response:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response text: {e.response.text}")
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
 
@@ -1167,6 +3312,7 @@ class TokenMonitor(commands.Cog):
         embed.add_field(name="!volume <contract>", value="Affiche le volume du token sur 24h, 6h, 1h, 5min.", inline=False)
         embed.add_field(name="!setvolume <usd>", value="Définit le seuil global d'alerte volume (24h).", inline=False)
         embed.add_field(name="!setemergencycall <usd>", value="Définit le seuil d'appel d'urgence Twilio (défaut: 50000 USD).", inline=False)
+        embed.add_field(name="!setvolume5m <usd>", value="Définit le seuil d'alerte volume sur 5 minutes (défaut: 5000 USD, 0 = désactivé).", inline=False)
         embed.add_field(name="!testpushover", value="Teste la connexion Pushover (admin uniquement).", inline=False)
         embed.add_field(name="!testtwilio", value="Teste la connexion Twilio avec un appel (admin uniquement).", inline=False)
         embed.add_field(name="!banfid <fid>", value="Bannit un FID pour ne plus recevoir ses alertes de déploiement.", inline=False)
@@ -1176,6 +3322,7 @@ class TokenMonitor(commands.Cog):
         embed.add_field(name="!exportbanlist", value="Exporte la liste des FIDs bannis dans un fichier.", inline=False)
         embed.add_field(name="!fidcheck <contract>", value="Vérifie le FID associé à un contrat Clanker.", inline=False)
         embed.add_field(name="!spamcheck", value="Liste les FIDs ayant déployé plus d'un token dans les dernières 24h.", inline=False)
+        embed.add_field(name="!autoban <n>", value="Bannit automatiquement un FID déployant n tokens ou plus en 1h (0 = désactivé).", inline=False)
         embed.add_field(name="!whitelist <fid>", value="Ajoute un FID à la whitelist (alertes premium).", inline=False)
         embed.add_field(name="!removewhitelist <fid>", value="Retire un FID de la whitelist.", inline=False)
         embed.add_field(name="!checkwhitelist", value="Affiche la liste des FIDs whitelistés.", inline=False)
@@ -1196,7 +3343,7 @@ class TokenMonitor(commands.Cog):
 class ClankerMonitor(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.seen_tokens: Set[str] = self._load_seen_tokens()
+        self.seen_tokens = DedupeIndex()
         self.channel = None
         self.is_active = True
         self.premium_only = False
@@ -1206,15 +3353,30 @@ class ClankerMonitor(commands.Cog):
         
         # Initialize database manager
         self.db = DatabaseManager()
+        # Tokens sous surveillance volume, retrouvés après un redémarrage
+        self.tracked_store = TrackedTokenStore(self.db, self.tracked_clanker_tokens)
+        # Mutations faites par les autres instances (LISTEN/NOTIFY ou polling SQLite)
+        self.state_feed = StateChangeFeed(self.db)
+        self.state_feed.on_change = self._apply_remote_changes
+        self.state_feed.on_resync = self._resync_state
+        self.state_feed.mark_loaded()
         
         # Load data from database (with fallback to JSON files)
         logger.info("Loading data from database...")
-        self.banned_fids: Set[str] = self.db.get_banned_fids()
-        self.whitelisted_fids: Set[str] = self.db.get_whitelisted_fids()
+        self.banned_fids = FidSet()
+        self.whitelisted_fids = FidSet()
+        self.fid_sets_load_ms = 0.0
+        self._load_fid_sets()
         self.keyword_whitelist: Set[str] = self.db.get_keyword_whitelist()
         self.tracked_addresses: Set[str] = self.db.get_tracked_addresses()
         self.default_volume_threshold = self.db.get_volume_threshold()
         self.emergency_call_threshold = self.db.get_emergency_call_threshold()
+        self.auto_ban_threshold = float(self.db.get_preference('auto_ban_threshold', '0'))
+        self.volume_5m_threshold = float(self.db.get_preference('volume_5m_threshold', '5000'))
+        self.keyword_matcher = None
+        self.keyword_rebuild_handle = None  # recompilation différée (_schedule_keyword_rebuild)
+        self.reload_deltas = None  # mutations à rejouer pendant un rechargement (_reload_state)
+        self._rebuild_keyword_matcher()
         
         # Si la base de données est vide, migrer depuis les fichiers JSON
         if not self.banned_fids and not self.whitelisted_fids and not self.keyword_whitelist:
@@ -1225,44 +3387,64 @@ class ClankerMonitor(commands.Cog):
         
         logger.info(f"Loaded from database: {len(self.banned_fids)} banned FIDs, {len(self.whitelisted_fids)} whitelisted FIDs, {len(self.keyword_whitelist)} keywords, {len(self.tracked_addresses)} tracked addresses")
         logger.info(f"Volume threshold: {self.default_volume_threshold}, Emergency call threshold: {self.emergency_call_threshold}")
-        # --- Ajout Web3 WebSocket et contrat factory ---
-        self.w3_ws = Web3(Web3.WebsocketProvider(QUICKNODE_WSS))
-        self.w3_ws.middleware_onion.inject(geth_poa_middleware, layer=0)
-        self.clanker_factory = self.w3_ws.eth.contract(
+        # --- Ajout Web3 async (QuickNode) et contrat factory ---
+        self.w3_async = AsyncWeb3(w3.provider)
+        self.w3_async.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+        self.clanker_factory = self.w3_async.eth.contract(
             address=Web3.to_checksum_address(CLANKER_FACTORY_ADDRESS),
             abi=CLANKER_FACTORY_ABI
         )
         # --- Ajout du contrat factory V4 ---
-        self.clanker_factory_v4 = self.w3_ws.eth.contract(
+        self.clanker_factory_v4 = self.w3_async.eth.contract(
             address=Web3.to_checksum_address(CLANKER_FACTORY_V4_ADDRESS),
             abi=CLANKER_FACTORY_V4_ABI
         )
         # --- Fey launchpad factory ---
-        self.fey_factory = self.w3_ws.eth.contract(
+        self.fey_factory = self.w3_async.eth.contract(
             address=Web3.to_checksum_address(FEY_FACTORY_ADDRESS),
             abi=FEY_FACTORY_ABI
         )
+        # --- Souscription push des logs TokenCreated ---
+        self.log_engine = LogSubscriptionEngine(RPC_WSS_URLS, self.w3_async, self.db)
+        self.log_engine.on_reorg = self._on_chain_reorg
+        self.log_engine.on_removed = self._on_log_removed
+        self.log_engine.enricher = self._prefetch_transactions
+        # Transactions de déploiement préchargées par lot (hash -> tx brute)
+        self.tx_cache: Dict[str, Dict] = {}
+        # Horodatage des blocs des logs rattrapés (numéro -> timestamp), pour le journal et les compteurs
+        self.block_timestamps: Dict[int, int] = {}
+        # Alertes on-chain récentes, pour pouvoir les retirer en cas de reorg
+        self.onchain_alerts: Dict[tuple, Dict] = {}
+        # --- Mempool : deployToken en attente (optionnel, MEMPOOL_WSS) ---
+        self.mempool_watcher = MempoolWatcher(MEMPOOL_WSS, self.w3_async)
+        self.mempool_watcher.register("clanker_v3", self.clanker_factory)
+        self.mempool_watcher.register("clanker_v4", self.clanker_factory_v4)
+        self.mempool_watcher.register("fey", self.w3_async.eth.contract(
+            address=Web3.to_checksum_address(FEY_FACTORY_ADDRESS),
+            abi=FEY_FACTORY_DEPLOY_ABI
+        ))
+        self.mempool_watcher.handler = self._on_pending_deploy
+        # --- Classification unique des déploiements (toutes factories) ---
+        self.classifier = DeploymentClassifier(self)
+        # Volumes Dexscreener interrogés par lots multi-token sur un client partagé
+        self.volume_poller = DexscreenerVolumePoller()
+        # Prochaine vérification Dexscreener de chaque token suivi (selon son âge)
+        self.volume_scheduler = VolumeCheckScheduler()
+        # Volume on-chain depuis les Swap des pools des tokens suivis (alerte dès le bloc du trade)
+        self.swap_volume = SwapVolumeEngine(RPC_WSS_URLS, self.w3_async)
+        self.swap_volume.on_volume = self._on_swap_volume
+        self.uniswap_v3_factory = self.w3_async.eth.contract(
+            address=Web3.to_checksum_address(UNISWAP_V3_FACTORY_ADDRESS),
+            abi=UNISWAP_V3_FACTORY_ABI
+        )
+        self.clanker_v3_pool_fee = None
+        # Journal local des déploiements vus (historique sans API ni scan de logs)
+        self.deployment_journal = DeploymentJournal(self.db)
+        # Compteurs glissants 1h/6h/24h par FID et par adresse créatrice, amorcés depuis le journal (seed_deploy_counters)
+        self.fid_deploy_counter = SlidingWindowCounter(DEPLOY_RATE_WINDOWS, DEPLOY_RATE_BUCKET_SECONDS)
+        self.creator_deploy_counter = SlidingWindowCounter(DEPLOY_RATE_WINDOWS, DEPLOY_RATE_BUCKET_SECONDS)
         # ---
 
-    def _load_seen_tokens(self) -> Set[str]:
-        """Load previously seen Clanker token addresses from file."""
-        try:
-            if os.path.exists(SEEN_CLANKER_TOKENS_FILE):
-                with open(SEEN_CLANKER_TOKENS_FILE, 'r') as f:
-                    return set(json.load(f))
-            return set()
-        except Exception as e:
-            logger.error(f"Error loading seen Clanker tokens: {e}")
-            return set()
-
-    def _save_seen_tokens(self):
-        """Save seen Clanker token addresses to file."""
-        try:
-            with open(SEEN_CLANKER_TOKENS_FILE, 'w') as f:
-                json.dump(list(self.seen_tokens), f)
-        except Exception as e:
-            logger.error(f"Error saving seen Clanker tokens: {e}")
-
     def _load_banned_fids(self) -> Set[str]:
         """Load banned FIDs from file."""
         try:
@@ -1350,14 +3532,224 @@ class ClankerMonitor(commands.Cog):
         except Exception as e:
             logger.error(f"Error saving keyword whitelist: {e}")
 
+    def _load_fid_sets(self):
+        """Charge banlist et whitelist depuis la base en FidSet compacts (durée mesurée pour !checkdb)"""
+        started = time.perf_counter()
+        self.banned_fids = FidSet(self.db.get_banned_fids())
+        self.whitelisted_fids = FidSet(self.db.get_whitelisted_fids())
+        self.fid_sets_load_ms = (time.perf_counter() - started) * 1000
+
+    def _read_state_from_db(self) -> Dict:
+        """Lit l'état persistant sans toucher au cache (appel DB bloquant, exécutable via db.run)"""
+        started = time.perf_counter()
+        banned_fids = FidSet(self.db.get_banned_fids())
+        whitelisted_fids = FidSet(self.db.get_whitelisted_fids())
+        return {
+            'banned_fids': banned_fids,
+            'whitelisted_fids': whitelisted_fids,
+            'fid_sets_load_ms': (time.perf_counter() - started) * 1000,
+            'keyword_whitelist': self.db.get_keyword_whitelist(),
+            'tracked_addresses': self.db.get_tracked_addresses(),
+            'default_volume_threshold': self.db.get_volume_threshold(),
+            'emergency_call_threshold': self.db.get_emergency_call_threshold(),
+            'auto_ban_threshold': float(self.db.get_preference('auto_ban_threshold', '0')),
+            'volume_5m_threshold': float(self.db.get_preference('volume_5m_threshold', '5000')),
+        }
+
+    def _apply_state(self, state: Dict):
+        """Remplace le cache en mémoire par un état lu en base (sur la boucle d'événements)"""
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+        self._rebuild_keyword_matcher()
+
     def _refresh_data_from_db(self):
-        """Rafraîchit les données depuis la base de données"""
-        self.banned_fids = self.db.get_banned_fids()
-        self.whitelisted_fids = self.db.get_whitelisted_fids()
-        self.keyword_whitelist = self.db.get_keyword_whitelist()
-        self.tracked_addresses = self.db.get_tracked_addresses()
-        self.default_volume_threshold = self.db.get_volume_threshold()
-        self.emergency_call_threshold = self.db.get_emergency_call_threshold()
+        """Rafraîchit les données depuis la base de données (synchrone : démarrage uniquement)"""
+        self._apply_state(self._read_state_from_db())
+
+    async def _reload_state(self):
+        """Relit l'état en base dans le pool de threads DB puis l'applique sur la boucle.
+
+        Les mutations appliquées au cache pendant la lecture sont rejouées après
+        l'instantané, qui a pu être pris avant leur écriture en base."""
+        self.reload_deltas = []
+        try:
+            state = await self.db.run(self._read_state_from_db)
+        finally:
+            deltas, self.reload_deltas = self.reload_deltas, None
+        self._apply_state(state)
+        for table, op, value in deltas:
+            self._apply_delta(table, op, value)
+
+    def _record_reload_deltas(self, table: str, op: str, values):
+        """Note des mutations du cache à rejouer si un rechargement (_reload_state) est en cours"""
+        if self.reload_deltas is not None:
+            self.reload_deltas.extend((table, op, value) for value in values)
+
+    # Table -> attribut du cache en mémoire (mis à jour par delta, jamais rechargé en entier)
+    STATE_SET_ATTRIBUTES = {
+        'banned_fids': 'banned_fids',
+        'whitelisted_fids': 'whitelisted_fids',
+        'keyword_whitelist': 'keyword_whitelist',
+        'tracked_addresses': 'tracked_addresses',
+    }
+    # Préférences dupliquées en attribut (converties en float)
+    STATE_PREFERENCE_ATTRIBUTES = {
+        'default_volume_threshold': 'default_volume_threshold',
+        'emergency_call_threshold': 'emergency_call_threshold',
+        'auto_ban_threshold': 'auto_ban_threshold',
+        'volume_5m_threshold': 'volume_5m_threshold',
+    }
+
+    def _db_writer(self, table: str, op: str):
+        """Méthode DatabaseManager correspondant à une mutation (table, op)"""
+        return {
+            ('banned_fids', 'add'): self.db.add_banned_fid,
+            ('banned_fids', 'remove'): self.db.remove_banned_fid,
+            ('whitelisted_fids', 'add'): self.db.add_whitelisted_fid,
+            ('whitelisted_fids', 'remove'): self.db.remove_whitelisted_fid,
+            ('keyword_whitelist', 'add'): self.db.add_keyword,
+            ('keyword_whitelist', 'remove'): self.db.remove_keyword,
+            ('keyword_whitelist', 'clear'): self.db.clear_keywords,
+            ('tracked_addresses', 'add'): self.db.add_tracked_address,
+            ('tracked_addresses', 'remove'): self.db.remove_tracked_address,
+            ('bot_preferences', 'set'): self.db.set_preference,
+        }[(table, op)]
+
+    def _apply_delta(self, table: str, op: str, value=None):
+        """Applique une mutation au cache en mémoire, sans relire la base"""
+        self._record_reload_deltas(table, op, [value])
+        if table == 'bot_preferences':
+            key, raw = value
+            attribute = self.STATE_PREFERENCE_ATTRIBUTES.get(key)
+            if attribute:
+                setattr(self, attribute, float(raw))
+            return
+        target = getattr(self, self.STATE_SET_ATTRIBUTES[table])
+        if op == 'add':
+            target.add(value)
+        elif op == 'remove':
+            target.discard(value)
+        elif op == 'clear':
+            target.clear()
+        if table == 'keyword_whitelist':
+            self._schedule_keyword_rebuild()
+
+    async def _apply_remote_changes(self, changes: List[Dict]):
+        """Applique un lot de mutations reçues du change feed.
+        Les ajouts consécutifs sont fusionnés en un update() par table (imports en masse)."""
+        pending_adds: Dict[str, list] = {}
+
+        def flush(table: str):
+            keys = pending_adds.pop(table, None)
+            if keys:
+                self._record_reload_deltas(table, 'add', keys)
+                getattr(self, self.STATE_SET_ATTRIBUTES[table]).update(keys)
+                if table == 'keyword_whitelist':
+                    self._schedule_keyword_rebuild()
+
+        for change in changes:
+            table, op, row = change['table'], change['op'], change['row']
+            if table == 'bot_preferences':
+                if op != 'DELETE' and row.get('key') in self.STATE_PREFERENCE_ATTRIBUTES:
+                    self._apply_delta(table, 'set', (row['key'], row['value']))
+                continue
+            if table not in self.STATE_SET_ATTRIBUTES:
+                continue
+            key = row[STATE_KEY_COLUMNS[table]]
+            if op == 'DELETE':
+                flush(table)
+                self._apply_delta(table, 'remove', key)
+            else:
+                pending_adds.setdefault(table, []).append(key)
+        for table in list(pending_adds):
+            flush(table)
+        logger.debug(f"[STATE] {len(changes)} mutation(s) appliquée(s) depuis le change feed")
+
+    async def _resync_state(self):
+        """Rechargement complet après une coupure du change feed"""
+        await self._reload_state()
+        logger.info("[STATE] État resynchronisé depuis la base")
+
+    async def watch_state_changes(self):
+        """Suit les mutations d'état des autres instances partageant la base"""
+        await self.bot.wait_until_ready()
+        logger.info(f"Started state change feed ({self.db.db_type})")
+        await self.state_feed.run()
+
+    async def _write_through(self, table: str, op: str, value=None):
+        """Écrit la mutation en base (hors boucle) puis l'applique au cache en mémoire"""
+        if op == 'clear':
+            args = ()
+        elif table == 'bot_preferences':
+            args = value
+        else:
+            args = (value,)
+        await self.db.run(self._db_writer(table, op), *args)
+        self._apply_delta(table, op, value)
+
+    @staticmethod
+    def _parse_fid_file(filename: str, content: str):
+        """Parse un fichier de FIDs (.txt : un par ligne, .json : liste) -> (FidSet valides, entrées invalides)"""
+        if filename.endswith('.json'):
+            try:
+                json_data = json.loads(content)
+            except json.JSONDecodeError:
+                return FidSet(), ["JSON invalide"]
+            if not isinstance(json_data, list):
+                return FidSet(), ["Format JSON invalide"]
+            entries = [str(fid).strip() for fid in json_data]
+        else:
+            entries = [line.strip() for line in content.splitlines()]
+        entries = [entry for entry in entries if entry]
+        valid = FidSet(entries)
+        # FidSet ignore tout ce qui n'est pas un entier 32 bits : le reste est invalide
+        invalid = [entry for entry in entries if entry not in valid] if len(valid) < len(entries) else []
+        return valid, invalid
+
+    async def _import_fid_files(self, attachments, table: str, conflict_table: str):
+        """Pipeline d'import en masse vers banned_fids/whitelisted_fids.
+        Dédoublonnage par algèbre de FidSet contre la liste cible et la liste en conflit,
+        puis une seule transaction en base. Retourne (stats par fichier, stats globales)."""
+        contents = await asyncio.gather(*(attachment.read() for attachment in attachments))
+        started = time.perf_counter()
+        existing = getattr(self, table)
+        conflicts = getattr(self, conflict_table)
+
+        file_stats = {}
+        candidates = FidSet()
+        invalid_total = []
+        entries_total = 0
+        for attachment, content in zip(attachments, contents):
+            valid, invalid = self._parse_fid_file(attachment.filename, content.decode('utf-8'))
+            file_stats[attachment.filename] = {
+                'added': valid - conflicts - existing,
+                'invalid': invalid,
+                'conflict': valid & conflicts,
+                'existing': valid & existing,
+            }
+            candidates.update(valid)
+            invalid_total.extend(invalid)
+            entries_total += len(valid) + len(invalid)
+
+        added = candidates - conflicts - existing
+        already_present = candidates & existing
+        await self.db.run(self.db.bulk_add_fids, table, list(added))
+        # Relu après l'écriture : un rechargement a pu remplacer l'ensemble entre-temps
+        self._record_reload_deltas(table, 'add', list(added))
+        getattr(self, self.STATE_SET_ATTRIBUTES[table]).update(added)
+
+        elapsed = time.perf_counter() - started
+        total_stats = {
+            'added': added,
+            'invalid': invalid_total,
+            'conflict': candidates & conflicts,
+            'existing': already_present,
+            'entries': entries_total,
+            'elapsed_ms': elapsed * 1000,
+            'rate': entries_total / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(f"[IMPORT] {table}: {entries_total} entrées, {len(added)} ajoutées en {elapsed * 1000:.1f} ms ({total_stats['rate']:,.0f} FIDs/s)")
+        return file_stats, total_stats
 
     def _migrate_json_to_db(self):
         """Migre les données des fichiers JSON vers la base de données"""
@@ -1388,20 +3780,166 @@ class ClankerMonitor(commands.Cog):
         except Exception as e:
             logger.error(f"Error during migration: {e}")
 
+    async def _decode_token_config(self, contract, event, event_fields: Dict[str, Optional[str]]) -> Dict:
+        """Reconstitue name/symbol/image/metadata/context depuis les args du log.
+        Le calldata de la transaction n'est récupéré que si un champ est absent de l'event."""
+        args = event['args']
+        token_config = {
+            field: args.get(arg_name) if arg_name else None
+            for field, arg_name in event_fields.items()
+        }
+        missing = [field for field, value in token_config.items() if value is None]
+        if missing:
+            tx = self.tx_cache.get(Web3.to_hex(event['transactionHash']))
+            if tx is None:
+                tx = await self.w3_async.eth.get_transaction(event['transactionHash'])
+            func_obj, func_args = contract.decode_function_input(tx['input'])
+            if 'deploymentConfig' in func_args:
+                calldata_config = func_args['deploymentConfig']['tokenConfig']
+            else:
+                calldata_config = func_args['tokenConfig']
+            for field in missing:
+                token_config[field] = calldata_config[field]
+        return token_config
+
+    async def _prefetch_transactions(self, logs):
+        """Précharge en une requête batch les transactions des logs dont le décodage a besoin du calldata,
+        et l'horodatage des blocs des logs rattrapés par le backfill"""
+        # Seul l'event V3 n'embarque pas image/context : les autres factories se décodent depuis le log
+        v3_address = CLANKER_FACTORY_ADDRESS.lower()
+        tx_hashes = []
+        block_numbers = []
+        for log in logs:
+            tx_hash = Web3.to_hex(log["transactionHash"])
+            if log["address"].lower() == v3_address and tx_hash not in self.tx_cache and tx_hash not in tx_hashes:
+                tx_hashes.append(tx_hash)
+            # Un log live est daté à sa réception ; un log du backfill, au bloc qui l'a émis
+            block_number = log["blockNumber"]
+            if (LogSubscriptionEngine._log_key(log) not in self.log_engine.log_received_at
+                    and block_number not in self.block_timestamps and block_number not in block_numbers):
+                block_numbers.append(block_number)
+        if len(tx_hashes) <= 1 and not block_numbers:
+            return  # au plus un appel : get_transaction classique (course entre endpoints)
+        if not hasattr(self.w3_async.provider, "make_batch_request"):
+            return
+        responses = await self.w3_async.provider.make_batch_request(
+            [("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes]
+            + [("eth_getBlockByNumber", [hex(block_number), False]) for block_number in block_numbers]
+        )
+        for tx_hash, response in zip(tx_hashes, responses):
+            if response.get("result"):
+                self.tx_cache[tx_hash] = response["result"]
+        for block_number, response in zip(block_numbers, responses[len(tx_hashes):]):
+            if response.get("result"):
+                self.block_timestamps[block_number] = int(response["result"]["timestamp"], 16)
+        for old_hash in list(self.tx_cache)[:max(0, len(self.tx_cache) - ENRICHMENT_CACHE_SIZE)]:
+            del self.tx_cache[old_hash]
+        for old_block in list(self.block_timestamps)[:max(0, len(self.block_timestamps) - ENRICHMENT_CACHE_SIZE)]:
+            del self.block_timestamps[old_block]
+        logger.info(f"[LOGS] {len(tx_hashes)} transaction(s) et {len(block_numbers)} bloc(s) préchargé(s) en une requête batch")
+
+    async def _deployment_time(self, event) -> float:
+        """Date d'un déploiement : réception du log s'il est live, timestamp de son bloc s'il est rattrapé"""
+        received_at = self.log_engine.log_received_at.get(LogSubscriptionEngine._log_key(event))
+        if received_at:
+            return received_at
+        block_number = event['blockNumber']
+        timestamp = self.block_timestamps.get(block_number)
+        if timestamp is None:
+            try:
+                timestamp = (await self.w3_async.eth.get_block(block_number))['timestamp']
+            except Exception as e:
+                logger.error(f"[JOURNAL] Timestamp du bloc {block_number} indisponible: {e}")
+                return time.time()
+            self.block_timestamps[block_number] = timestamp
+        return float(timestamp)
+
+    def _record_onchain_alert(self, event, token_address: str, message: Optional[discord.Message] = None):
+        """Mémorise l'alerte (et le message Discord) associée à un log pour une éventuelle rétractation"""
+        log_key = LogSubscriptionEngine._log_key(event)
+        alert = self.onchain_alerts.setdefault(log_key, {
+            'block_number': event['blockNumber'],
+            'block_hash': Web3.to_hex(event['blockHash']),
+            'token_address': token_address.lower(),
+            'messages': []
+        })
+        if message:
+            alert['messages'].append(message)
+        # Au-delà de la fenêtre de reorg, plus rien à retirer
+        oldest = self.log_engine.head_block - REORG_WINDOW_BLOCKS
+        for key in [key for key, a in self.onchain_alerts.items() if a['block_number'] < oldest]:
+            del self.onchain_alerts[key]
+
+    async def _retract_onchain_alert(self, log_key: tuple):
+        """Retire une alerte dont le log a été réorganisé : édite le message et arrête le suivi volume"""
+        alert = self.onchain_alerts.pop(log_key, None)
+        if not alert:
+            return
+        token_key = alert['token_address']
+        self.tracked_clanker_tokens.pop(token_key, None)
+        self.tracked_store.mark(token_key)
+        self.volume_scheduler.discard(token_key)
+        self.swap_volume.unwatch(token_key)
+        self.seen_tokens.discard(token_key)
+        for message in alert['messages']:
+            try:
+                embed = message.embeds[0] if message.embeds else discord.Embed()
+                embed.title = f"⚠️ Annulé (reorg) — {embed.title or 'Alerte on-chain'}"
+                embed.color = discord.Color.dark_grey()
+                embed.description = "Le bloc de ce déploiement a été réorganisé, le token n'existe plus sur la chaîne canonique."
+                await message.edit(embed=embed, view=None)
+            except Exception as e:
+                logger.error(f"[REORG] Impossible d'éditer l'alerte pour {token_key}: {e}")
+        logger.info(f"[REORG] Alerte retirée et suivi volume arrêté pour {token_key} (bloc {alert['block_number']})")
+
+    async def _on_log_removed(self, log):
+        await self._retract_onchain_alert(LogSubscriptionEngine._log_key(log))
+
+    async def _on_chain_reorg(self, orphaned_hashes: Set[str]):
+        for log_key in [key for key, a in self.onchain_alerts.items() if a['block_hash'] in orphaned_hashes]:
+            await self._retract_onchain_alert(log_key)
+
+    async def _send_onchain_alert(self, event, alert_class: str, channel: discord.TextChannel,
+                                  token_address: str, embed: discord.Embed, view: discord.ui.View):
+        """Envoie une alerte on-chain après la profondeur de confirmation de sa classe"""
+        self._record_onchain_alert(event, token_address)
+
+        async def send():
+            message = await channel.send(embed=embed, view=view)
+            self._record_onchain_alert(event, token_address, message)
+
+        await self.log_engine.run_when_confirmed(event, ALERT_CONFIRMATION_DEPTHS.get(alert_class, 0), send)
+
     def _check_keyword_match(self, name: str, symbol: str) -> bool:
         """Check if token name or symbol matches any whitelisted keyword."""
-        if not self.keyword_whitelist:
-            return False
-        
-        # Convert to lowercase for case-insensitive matching
-        name_lower = name.lower()
-        symbol_lower = symbol.lower()
-        
-        for keyword in self.keyword_whitelist:
-            keyword_lower = keyword.lower()
-            if keyword_lower in name_lower or keyword_lower in symbol_lower:
-                return True
-        return False
+        return bool(self.keyword_matcher.find_all(name, symbol))
+
+    def _schedule_keyword_rebuild(self):
+        """Programme une recompilation de l'automate dans KEYWORD_REBUILD_DELAY.
+
+        Toutes les mutations arrivées d'ici là (lot du change feed, commandes en
+        rafale) sont couvertes par la même recompilation ; en attendant, la
+        correspondance utilise l'automate précédent."""
+        if self.keyword_rebuild_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._rebuild_keyword_matcher()  # hors boucle d'événements : immédiat
+            return
+        self.keyword_rebuild_handle = loop.call_later(KEYWORD_REBUILD_DELAY, self._rebuild_keyword_matcher)
+
+    def _rebuild_keyword_matcher(self):
+        """Recompile l'automate des mots-clés si la whitelist a changé"""
+        if self.keyword_rebuild_handle is not None:
+            self.keyword_rebuild_handle.cancel()
+            self.keyword_rebuild_handle = None
+        keywords = frozenset(keyword.lower() for keyword in self.keyword_whitelist)
+        if self.keyword_matcher is not None and self.keyword_matcher.keywords == keywords:
+            return
+        start = time.perf_counter()
+        self.keyword_matcher = KeywordMatcher(keywords)
+        logger.info(f"Keyword matcher compiled: {len(keywords)} keywords, {len(self.keyword_matcher.transitions)} states in {(time.perf_counter() - start) * 1000:.1f} ms")
 
     @commands.command()
     @commands.has_permissions(administrator=True)
@@ -1411,10 +3949,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send("❌ Le FID doit être un nombre.")
             return
             
-        # Ajouter à la base de données
-        self.db.add_banned_fid(fid)
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('banned_fids', 'add', fid)
         await ctx.send(f"✅ FID {fid} banni avec succès. Vous ne recevrez plus d'alertes de ce compte.")
 
     @commands.command()
@@ -1422,10 +3957,7 @@ class ClankerMonitor(commands.Cog):
     async def unbanfid(self, ctx, fid: str):
         """Débannir un FID pour recevoir à nouveau ses alertes de déploiement."""
         if fid in self.banned_fids:
-            # Retirer de la base de données
-            self.db.remove_banned_fid(fid)
-            # Rafraîchir les données en mémoire
-            self._refresh_data_from_db()
+            await self._write_through('banned_fids', 'remove', fid)
             await ctx.send(f"✅ FID {fid} débanni avec succès. Vous recevrez à nouveau les alertes de ce compte.")
         else:
             await ctx.send("❌ Ce FID n'est pas banni.")
@@ -1440,7 +3972,7 @@ class ClankerMonitor(commands.Cog):
             
         embed = discord.Embed(
             title="Liste des FIDs bannis",
-            description="\n".join(f"• FID: {fid}" for fid in sorted(self.banned_fids)),
+            description="\n".join(f"• FID: {fid}" for fid in self.banned_fids),
             color=discord.Color.red()
         )
         await ctx.send(embed=embed)
@@ -1448,109 +3980,55 @@ class ClankerMonitor(commands.Cog):
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def spamcheck(self, ctx):
-        """Analyse les déploiements Clanker des dernières 24h pour identifier les spammeurs."""
-        try:
-            # Message initial
-            status_msg = await ctx.send("🔍 Analyse des déploiements Clanker des dernières 24h en cours...")
-
-            # Récupérer tous les tokens des dernières 24h
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(f"{CLANKER_API_URL}/tokens", params={"limit": 1000})
-                response.raise_for_status()
-                data = response.json()
-
-                if not isinstance(data, dict) or "data" not in data:
-                    await status_msg.edit(content="❌ Format de réponse invalide de l'API Clanker")
-                    return
-
-                tokens = data["data"]
-                
-                # Filtrer les tokens des dernières 24h
-                now = datetime.now(timezone.utc)
-                cutoff = now - timedelta(hours=24)
-                
-                # Compter les déploiements par FID
-                fid_counts = {}
-                fid_tokens = {}  # Pour stocker les détails des tokens par FID
-                
-                for token in tokens:
-                    # Vérifier la date de création
-                    created_at_str = token.get('created_at')
-                    if not created_at_str:
-                        continue
-                        
-                    try:
-                        created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                        if created_at < cutoff:
-                            continue
-                            
-                        fid = str(token.get('requestor_fid'))
-                        if not fid:
-                            continue
-                            
-                        if fid not in fid_counts:
-                            fid_counts[fid] = 0
-                            fid_tokens[fid] = []
-                            
-                        fid_counts[fid] += 1
-                        fid_tokens[fid].append({
-                            'name': token.get('name', 'Unknown'),
-                            'symbol': token.get('symbol', 'Unknown'),
-                            'contract': token.get('contract_address', 'Unknown')
-                        })
-                            
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Error parsing date: {e}")
-                        continue
-
-                # Filtrer les FIDs avec plus d'un déploiement
-                spammers = {fid: count for fid, count in fid_counts.items() if count > 1}
-                
-                if not spammers:
-                    await status_msg.edit(content="✅ Aucun spammeur détecté dans les dernières 24h!")
-                    return
-
-                # Créer l'embed avec les résultats
-                embed = discord.Embed(
-                    title="🚨 Spammeurs de Clanker (24h)",
-                    description="Liste des FIDs ayant déployé plus d'un token dans les dernières 24h",
-                    color=discord.Color.red(),
-                    timestamp=now
-                )
-
-                # Trier par nombre de déploiements (du plus grand au plus petit)
-                sorted_spammers = sorted(spammers.items(), key=lambda x: x[1], reverse=True)
+        """Affiche les FIDs et adresses ayant déployé plusieurs tokens (compteurs glissants 1h/6h/24h)."""
+        now = time.time()
+        spammers = self.fid_deploy_counter.top('24h', 2, now)
+        creators = self.creator_deploy_counter.top('24h', 2, now)
 
-                for fid, count in sorted_spammers:
-                    # Créer la liste des tokens pour ce FID
-                    token_list = []
-                    for token in fid_tokens[fid]:
-                        token_list.append(f"• {token['name']} ({token['symbol']})")
-                        if len(token_list[-1]) > 50:  # Tronquer si trop long
-                            token_list[-1] = token_list[-1][:47] + "..."
+        if not spammers and not creators:
+            await ctx.send("✅ Aucun spammeur détecté dans les dernières 24h!")
+            return
 
-                    tokens_text = "\n".join(token_list)
-                    if len(tokens_text) > 1024:  # Limite Discord pour un field
-                        tokens_text = tokens_text[:1021] + "..."
+        auto_ban = int(self.auto_ban_threshold)
+        embed = discord.Embed(
+            title="🚨 Spammeurs de Clanker (24h)",
+            description="FIDs ayant déployé plus d'un token dans les dernières 24h\n"
+                        + (f"Auto-ban : {auto_ban} déploiements / {AUTO_BAN_WINDOW}" if auto_ban > 0 else "Auto-ban désactivé (!autoban <n>)"),
+            color=discord.Color.red(),
+            timestamp=datetime.now(timezone.utc)
+        )
 
-                    embed.add_field(
-                        name=f"FID: {fid} ({count} tokens)",
-                        value=tokens_text,
-                        inline=False
-                    )
+        for fid, count in spammers[:20]:  # Limite Discord : 25 fields
+            counts = self.fid_deploy_counter.counts(fid)
+            banned = " ⛔" if fid in self.banned_fids else ""
+            embed.add_field(
+                name=f"FID: {fid} ({count} tokens){banned}",
+                value=f"1h: {counts['1h']} • 6h: {counts['6h']} • 24h: {counts['24h']}",
+                inline=False
+            )
 
-                # Ajouter un footer avec des instructions
-                embed.set_footer(text="Utilisez !banfid <fid> pour bannir un FID spécifique")
+        if creators:
+            creators_text = "\n".join(
+                f"`{address}` : {count}" for address, count in creators[:10]
+            )
+            embed.add_field(name="Adresses créatrices (24h)", value=creators_text, inline=False)
 
-                await status_msg.delete()
-                await ctx.send(embed=embed)
+        # Ajouter un footer avec des instructions
+        embed.set_footer(text="Utilisez !banfid <fid> pour bannir un FID spécifique")
+        await ctx.send(embed=embed)
 
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error during spam check: {e}")
-            await status_msg.edit(content="❌ Erreur lors de la requête à l'API Clanker")
-        except Exception as e:
-            logger.error(f"Error during spam check: {e}")
-            await status_msg.edit(content="❌ Une erreur est survenue lors de la vérification des spammeurs")
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def autoban(self, ctx, threshold: int):
+        """Bannit automatiquement un FID dépassant `threshold` déploiements sur la fenêtre d'auto-ban (0 = désactivé)."""
+        if threshold < 0:
+            await ctx.send("❌ Le seuil doit être positif (0 pour désactiver).")
+            return
+        await self._write_through('bot_preferences', 'set', ('auto_ban_threshold', str(threshold)))
+        if threshold:
+            await ctx.send(f"✅ Auto-ban activé : un FID déployant {threshold} tokens ou plus sur {AUTO_BAN_WINDOW} sera banni.")
+        else:
+            await ctx.send("✅ Auto-ban désactivé.")
 
     @commands.command()
     async def fidcheck(self, ctx, contract_address: str):
@@ -1702,44 +4180,41 @@ class ClankerMonitor(commands.Cog):
             # Send initial message
             status_msg = await ctx.send("🔍 Recherche du dernier token Clanker V4...")
             
-            # Get the latest block to find recent V4 deployments
-            latest_block = self.w3_ws.eth.block_number
-            
-            # Search for recent TokenCreated events from V4 factory
-            event_filter = self.clanker_factory_v4.events.TokenCreated.create_filter(
-                fromBlock=latest_block - 1000,  # Search last 1000 blocks
-                toBlock='latest'
-            )
-            
-            events = event_filter.get_all_entries()
-            
-            if not events:
-                await status_msg.edit(content="❌ Aucun token V4 récent trouvé dans les derniers blocs.")
-                return
-            
-            # Get the most recent event
-            latest_event = events[-1]
-            token_address = latest_event['args']['tokenAddress']
-            tx_hash = latest_event['transactionHash']
-            tx = self.w3_ws.eth.get_transaction(tx_hash)
+            # Journal local d'abord : pas de scan de logs si le déploiement a été vu en direct
+            await self.deployment_journal.flush()
+            latest = await self.db.run(self.db.get_latest_deployment, "clanker_v4")
+            if latest:
+                token_address = latest['token_address']
+                tx_hash = latest['tx_hash']
+            else:
+                # Get the latest block to find recent V4 deployments
+                latest_block = await self.w3_async.eth.block_number
+                
+                # Search for recent TokenCreated events from V4 factory
+                events = await self.clanker_factory_v4.events.TokenCreated.get_logs(
+                    fromBlock=latest_block - 1000,  # Search last 1000 blocks
+                    toBlock='latest'
+                )
+                
+                if not events:
+                    await status_msg.edit(content="❌ Aucun token V4 récent trouvé dans les derniers blocs.")
+                    return
+                
+                # Get the most recent event
+                latest_event = events[-1]
+                token_address = latest_event['args']['tokenAddress']
+                tx_hash = Web3.to_hex(latest_event['transactionHash'])
             
-            # Decode the input data
+            # Decode the token config from the event log
             try:
-                func_obj, func_args = self.clanker_factory_v4.decode_function_input(tx['input'])
-                token_config = func_args['deploymentConfig']['tokenConfig']
-                name = token_config['name']
-                symbol = token_config['symbol']
-                image = token_config['image']
-                metadata = token_config['metadata']
-                context = token_config['context']
-                
-                # Extract FID from context
-                fid = None
-                try:
-                    context_json = json.loads(context)
-                    fid = str(context_json.get('id'))
-                except Exception:
-                    pass
+                if latest:
+                    name, symbol, image, fid = latest['name'], latest['symbol'], latest['image'], latest['fid']
+                else:
+                    token_config = await self._decode_token_config(self.clanker_factory_v4, latest_event, CLANKER_V4_EVENT_FIELDS)
+                    name = token_config['name']
+                    symbol = token_config['symbol']
+                    image = token_config['image']
+                    fid = Deployment.extract_fid(token_config['context'])
                 
                 # Check if FID is whitelisted
                 is_premium = fid and fid in self.whitelisted_fids
@@ -1759,7 +4234,7 @@ class ClankerMonitor(commands.Cog):
                 clanker_link = f"https://www.clanker.world/clanker/{token_address}"
                 embed.add_field(name="Lien Clanker", value=f"[Voir sur Clanker.world]({clanker_link})", inline=False)
                 # Add deployment transaction link
-                tx_link = f"https://basescan.org/tx/{tx_hash.hex()}"
+                tx_link = f"https://basescan.org/tx/{tx_hash}"
                 embed.add_field(name="Transaction", value=f"[Voir sur Basescan]({tx_link})", inline=False)
                 
                 if image:
@@ -1801,7 +4276,7 @@ class ClankerMonitor(commands.Cog):
                 logger.info(f"Last Clanker V4 command executed for {name} ({symbol}) {token_address}")
                 
             except Exception as e:
-                logger.error(f"Error decoding V4 input data in lastclankerv4: {e}")
+                logger.error(f"Error decoding V4 event data in lastclankerv4: {e}")
                 await status_msg.edit(content="❌ Erreur lors du décodage des données du token V4.")
                 
         except Exception as e:
@@ -1822,14 +4297,21 @@ class ClankerMonitor(commands.Cog):
             logger.info(f"[DEBUG] Username: {social_context.get('username')}")
             logger.info(f"[DEBUG] FID: {token_data.get('requestor_fid')}")
 
-            # Vérifier si le FID est banni
+            # Classification (banlist / whitelist / premium_only) par le moteur commun
             fid = str(token_data.get('requestor_fid', ''))
-            if fid and fid in self.banned_fids:
-                logger.info(f"Skipping notification for banned FID: {fid}")
+            deployment = Deployment(
+                "clanker_v3",
+                token_data.get('contract_address'),
+                token_data.get('name'),
+                token_data.get('symbol'),
+                image=token_data.get('img_url'),
+                context=json.dumps({"id": fid}) if fid else None
+            )
+            verdict, rule = self.classifier.classify(deployment)
+            if verdict == "drop":
+                logger.info(f"Skipping notification for FID {fid} ({rule})")
                 return
-
-            # Vérifier si le FID est whitelisté
-            is_premium = fid and fid in self.whitelisted_fids
+            is_premium = verdict == "premium"
 
             # Si le mode premium est activé et que le token n'est pas premium, on ne l'affiche pas
             if self.premium_only and not is_premium:
@@ -2007,9 +4489,15 @@ class ClankerMonitor(commands.Cog):
                 # Ajoute le token à la liste de surveillance du volume
                 self.tracked_clanker_tokens[contract_address.lower()] = {
                     'first_seen': time.time(),
-                    'alerted': False
+                    'alerted': False,
+                    'name': token_data.get('name'),
+                    'symbol': token_data.get('symbol')
                 }
+                self.volume_scheduler.add(contract_address.lower(), self.tracked_clanker_tokens[contract_address.lower()]['first_seen'])
+                self.tracked_store.mark(contract_address.lower())
                 logger.info(f"[VOLUME TRACK] Ajout du token {contract_address.lower()} à la surveillance volume")
+                if token_data.get('pool_address'):
+                    self._watch_pool(contract_address, config.WETH_ADDRESS, pool=token_data['pool_address'])
 
         except Exception as e:
             logger.error(f"Error sending Clanker notification: {e}")
@@ -2042,8 +4530,7 @@ class ClankerMonitor(commands.Cog):
                     return
 
                 # Add FID to banlist
-                self.banned_fids.add(fid)
-                self._save_banned_fids()
+                await self._write_through('banned_fids', 'add', fid)
                 
                 await interaction.response.send_message(f"✅ FID {fid} ajouté à la banlist avec succès.", ephemeral=True)
                 logger.info(f"FID {fid} banned via button interaction by {interaction.user}")
@@ -2056,8 +4543,7 @@ class ClankerMonitor(commands.Cog):
                 if fid not in self.whitelisted_fids:
                     await interaction.response.send_message(f"❌ Le FID {fid} n'est pas dans la whitelist.", ephemeral=True)
                     return
-                self.whitelisted_fids.remove(fid)
-                self._save_whitelisted_fids()
+                await self._write_through('whitelisted_fids', 'remove', fid)
                 await interaction.response.send_message(f"✅ FID {fid} retiré de la whitelist avec succès.", ephemeral=True)
                 logger.info(f"FID {fid} removed from whitelist via button interaction by {interaction.user}")
 
@@ -2071,10 +4557,7 @@ class ClankerMonitor(commands.Cog):
         if volume_usd <= 0:
             await ctx.send("❌ Le seuil doit être strictement positif.")
             return
-        # Sauvegarder dans la base de données
-        self.db.set_volume_threshold(volume_usd)
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('bot_preferences', 'set', ('default_volume_threshold', str(volume_usd)))
         await ctx.send(f"✅ Seuil d'alerte global défini à {volume_usd} USD sur 24h pour tous les tokens.")
 
     @commands.command()
@@ -2084,12 +4567,22 @@ class ClankerMonitor(commands.Cog):
         if volume_usd <= 0:
             await ctx.send("❌ Le seuil doit être strictement positif.")
             return
-        # Sauvegarder dans la base de données
-        self.db.set_emergency_call_threshold(volume_usd)
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('bot_preferences', 'set', ('emergency_call_threshold', str(volume_usd)))
         await ctx.send(f"✅ Seuil d'appel d'urgence défini à {volume_usd} USD. Les appels Twilio se déclencheront pour les volumes >= {volume_usd} USD.")
 
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def setvolume5m(self, ctx, volume_usd: float):
+        """Définit le seuil d'alerte volume sur 5 minutes (en USD, 0 = désactivé)"""
+        if volume_usd < 0:
+            await ctx.send("❌ Le seuil doit être positif (0 pour désactiver).")
+            return
+        await self._write_through('bot_preferences', 'set', ('volume_5m_threshold', str(volume_usd)))
+        if volume_usd:
+            await ctx.send(f"✅ Seuil d'alerte défini à {volume_usd} USD sur 5 minutes.")
+        else:
+            await ctx.send("✅ Alerte volume 5 minutes désactivée.")
+
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def testpushover(self, ctx):
@@ -2136,81 +4629,59 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"❌ Erreur lors du test Twilio: {e}")
             logger.error(f"Twilio test failed: {e}")
 
-    @tasks.loop(seconds=10)
+    @tasks.loop(seconds=VOLUME_SCHEDULER_TICK)
     async def monitor_clanker_volumes(self):
-        logger.info("[VOLUME CHECK] Tick de surveillance volume Clanker")
         if not self.is_active or not self.channel:
             return
-        to_remove = []
         now = time.time()
-        for contract_address, info in list(self.tracked_clanker_tokens.items()):
-            age = now - info['first_seen']
-            if age > 3600:
-                to_remove.append(contract_address)
-                continue
-            if info.get('alerted'):
+        for contract_address in self.volume_scheduler.pop_expired(now):
+            self.tracked_clanker_tokens.pop(contract_address, None)
+            self.tracked_store.mark(contract_address)
+            self.swap_volume.unwatch(contract_address)
+            logger.info(f"[VOLUME TRACK] Token {contract_address} retiré de la surveillance après une heure")
+        # Seuls les tokens arrivés à échéance sont interrogés (les tokens déjà alertés ne sont plus reprogrammés)
+        pending = [
+            contract_address for contract_address in self.volume_scheduler.pop_due(now)
+            if contract_address in self.tracked_clanker_tokens
+            and not self.tracked_clanker_tokens[contract_address].get('alerted')
+        ]
+        if not pending:
+            return
+        # Appels Dexscreener groupés (30 tokens par requête, lots en parallèle)
+        started = time.perf_counter()
+        pairs_by_token = await self.volume_poller.fetch_pairs(pending)
+        logger.info(f"[VOLUME CHECK] {len(pending)} token(s) interrogés en {(time.perf_counter() - started) * 1000:.0f} ms ({len(pairs_by_token)} avec paire, {len(self.volume_scheduler)} suivi(s))")
+        for contract_address in pending:
+            pair = pairs_by_token.get(contract_address.lower())
+            if not pair:
+                self.volume_scheduler.reschedule(contract_address, time.time())
                 continue
-            # Appel Dexscreener
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{contract_address}"
+            dense = False
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    resp = await client.get(url)
-                    data = resp.json()
-                    pairs = data.get('pairs', [])
-                    if not pairs:
-                        continue
-                    pair = pairs[0]
-                    volume_24h = float(pair.get('volume', {}).get('h24', 0))
-                    symbol = pair.get('baseToken', {}).get('symbol', contract_address)
-                    name = pair.get('baseToken', {}).get('name', contract_address)
-                    threshold = self.default_volume_threshold
-                    logger.info(f"[VOLUME CHECK] {name} ({symbol}) {contract_address} - Volume 24h: {volume_24h} USD (seuil: {threshold})")
-                    if volume_24h >= threshold:
-                        embed = discord.Embed(
-                            title="🚨 Volume Clanker élevé!",
-                            description=f"Le token {name} ({symbol}) a dépassé {threshold}$ de volume sur 24h!",
-                            color=discord.Color.red(),
-                            timestamp=datetime.now(timezone.utc)
-                        )
-                        embed.add_field(name="Contract", value=f"`{contract_address}`", inline=False)
-                        embed.add_field(name="Volume (24h)", value=f"${volume_24h:,.2f}", inline=False)
-                        embed.add_field(name="Dexscreener", value=f"[Voir]({pair.get('url', 'https://dexscreener.com')})", inline=False)
-                        
-                        # Créer la vue avec les boutons
-                        view = discord.ui.View()
-                        
-                        # Bouton Basescan
-                        basescan_button = discord.ui.Button(
-                            style=discord.ButtonStyle.secondary,
-                            label="Basescan",
-                            url=f"https://basescan.org/token/{contract_address}"
-                        )
-                        view.add_item(basescan_button)
-                        
-                        # Bouton Clanker World
-                        clanker_button = discord.ui.Button(
-                            style=discord.ButtonStyle.primary,
-                            label="Lien Clanker World",
-                            url=f"https://www.clanker.world/clanker/{contract_address}"
-                        )
-                        view.add_item(clanker_button)
-                        
-                        await self.channel.send(embed=embed, view=view)
-                        
-                        # Send critical Pushover notification for volume alert
-                        await send_critical_volume_alert(name, symbol, contract_address, volume_24h, threshold)
-                        
-                        # Make emergency phone call if volume is above emergency threshold
-                        if volume_24h >= self.emergency_call_threshold:
-                            await make_emergency_call(name, symbol, volume_24h)
-                        
-                        self.tracked_clanker_tokens[contract_address]['alerted'] = True
-                        logger.info(f"[VOLUME ALERT] Alerte volume envoyée pour {contract_address}")
+                volume_24h = float(pair.get('volume', {}).get('h24', 0))
+                symbol = pair.get('baseToken', {}).get('symbol', contract_address)
+                name = pair.get('baseToken', {}).get('name', contract_address)
+                threshold = self.default_volume_threshold
+                logger.info(f"[VOLUME CHECK] {name} ({symbol}) {contract_address} - Volume 24h: {volume_24h} USD (seuil: {threshold})")
+                if volume_24h >= threshold:
+                    await self._send_volume_alert(contract_address, name, symbol, volume_24h, pair.get('url', 'https://dexscreener.com'))
+                dense = volume_24h >= threshold * VOLUME_SPIKE_FRACTION
+                # Seuil 5 min pour les tokens sans pool suivie on-chain (sinon évalué à chaque swap)
+                volume_5m = float(pair.get('volume', {}).get('m5', 0))
+                info = self.tracked_clanker_tokens[contract_address]
+                if (not info.get('alerted_5m') and not self.swap_volume.is_watching(contract_address)
+                        and 0 < self.volume_5m_threshold <= volume_5m):
+                    self._flag_tracked_token(contract_address, 'alerted_5m')
+                    await self._send_velocity_alert(
+                        contract_address, name, symbol,
+                        {'1m': 0.0, '5m': volume_5m, '1h': float(pair.get('volume', {}).get('h1', 0))},
+                        f"Le token {name} ({symbol}) a dépassé {self.volume_5m_threshold:g}$ de volume sur 5 minutes!"
+                    )
             except Exception as e:
                 logger.error(f"[VOLUME ERROR] Erreur lors de la vérification du volume Dexscreener pour {contract_address}: {e}")
-        for contract_address in to_remove:
-            del self.tracked_clanker_tokens[contract_address]
-            logger.info(f"[VOLUME TRACK] Token {contract_address} retiré de la surveillance après une heure")
+            info = self.tracked_clanker_tokens.get(contract_address)
+            if info and not info.get('alerted'):
+                self.volume_scheduler.reschedule(contract_address, time.time(), dense=dense)
 
     @monitor_clanker_volumes.before_loop
     async def before_monitor_clanker_volumes(self):
@@ -2218,828 +4689,607 @@ class ClankerMonitor(commands.Cog):
         if not self.channel:
             self.channel = self.bot.get_channel(CHANNEL_ID)
 
-    async def listen_onchain_clanker(self):
-        await self.bot.wait_until_ready()
-        if not self.channel:
-            self.channel = self.bot.get_channel(CHANNEL_ID)
-        channel = self.channel
-        if not channel:
-            logger.error("Could not find channel for Clanker notifications")
+    async def _send_volume_alert(self, contract_address: str, name: str, symbol: str, volume_24h: float,
+                                 dexscreener_url: str, source: str = "Dexscreener"):
+        """Alerte volume (Discord, Pushover, appel d'urgence) ; une seule fois par token suivi"""
+        info = self.tracked_clanker_tokens.get(contract_address)
+        if not info or info.get('alerted') or not self.channel:
             return
+        # Marqué avant les envois : Dexscreener et le flux on-chain peuvent franchir le seuil en même temps
+        self._flag_tracked_token(contract_address, 'alerted')
+        threshold = self.default_volume_threshold
+        embed = discord.Embed(
+            title="🚨 Volume Clanker élevé!",
+            description=f"Le token {name} ({symbol}) a dépassé {threshold}$ de volume sur 24h!",
+            color=discord.Color.red(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name="Contract", value=f"`{contract_address}`", inline=False)
+        embed.add_field(name="Volume (24h)", value=f"${volume_24h:,.2f}", inline=False)
+        embed.add_field(name="Source", value=source, inline=True)
+        embed.add_field(name="Dexscreener", value=f"[Voir]({dexscreener_url})", inline=False)
+        
+        # Créer la vue avec les boutons
+        view = discord.ui.View()
+        
+        # Bouton Basescan
+        basescan_button = discord.ui.Button(
+            style=discord.ButtonStyle.secondary,
+            label="Basescan",
+            url=f"https://basescan.org/token/{contract_address}"
+        )
+        view.add_item(basescan_button)
+        
+        # Bouton Clanker World
+        clanker_button = discord.ui.Button(
+            style=discord.ButtonStyle.primary,
+            label="Lien Clanker World",
+            url=f"https://www.clanker.world/clanker/{contract_address}"
+        )
+        view.add_item(clanker_button)
+        
+        await self.channel.send(embed=embed, view=view)
+        
+        # Send critical Pushover notification for volume alert
+        await send_critical_volume_alert(name, symbol, contract_address, volume_24h, threshold)
+        
+        # Make emergency phone call if volume is above emergency threshold
+        if volume_24h >= self.emergency_call_threshold:
+            await make_emergency_call(name, symbol, volume_24h)
+        
+        logger.info(f"[VOLUME ALERT] Alerte volume ({source}) envoyée pour {contract_address}")
 
-        while True:  # Boucle principale de reconnexion
-            try:
-                # Création du filtre d'event TokenCreated
-                event_filter = self.clanker_factory.events.TokenCreated.create_filter(fromBlock='latest')
-                logger.info("Started on-chain Clanker event listener")
-
-                # Récupération du SnipeMonitor pour accès aux snipes
-                snipe_monitor = self.bot.get_cog('SnipeMonitor')
-
-                while True:  # Boucle de lecture des événements
-                    try:
-                        for event in event_filter.get_new_entries():
-                            token_address = event['args']['tokenAddress']
-                            tx_hash = event['transactionHash']
-                            tx = self.w3_ws.eth.get_transaction(tx_hash)
-                            # Décodage des input data
-                            try:
-                                func_obj, func_args = self.clanker_factory.decode_function_input(tx['input'])
-                                token_config = func_args['deploymentConfig']['tokenConfig']
-                                name = token_config['name']
-                                symbol = token_config['symbol']
-                                image = token_config['image']
-                                metadata = token_config['metadata']
-                                context = token_config['context']
-                                # Extraction du FID depuis le context (JSON)
-                                fid = None
-                                try:
-                                    context_json = json.loads(context)
-                                    fid = str(context_json.get('id'))
-                                except Exception:
-                                    pass
-
-                                # Vérifier si l'adresse du créateur est trackée (PRIORITÉ ABSOLUE)
-                                creator_address = None
-                                is_tracked_address = False
-                                try:
-                                    # Extraire l'adresse du créateur depuis l'événement V3
-                                    if 'creatorAdmin' in event['args']:
-                                        creator_address = event['args']['creatorAdmin']
-                                    elif 'msgSender' in event['args']:
-                                        creator_address = event['args']['msgSender']
-                                    
-                                    if creator_address and creator_address in self.tracked_addresses:
-                                        is_tracked_address = True
-                                        logger.info(f"Adresse trackée V3 détectée : {creator_address} a déployé {name} ({symbol}) {token_address}")
-                                        
-                                        # Envoyer l'alerte spéciale verte pour les adresses trackées
-                                        embed = discord.Embed(
-                                            title="🎯 Clanker Adresse Trackée",
-                                            description=f"Une adresse que vous surveillez a déployé un nouveau clanker !",
-                                            color=discord.Color.green(),
-                                            timestamp=datetime.now(timezone.utc)
-                                        )
-                                        embed.add_field(name="Nom", value=name, inline=True)
-                                        embed.add_field(name="Symbole", value=symbol, inline=True)
-                                        embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
-                                        embed.add_field(name="Adresse Trackée", value=f"`{creator_address}`", inline=False)
-                                        embed.add_field(name="FID", value=fid if fid else "Non spécifié", inline=True)
-                                        
-                                        if image:
-                                            embed.set_thumbnail(url=image)
-                                        
-                                        # Créer la vue avec les boutons
-                                        view = discord.ui.View()
-                                        
-                                        # Bouton Basescan
-                                        basescan_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.secondary,
-                                            label="Basescan",
-                                            url=f"https://basescan.org/token/{token_address}"
-                                        )
-                                        view.add_item(basescan_button)
-                                        
-                                        # Bouton Clanker World
-                                        clanker_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.primary,
-                                            label="Lien Clanker World",
-                                            url=f"https://www.clanker.world/clanker/{token_address}"
-                                        )
-                                        view.add_item(clanker_button)
-                                        
-                                        await channel.send(embed=embed, view=view)
-                                        logger.info(f"On-chain Clanker tracked address alert sent for {name} ({symbol}) {token_address} by {creator_address}")
-                                        
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token tracké {token_address.lower()} à la surveillance volume (on-chain)")
-                                        continue  # Skip le reste du traitement normal
-                                        
-                                except Exception as e:
-                                    logger.error(f"Erreur lors de l'extraction de l'adresse créateur V3: {e}")
-                                
-                                # --- Filtrage banlist/whitelist ---
-                                if fid:
-                                    if fid in self.banned_fids:
-                                        logger.info(f"On-chain alert ignorée : FID {fid} banni.")
-                                        continue
-                                    if self.premium_only and fid not in self.whitelisted_fids:
-                                        logger.info(f"On-chain alert ignorée : FID {fid} non whitelisté en mode premium_only.")
-                                        continue
-                                # ---
-                                # Vérifier si le FID est whitelisté
-                                is_premium = fid and fid in self.whitelisted_fids
-                                
-                                # Si pas de FID, vérifier les mots-clés whitelistés
-                                if not fid:
-                                    # Vérifier si le token correspond à un mot-clé whitelisté
-                                    keyword_match = self._check_keyword_match(name, symbol)
-                                    if keyword_match:
-                                        logger.info(f"Token sans FID mais avec mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Envoi d'alerte Discord")
-                                        # Envoyer l'alerte Discord pour les tokens avec mots-clés
-                                        embed = discord.Embed(
-                                            title="🔑 Nouveau Token Clanker (Mot-clé)",
-                                            description=f"Token détecté sans FID mais correspondant à un mot-clé whitelisté",
-                                            color=discord.Color.orange(),
-                                            timestamp=datetime.now(timezone.utc)
-                                        )
-                                        embed.add_field(name="Nom", value=name, inline=True)
-                                        embed.add_field(name="Symbole", value=symbol, inline=True)
-                                        embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
-                                        embed.add_field(name="Image", value=image if image else "Aucune", inline=False)
-                                        
-                                        # Créer la vue avec les boutons
-                                        view = discord.ui.View()
-                                        
-                                        # Bouton Basescan
-                                        basescan_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.secondary,
-                                            label="Basescan",
-                                            url=f"https://basescan.org/token/{token_address}"
-                                        )
-                                        view.add_item(basescan_button)
-                                        
-                                        # Bouton Clanker World
-                                        clanker_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.primary,
-                                            label="Lien Clanker World",
-                                            url=f"https://www.clanker.world/clanker/{token_address}"
-                                        )
-                                        view.add_item(clanker_button)
-                                        
-                                        await channel.send(embed=embed, view=view)
-                                        logger.info(f"On-chain Clanker alert sent for {name} ({symbol}) {token_address} (keyword match)")
-                                        
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token avec mot-clé {token_address.lower()} à la surveillance volume (on-chain)")
-                                    else:
-                                        logger.info(f"Token sans FID et sans mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Ajout à la surveillance volume uniquement")
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token sans FID {token_address.lower()} à la surveillance volume (on-chain)")
-                                    continue  # Skip le reste du traitement normal
-                                
-                                
-                                # Envoie l'alerte Discord
-                                embed = discord.Embed(
-                                    title="🥇 Nouveau Token Clanker Premium (on-chain)" if is_premium else "🆕 Nouveau Token Clanker (on-chain)",
-                                    color=discord.Color.gold() if is_premium else discord.Color.purple(),
-                                    timestamp=datetime.now(timezone.utc)
-                                )
-                                embed.add_field(name="Nom du Token", value=name, inline=True)
-                                embed.add_field(name="Ticker", value=symbol, inline=True)
-                                embed.add_field(name="Adresse", value=f"`{token_address}`", inline=False)
-                                # Ajout du lien Clanker.world
-                                clanker_link = f"https://www.clanker.world/clanker/{token_address}"
-                                embed.add_field(name="Lien Clanker", value=f"[Voir sur Clanker.world]({clanker_link})", inline=False)
-                                # Ajout du lien de la transaction de déploiement
-                                tx_link = f"https://basescan.org/tx/{tx_hash.hex()}"
-                                embed.add_field(name="Transaction", value=f"[Voir sur Basescan]({tx_link})", inline=False)
-                                if image:
-                                    embed.set_thumbnail(url=image)
-                                if fid:
-                                    embed.add_field(name="FID", value=f"{fid} 🥇" if is_premium else fid, inline=True)
-                                # Ajout des boutons Ban, Remove Whitelist et Photon
-                                view = discord.ui.View()
-                                if fid:
-                                    ban_button = discord.ui.Button(
-                                        style=discord.ButtonStyle.danger,
-                                        label="Ban",
-                                        custom_id=f"blacklist_{fid}"
-                                    )
-                                    view.add_item(ban_button)
-                                if is_premium:
-                                    remove_whitelist_button = discord.ui.Button(
-                                        style=discord.ButtonStyle.danger,
-                                        label="Remove Whitelist",
-                                        custom_id=f"removewhitelist_{fid}"
-                                    )
-                                    view.add_item(remove_whitelist_button)
-                                photon_button = discord.ui.Button(
-                                    style=discord.ButtonStyle.primary,
-                                    label="Voir sur Photon",
-                                    url=f"https://photon-base.tinyastro.io/en/lp/{token_address}"
-                                )
-                                view.add_item(photon_button)
-                                await channel.send(embed=embed, view=view)
-                                logger.info(f"On-chain Clanker alert sent for {name} ({symbol}) {token_address}")
-                                # Ajout à la surveillance volume
-                                self.tracked_clanker_tokens[token_address.lower()] = {
-                                    'first_seen': time.time(),
-                                    'alerted': False
-                                }
-                                logger.info(f"[VOLUME TRACK] Ajout du token {token_address.lower()} à la surveillance volume (on-chain)")
-                                # Déclenchement du snipe instantané si FID match
-                                if snipe_monitor and fid and fid in snipe_monitor.snipe_targets:
-                                    snipe = snipe_monitor.snipe_targets[fid]
-                                    if snipe['status'] == 'pending':
-                                        success = await snipe_monitor.send_buy_webhook(token_address, snipe['amount'], snipe['gas_fees'])
-                                        snipe['status'] = 'executed'
-                                        snipe_monitor.snipe_targets[fid] = snipe
-                                        snipe_channel = self.bot.get_channel(snipe['channel_id'])
-                                        if snipe_channel:
-                                            snipe_embed = discord.Embed(
-                                                title="🎯 Snipe Exécuté (on-chain instantané)",
-                                                description=f"Token Clanker trouvé pour le FID: `{fid}`",
-                                                color=discord.Color.blue()
-                                            )
-                                            snipe_embed.add_field(name="Adresse", value=token_address, inline=True)
-                                            snipe_embed.add_field(name="Montant", value=f"{snipe['amount']} ETH", inline=True)
-                                            snipe_embed.add_field(name="Gas Fees", value=f"{snipe['gas_fees']} ETH", inline=True)
-                                            snipe_embed.add_field(name="Status", value="✅ Webhook envoyé" if success else "❌ Webhook erreur", inline=True)
-                                            await snipe_channel.send(embed=snipe_embed)
-                                        logger.info(f"Snipe instantané exécuté pour FID {fid} sur {token_address} (webhook: {success})")
-                            except Exception as e:
-                                logger.error(f"Error decoding input data: {e}")
-                        await asyncio.sleep(2)
-                    except Exception as e:
-                        if "filter not found" in str(e):
-                            logger.warning("Filter expired, recreating...")
-                            break  # Sort de la boucle interne pour recréer le filtre
-                        else:
-                            logger.error(f"Error in on-chain Clanker event loop: {e}")
-                            await asyncio.sleep(5)
-            except Exception as e:
-                logger.error(f"Error creating event filter: {e}")
-                await asyncio.sleep(5)  # Attendre avant de réessayer de créer le filtre
+    async def _on_swap_volume(self, token: str, metrics: Dict[str, float]):
+        """Métriques on-chain d'un token après un swap : seuil 24h, seuil 5 min et accélération"""
+        info = self.tracked_clanker_tokens.get(token)
+        if not info or not self.is_active:
+            return
+        name = info.get('name') or token
+        symbol = info.get('symbol') or token
+        if metrics['1m'] >= VOLUME_VELOCITY_MIN_USD:
+            # Pic de volume : vérification Dexscreener immédiate (toutes pools confondues)
+            self.volume_scheduler.wake(token, time.time())
+        try:
+            if not info.get('alerted') and metrics['24h'] >= self.default_volume_threshold:
+                await self._send_volume_alert(
+                    token, name, symbol, metrics['24h'],
+                    f"https://dexscreener.com/base/{token}",
+                    source="On-chain (Swap)"
+                )
+            if not info.get('alerted_5m') and 0 < self.volume_5m_threshold <= metrics['5m']:
+                self._flag_tracked_token(token, 'alerted_5m')
+                await self._send_velocity_alert(
+                    token, name, symbol, metrics,
+                    f"Le token {name} ({symbol}) a dépassé {self.volume_5m_threshold:g}$ de volume sur 5 minutes!"
+                )
+            last, previous = metrics['1m'], metrics.get('prev_1m', 0.0)
+            if (not info.get('alerted_velocity') and previous > 0
+                    and last >= max(VOLUME_VELOCITY_MIN_USD, VOLUME_VELOCITY_RATIO * previous)):
+                self._flag_tracked_token(token, 'alerted_velocity')
+                await self._send_velocity_alert(
+                    token, name, symbol, metrics,
+                    f"Le volume de {name} ({symbol}) a été multiplié par {last / previous:.1f} en 60s!"
+                )
+        except Exception as e:
+            logger.error(f"[VOLUME ERROR] Erreur lors de l'alerte volume on-chain pour {token}: {e}")
 
-    async def listen_onchain_clanker_v4(self):
-        await self.bot.wait_until_ready()
+    @staticmethod
+    def _velocity_embed(contract_address: str, description: str, metrics: Dict[str, float]) -> tuple:
+        """Embed + boutons d'une alerte de volume court terme (5 min / accélération)"""
+        embed = discord.Embed(
+            title="🚨 Volume Clanker élevé!",
+            description=description,
+            color=discord.Color.red(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name="Contract", value=f"`{contract_address}`", inline=False)
+        embed.add_field(name="Volume (1min)", value=f"${metrics['1m']:,.2f}", inline=True)
+        embed.add_field(name="Minute précédente", value=f"${metrics.get('prev_1m', 0.0):,.2f}", inline=True)
+        embed.add_field(name="Volume (5min)", value=f"${metrics['5m']:,.2f}", inline=True)
+        embed.add_field(name="Volume (1h)", value=f"${metrics['1h']:,.2f}", inline=True)
+        embed.add_field(name="Dexscreener", value=f"[Voir](https://dexscreener.com/base/{contract_address})", inline=False)
+        return embed, ClankerMonitor._explorer_buttons(contract_address)
+
+    async def _send_velocity_alert(self, contract_address: str, name: str, symbol: str,
+                                   metrics: Dict[str, float], description: str):
         if not self.channel:
-            self.channel = self.bot.get_channel(CHANNEL_ID)
-        channel = self.channel
-        if not channel:
-            logger.error("Could not find channel for Clanker V4 notifications")
             return
-
-        while True:  # Boucle principale de reconnexion
-            try:
-                # Création du filtre d'event TokenCreated pour V4
-                event_filter = self.clanker_factory_v4.events.TokenCreated.create_filter(fromBlock='latest')
-                logger.info("Started on-chain Clanker V4 event listener")
-
-                # Récupération du SnipeMonitor pour accès aux snipes
-                snipe_monitor = self.bot.get_cog('SnipeMonitor')
-
-                while True:  # Boucle de lecture des événements
-                    try:
-                        for event in event_filter.get_new_entries():
-                            token_address = event['args']['tokenAddress']
-                            tx_hash = event['transactionHash']
-                            tx = self.w3_ws.eth.get_transaction(tx_hash)
-                            # Décodage des input data pour V4
-                            try:
-                                func_obj, func_args = self.clanker_factory_v4.decode_function_input(tx['input'])
-                                token_config = func_args['deploymentConfig']['tokenConfig']
-                                name = token_config['name']
-                                symbol = token_config['symbol']
-                                image = token_config['image']
-                                metadata = token_config['metadata']
-                                context = token_config['context']
-                                # Extraction du FID depuis le context (JSON)
-                                fid = None
-                                try:
-                                    context_json = json.loads(context)
-                                    fid = str(context_json.get('id'))
-                                except Exception:
-                                    pass
-
-                                # Vérifier si l'adresse du créateur est trackée (PRIORITÉ ABSOLUE)
-                                creator_address = None
-                                is_tracked_address = False
-                                try:
-                                    # Extraire l'adresse du créateur depuis l'événement V4
-                                    if 'tokenAdmin' in event['args']:
-                                        creator_address = event['args']['tokenAdmin']
-                                    elif 'msgSender' in event['args']:
-                                        creator_address = event['args']['msgSender']
-                                    
-                                    if creator_address and creator_address in self.tracked_addresses:
-                                        is_tracked_address = True
-                                        logger.info(f"Adresse trackée V4 détectée : {creator_address} a déployé {name} ({symbol}) {token_address}")
-                                        
-                                        # Envoyer l'alerte spéciale verte pour les adresses trackées V4
-                                        embed = discord.Embed(
-                                            title="🎯 Clanker Adresse Trackée (V4)",
-                                            description=f"Une adresse que vous surveillez a déployé un nouveau clanker V4 !",
-                                            color=discord.Color.green(),
-                                            timestamp=datetime.now(timezone.utc)
-                                        )
-                                        embed.add_field(name="Nom", value=name, inline=True)
-                                        embed.add_field(name="Symbole", value=symbol, inline=True)
-                                        embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
-                                        embed.add_field(name="Adresse Trackée", value=f"`{creator_address}`", inline=False)
-                                        embed.add_field(name="FID", value=fid if fid else "Non spécifié", inline=True)
-                                        
-                                        if image:
-                                            embed.set_thumbnail(url=image)
-                                        
-                                        # Créer la vue avec les boutons
-                                        view = discord.ui.View()
-                                        
-                                        # Bouton Basescan
-                                        basescan_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.secondary,
-                                            label="Basescan",
-                                            url=f"https://basescan.org/token/{token_address}"
-                                        )
-                                        view.add_item(basescan_button)
-                                        
-                                        # Bouton Clanker World
-                                        clanker_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.primary,
-                                            label="Lien Clanker World",
-                                            url=f"https://www.clanker.world/clanker/{token_address}"
-                                        )
-                                        view.add_item(clanker_button)
-                                        
-                                        await channel.send(embed=embed, view=view)
-                                        logger.info(f"On-chain Clanker V4 tracked address alert sent for {name} ({symbol}) {token_address} by {creator_address}")
-                                        
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token V4 tracké {token_address.lower()} à la surveillance volume (on-chain)")
-                                        continue  # Skip le reste du traitement normal
-                                        
-                                except Exception as e:
-                                    logger.error(f"Erreur lors de l'extraction de l'adresse créateur V4: {e}")
-                                
-                                # --- Filtrage banlist/whitelist ---
-                                if fid:
-                                    if fid in self.banned_fids:
-                                        logger.info(f"On-chain V4 alert ignorée : FID {fid} banni.")
-                                        continue
-                                    if self.premium_only and fid not in self.whitelisted_fids:
-                                        logger.info(f"On-chain V4 alert ignorée : FID {fid} non whitelisté en mode premium_only.")
-                                        continue
-                                # ---
-                                # Vérifier si le FID est whitelisté
-                                is_premium = fid and fid in self.whitelisted_fids
-                                
-                                # Si pas de FID, vérifier les mots-clés whitelistés
-                                if not fid:
-                                    # Vérifier si le token correspond à un mot-clé whitelisté
-                                    keyword_match = self._check_keyword_match(name, symbol)
-                                    if keyword_match:
-                                        logger.info(f"Token V4 sans FID mais avec mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Envoi d'alerte Discord")
-                                        # Envoyer l'alerte Discord pour les tokens avec mots-clés
-                                        embed = discord.Embed(
-                                            title="🔑 Nouveau Token Clanker V4 (Mot-clé)",
-                                            description=f"Token V4 détecté sans FID mais correspondant à un mot-clé whitelisté",
-                                            color=discord.Color.orange(),
-                                            timestamp=datetime.now(timezone.utc)
-                                        )
-                                        embed.add_field(name="Nom", value=name, inline=True)
-                                        embed.add_field(name="Symbole", value=symbol, inline=True)
-                                        embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
-                                        embed.add_field(name="Image", value=image if image else "Aucune", inline=False)
-                                        
-                                        # Créer la vue avec les boutons
-                                        view = discord.ui.View()
-                                        
-                                        # Bouton Basescan
-                                        basescan_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.secondary,
-                                            label="Basescan",
-                                            url=f"https://basescan.org/token/{token_address}"
-                                        )
-                                        view.add_item(basescan_button)
-                                        
-                                        # Bouton Clanker World
-                                        clanker_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.primary,
-                                            label="Lien Clanker World",
-                                            url=f"https://www.clanker.world/clanker/{token_address}"
-                                        )
-                                        view.add_item(clanker_button)
-                                        
-                                        await channel.send(embed=embed, view=view)
-                                        logger.info(f"On-chain Clanker V4 alert sent for {name} ({symbol}) {token_address} (keyword match)")
-                                        
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token V4 avec mot-clé {token_address.lower()} à la surveillance volume (on-chain)")
-                                    else:
-                                        logger.info(f"Token V4 sans FID et sans mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Ajout à la surveillance volume uniquement")
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token V4 sans FID {token_address.lower()} à la surveillance volume (on-chain)")
-                                    continue  # Skip le reste du traitement normal
-                                
-                                # Vérifier si l'adresse du créateur est trackée
-                                creator_address = None
-                                is_tracked_address = False
-                                try:
-                                    # Extraire l'adresse du créateur depuis l'événement V4
-                                    if 'tokenAdmin' in event['args']:
-                                        creator_address = event['args']['tokenAdmin']
-                                    elif 'msgSender' in event['args']:
-                                        creator_address = event['args']['msgSender']
-                                    
-                                    if creator_address and creator_address in self.tracked_addresses:
-                                        is_tracked_address = True
-                                        logger.info(f"Adresse trackée V4 détectée : {creator_address} a déployé {name} ({symbol}) {token_address}")
-                                        
-                                        # Envoyer l'alerte spéciale verte pour les adresses trackées V4
-                                        embed = discord.Embed(
-                                            title="🎯 Clanker Adresse Trackée (V4)",
-                                            description=f"Une adresse que vous surveillez a déployé un nouveau clanker V4 !",
-                                            color=discord.Color.green(),
-                                            timestamp=datetime.now(timezone.utc)
-                                        )
-                                        embed.add_field(name="Nom", value=name, inline=True)
-                                        embed.add_field(name="Symbole", value=symbol, inline=True)
-                                        embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
-                                        embed.add_field(name="Adresse Trackée", value=f"`{creator_address}`", inline=False)
-                                        embed.add_field(name="FID", value=fid if fid else "Non spécifié", inline=True)
-                                        
-                                        if image:
-                                            embed.set_thumbnail(url=image)
-                                        
-                                        # Créer la vue avec les boutons
-                                        view = discord.ui.View()
-                                        
-                                        # Bouton Basescan
-                                        basescan_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.secondary,
-                                            label="Basescan",
-                                            url=f"https://basescan.org/token/{token_address}"
-                                        )
-                                        view.add_item(basescan_button)
-                                        
-                                        # Bouton Clanker World
-                                        clanker_button = discord.ui.Button(
-                                            style=discord.ButtonStyle.primary,
-                                            label="Lien Clanker World",
-                                            url=f"https://www.clanker.world/clanker/{token_address}"
-                                        )
-                                        view.add_item(clanker_button)
-                                        
-                                        await channel.send(embed=embed, view=view)
-                                        logger.info(f"On-chain Clanker V4 tracked address alert sent for {name} ({symbol}) {token_address} by {creator_address}")
-                                        
-                                        # Ajout à la surveillance volume
-                                        self.tracked_clanker_tokens[token_address.lower()] = {
-                                            'first_seen': time.time(),
-                                            'alerted': False
-                                        }
-                                        logger.info(f"[VOLUME TRACK] Ajout du token V4 tracké {token_address.lower()} à la surveillance volume (on-chain)")
-                                        continue  # Skip le reste du traitement normal
-                                        
-                                except Exception as e:
-                                    logger.error(f"Erreur lors de l'extraction de l'adresse créateur V4: {e}")
-                                
-                                # Envoie l'alerte Discord
-                                embed = discord.Embed(
-                                    title="🥇 Nouveau Token Clanker V4 Premium (on-chain)" if is_premium else "🆕 Nouveau Token Clanker V4 (on-chain)",
-                                    color=discord.Color.gold() if is_premium else discord.Color.purple(),
-                                    timestamp=datetime.now(timezone.utc)
-                                )
-                                embed.add_field(name="Nom du Token", value=name, inline=True)
-                                embed.add_field(name="Ticker", value=symbol, inline=True)
-                                embed.add_field(name="Adresse", value=f"`{token_address}`", inline=False)
-                                # Ajout du lien Clanker.world
-                                clanker_link = f"https://www.clanker.world/clanker/{token_address}"
-                                embed.add_field(name="Lien Clanker", value=f"[Voir sur Clanker.world]({clanker_link})", inline=False)
-                                # Ajout du lien de la transaction de déploiement
-                                tx_link = f"https://basescan.org/tx/{tx_hash.hex()}"
-                                embed.add_field(name="Transaction", value=f"[Voir sur Basescan]({tx_link})", inline=False)
-                                if image:
-                                    embed.set_thumbnail(url=image)
-                                if fid:
-                                    embed.add_field(name="FID", value=f"{fid} 🥇" if is_premium else fid, inline=True)
-                                # Ajout des boutons Ban, Remove Whitelist et Photon
-                                view = discord.ui.View()
-                                if fid:
-                                    ban_button = discord.ui.Button(
-                                        style=discord.ButtonStyle.danger,
-                                        label="Ban",
-                                        custom_id=f"blacklist_{fid}"
-                                    )
-                                    view.add_item(ban_button)
-                                if is_premium:
-                                    remove_whitelist_button = discord.ui.Button(
-                                        style=discord.ButtonStyle.danger,
-                                        label="Remove Whitelist",
-                                        custom_id=f"removewhitelist_{fid}"
-                                    )
-                                    view.add_item(remove_whitelist_button)
-                                photon_button = discord.ui.Button(
-                                    style=discord.ButtonStyle.primary,
-                                    label="Voir sur DexScreener",
-                                    url=f"https://dexscreener.com/base/{token_address}"
-                                )
-                                view.add_item(photon_button)
-                                await channel.send(embed=embed, view=view)
-                                logger.info(f"On-chain Clanker V4 alert sent for {name} ({symbol}) {token_address}")
-                                # Ajout à la surveillance volume
-                                self.tracked_clanker_tokens[token_address.lower()] = {
-                                    'first_seen': time.time(),
-                                    'alerted': False
-                                }
-                                logger.info(f"[VOLUME TRACK] Ajout du token V4 {token_address.lower()} à la surveillance volume (on-chain)")
-                                # Déclenchement du snipe instantané si FID match
-                                if snipe_monitor and fid and fid in snipe_monitor.snipe_targets:
-                                    snipe = snipe_monitor.snipe_targets[fid]
-                                    if snipe['status'] == 'pending':
-                                        success = await snipe_monitor.send_buy_webhook(token_address, snipe['amount'], snipe['gas_fees'])
-                                        snipe['status'] = 'executed'
-                                        snipe_monitor.snipe_targets[fid] = snipe
-                                        snipe_channel = self.bot.get_channel(snipe['channel_id'])
-                                        if snipe_channel:
-                                            snipe_embed = discord.Embed(
-                                                title="🎯 Snipe Exécuté (on-chain V4 instantané)",
-                                                description=f"Token Clanker V4 trouvé pour le FID: `{fid}`",
-                                                color=discord.Color.blue()
-                                            )
-                                            snipe_embed.add_field(name="Adresse", value=token_address, inline=True)
-                                            snipe_embed.add_field(name="Montant", value=f"{snipe['amount']} ETH", inline=True)
-                                            snipe_embed.add_field(name="Gas Fees", value=f"{snipe['gas_fees']} ETH", inline=True)
-                                            snipe_embed.add_field(name="Status", value="✅ Webhook envoyé" if success else "❌ Webhook erreur", inline=True)
-                                            await snipe_channel.send(embed=snipe_embed)
-                                        logger.info(f"Snipe instantané V4 exécuté pour FID {fid} sur {token_address} (webhook: {success})")
-                            except Exception as e:
-                                logger.error(f"Error decoding V4 input data: {e}")
-                        await asyncio.sleep(2)
-                    except Exception as e:
-                        if "filter not found" in str(e):
-                            logger.warning("V4 Filter expired, recreating...")
-                            break  # Sort de la boucle interne pour recréer le filtre
-                        else:
-                            logger.error(f"Error in on-chain Clanker V4 event loop: {e}")
-                            await asyncio.sleep(5)
-            except Exception as e:
-                logger.error(f"Error creating V4 event filter: {e}")
-                await asyncio.sleep(5)  # Attendre avant de réessayer de créer le filtre
-
-    async def listen_fey_factory(self):
+        embed, view = self._velocity_embed(contract_address, description, metrics)
+        await self.channel.send(embed=embed, view=view)
+        await send_critical_volume_alert(name, symbol, contract_address, metrics['5m'], self.volume_5m_threshold)
+        logger.info(f"[VOLUME ALERT] Alerte volume court terme envoyée pour {contract_address}: {description}")
+
+    async def _watch_swaps(self, token_address: str, event):
+        """Inscrit la pool du token au flux Swap : poolId v4 depuis l'event, pool v3 via la factory Uniswap"""
+        args = event['args']
+        try:
+            if args.get('poolId'):
+                self._watch_pool(token_address, args.get('pairedToken') or config.WETH_ADDRESS, pool_id=Web3.to_hex(args['poolId']))
+                return
+            # Clanker V3 : pool token/WETH au fee fixe de la factory
+            if self.clanker_v3_pool_fee is None:
+                self.clanker_v3_pool_fee = await self.clanker_factory.functions.POOL_FEE().call()
+            pool = await self.uniswap_v3_factory.functions.getPool(
+                Web3.to_checksum_address(token_address),
+                Web3.to_checksum_address(config.WETH_ADDRESS),
+                self.clanker_v3_pool_fee
+            ).call()
+            if pool != ZERO_ADDRESS:
+                self._watch_pool(token_address, config.WETH_ADDRESS, pool=pool)
+        except Exception as e:
+            logger.error(f"[SWAP VOLUME] Impossible de résoudre la pool de {token_address}: {e}")
+
+    def _watch_pool(self, token_address: str, quote_token: str, pool: Optional[str] = None, pool_id: Optional[str] = None):
+        """Suit la pool au flux Swap et la mémorise avec le token (pour la reprendre après un redémarrage)"""
+        info = self.tracked_clanker_tokens.get(token_address.lower())
+        if info is not None:
+            info.update({'quote_token': quote_token, 'pool': pool, 'pool_id': pool_id})
+            self.tracked_store.mark(token_address.lower())
+        self.swap_volume.watch(token_address, quote_token, pool=pool, pool_id=pool_id)
+
+    def _flag_tracked_token(self, token: str, flag: str):
+        """Marque une alerte comme envoyée pour un token suivi (persisté : pas de double alerte après redémarrage)"""
+        info = self.tracked_clanker_tokens.get(token)
+        if info is not None:
+            info[flag] = True
+            self.tracked_store.mark(token)
+
+    async def restore_tracked_tokens(self):
+        """Reprend la surveillance volume des tokens suivis avant l'arrêt, avec leur durée restante"""
+        try:
+            restored = await self.tracked_store.load(VOLUME_TRACK_SECONDS)
+        except Exception as e:
+            logger.error(f"[VOLUME TRACK] Impossible de relire les tokens suivis: {e}")
+            return
+        now = time.time()
+        for token, info in restored:
+            self.tracked_clanker_tokens[token] = info
+            # Échéances étalées selon l'âge : pas de rafale de requêtes Dexscreener au démarrage
+            age = now - info['first_seen']
+            self.volume_scheduler.add(token, info['first_seen'], next_check=now + self.volume_scheduler.interval(age) * (0.1 + 0.9 * random.random()))
+            if info.get('pool') or info.get('pool_id'):
+                self.swap_volume.watch(token, info.get('quote_token'), pool=info.get('pool'), pool_id=info.get('pool_id'))
+        if restored:
+            logger.info(f"[VOLUME TRACK] {len(restored)} token(s) repris sous surveillance volume ({sum(1 for _, info in restored if info.get('alerted'))} déjà alerté(s))")
+
+    async def watch_swap_volumes(self):
+        """Écoute des Swap des pools suivies pour le volume on-chain."""
         await self.bot.wait_until_ready()
         if not self.channel:
             self.channel = self.bot.get_channel(CHANNEL_ID)
-        channel = self.channel
-        if not channel:
-            logger.error("Could not find channel for Fey notifications")
+        logger.info("Started on-chain swap volume subscription")
+        await self.swap_volume.run()
+
+    async def _handle_clanker_v3_event(self, event, channel: discord.TextChannel):
+        """Traite un event TokenCreated de la factory Clanker V3."""
+        token_address = event['args']['tokenAddress']
+        if not self.seen_tokens.add(token_address):
+            logger.info(f"Token {token_address} déjà traité, event V3 ignoré")
             return
+        # Décodage depuis le log (le calldata n'est récupéré que pour les champs absents de l'event V3)
+        try:
+            token_config = await self._decode_token_config(self.clanker_factory, event, CLANKER_V3_EVENT_FIELDS)
+            deployment = Deployment.from_token_config(
+                "clanker_v3",
+                token_address,
+                token_config,
+                creator_address=event['args'].get('creatorAdmin') or event['args'].get('msgSender'),
+                tx_hash=event['transactionHash']
+            )
+            await self._handle_deployment(deployment, event, channel)
+        except Exception as e:
+            logger.error(f"Error decoding input data: {e}")
 
-        while True:
-            try:
-                event_filter = self.fey_factory.events.TokenCreated.create_filter(fromBlock="latest")
-                logger.info("Started Fey factory event listener")
-
-                while True:
-                    try:
-                        for event in event_filter.get_new_entries():
-                            await self._handle_fey_token_created(event, channel)
-                        await asyncio.sleep(2)
-                    except Exception as e:
-                        if "filter not found" in str(e).lower():
-                            logger.warning("Fey factory filter expired, recreating...")
-                            break
-                        logger.error(f"Error in Fey factory event loop: {e}")
-                        await asyncio.sleep(5)
-            except Exception as e:
-                logger.error(f"Error creating Fey factory event filter: {e}")
-                await asyncio.sleep(5)
+    async def _handle_clanker_v4_event(self, event, channel: discord.TextChannel):
+        """Traite un event TokenCreated de la factory Clanker V4."""
+        token_address = event['args']['tokenAddress']
+        if not self.seen_tokens.add(token_address):
+            logger.info(f"Token V4 {token_address} déjà traité, event ignoré")
+            return
+        # Décodage depuis le log uniquement (l'event V4 porte name/symbol/image/metadata/context)
+        try:
+            token_config = await self._decode_token_config(self.clanker_factory_v4, event, CLANKER_V4_EVENT_FIELDS)
+            deployment = Deployment.from_token_config(
+                "clanker_v4",
+                token_address,
+                token_config,
+                creator_address=event['args'].get('tokenAdmin') or event['args'].get('msgSender'),
+                tx_hash=event['transactionHash']
+            )
+            await self._handle_deployment(deployment, event, channel)
+        except Exception as e:
+            logger.error(f"Error decoding V4 event data: {e}")
 
-    async def _handle_fey_token_created(self, event, channel: discord.TextChannel):
+    async def _handle_deployment(self, deployment: "Deployment", event, channel: discord.TextChannel,
+                                 dry_run: bool = False):
+        """Classe le déploiement, le traite selon le verdict puis l'inscrit au journal.
+        En dry_run (commandes de test), seule l'alerte est envoyée : ni journal ni compteurs."""
+        verdict, rule = self.classifier.classify(deployment)
         try:
-            args = event["args"]
-            token_address = Web3.to_checksum_address(args["tokenAddress"])
-            token_key = token_address.lower()
-            if token_key in self.seen_tokens:
-                logger.info(f"[FEY] Token {token_address} already processed, skipping duplicate event")
-                return
+            await self._alert_deployment(deployment, event, channel, verdict, rule, dry_run)
+        finally:
+            if not dry_run:
+                await self._journal_deployment(deployment, event, verdict, rule)
 
-            tx_hash = event["transactionHash"].hex()
-            msg_sender = Web3.to_checksum_address(args.get("msgSender", ZERO_ADDRESS))
-            token_admin_raw = args.get("tokenAdmin", ZERO_ADDRESS)
-            token_admin = (
-                Web3.to_checksum_address(token_admin_raw)
-                if token_admin_raw and token_admin_raw != ZERO_ADDRESS
-                else None
-            )
-            token_name = args.get("tokenName", "Inconnu")
-            token_symbol = args.get("tokenSymbol", "")
-            token_image = args.get("tokenImage") or None
-            token_metadata = args.get("tokenMetadata") or ""
-            token_context_raw = args.get("tokenContext") or ""
-            starting_tick = args.get("startingTick")
-            pool_hook_raw = args.get("poolHook", ZERO_ADDRESS)
-            pool_hook = (
-                Web3.to_checksum_address(pool_hook_raw)
-                if pool_hook_raw and pool_hook_raw != ZERO_ADDRESS
-                else None
-            )
-            pool_id_bytes = args.get("poolId")
-            pool_id = pool_id_bytes.hex() if pool_id_bytes else None
-            paired_token_raw = args.get("pairedToken", ZERO_ADDRESS)
-            paired_token = (
-                Web3.to_checksum_address(paired_token_raw)
-                if paired_token_raw and paired_token_raw != ZERO_ADDRESS
-                else None
-            )
-            locker_raw = args.get("locker", ZERO_ADDRESS)
-            locker = (
-                Web3.to_checksum_address(locker_raw)
-                if locker_raw and locker_raw != ZERO_ADDRESS
-                else None
-            )
-            mev_module_raw = args.get("mevModule", ZERO_ADDRESS)
-            mev_module = (
-                Web3.to_checksum_address(mev_module_raw)
-                if mev_module_raw and mev_module_raw != ZERO_ADDRESS
-                else None
+    async def seed_deploy_counters(self):
+        """Recharge les compteurs glissants avec les déploiements journalisés des dernières 24h"""
+        try:
+            since = time.time() - max(DEPLOY_RATE_WINDOWS.values())
+            rows = await self.db.run(self.db.get_deployment_activity_since, since)
+        except Exception as e:
+            logger.error(f"Error seeding deploy counters: {e}")
+            return
+        for fid, creator_address, seen_at in rows:
+            if fid:
+                self.fid_deploy_counter.add(fid, seen_at)
+            if creator_address:
+                self.creator_deploy_counter.add(creator_address.lower(), seen_at)
+        logger.info(f"Deploy counters seeded with {len(rows)} journaled deployments")
+
+    async def _count_deployment(self, deployment: "Deployment", seen_at: float):
+        """Met à jour les compteurs glissants (à la date du déploiement) et applique la règle d'auto-ban"""
+        if deployment.creator_address:
+            self.creator_deploy_counter.add(deployment.creator_address.lower(), seen_at)
+        fid = deployment.fid
+        if not fid:
+            return
+        counts = self.fid_deploy_counter.add(fid, seen_at)
+        threshold = int(self.auto_ban_threshold)
+        if threshold <= 0 or counts[AUTO_BAN_WINDOW] < threshold:
+            return
+        if fid in self.banned_fids or fid in self.whitelisted_fids:
+            return
+        await self._write_through('banned_fids', 'add', fid)
+        logger.warning(f"[SPAM] FID {fid} auto-banni : {counts[AUTO_BAN_WINDOW]} déploiements sur {AUTO_BAN_WINDOW} (seuil {threshold})")
+        if self.channel:
+            await self.channel.send(
+                f"⛔ FID {fid} banni automatiquement : {counts[AUTO_BAN_WINDOW]} déploiements sur {AUTO_BAN_WINDOW} "
+                f"(seuil {threshold}). Utilisez !unbanfid {fid} pour annuler."
             )
-            extensions_supply = args.get("extensionsSupply", 0)
-            extensions_raw = args.get("extensions", [])
-            extensions = [
-                Web3.to_checksum_address(ext)
-                for ext in extensions_raw
-                if ext and ext != ZERO_ADDRESS
-            ]
 
-            context_summary = None
-            if token_context_raw:
-                try:
-                    context_json = json.loads(token_context_raw)
-                    if isinstance(context_json, dict):
-                        summary_items = []
-                        for key in ("platform", "interface", "username", "id"):
-                            if key in context_json and context_json[key]:
-                                summary_items.append(f"{key}: {context_json[key]}")
-                        if summary_items:
-                            context_summary = ", ".join(summary_items)
-                except Exception:
-                    context_summary = None
+    async def _journal_deployment(self, deployment: "Deployment", event, verdict: str, rule: Optional[str]):
+        """Ajoute un déploiement au journal (latence mesurée depuis la réception du log, si live)"""
+        received_at = self.log_engine.log_received_at.get(LogSubscriptionEngine._log_key(event))
+        now = time.time()
+        seen_at = await self._deployment_time(event)
+        self.deployment_journal.record({
+            'launchpad': deployment.launchpad,
+            'block_number': event['blockNumber'],
+            'tx_hash': deployment.tx_hash,
+            'token_address': deployment.token_address,
+            'fid': deployment.fid,
+            'creator_address': deployment.creator_address,
+            'name': deployment.name,
+            'symbol': deployment.symbol,
+            'image': deployment.image,
+            'verdict': verdict,
+            'rule': rule,
+            'alert_latency_ms': (now - received_at) * 1000 if received_at else None,
+            'seen_at': seen_at,
+        })
+        await self._count_deployment(deployment, seen_at)
+
+    async def _alert_deployment(self, deployment: "Deployment", event, channel: discord.TextChannel, verdict: str,
+                                rule: Optional[str], dry_run: bool = False):
+        """Alerte Discord, suivi volume et snipe pour un déploiement, selon le verdict du classifieur.
+        En dry_run, l'alerte est envoyée directement, sans suivi volume, souscription Swap ni snipe."""
+        display = LAUNCHPAD_DISPLAY[deployment.launchpad]
+        label = display['label']
+        token_address = deployment.token_address
+        name, symbol, image, fid = deployment.name, deployment.symbol, deployment.image, deployment.fid
+
+        if verdict == "drop":
+            logger.info(f"On-chain {label} alert ignorée : FID {fid} ({rule}).")
+            return
+
+        def add_event_fields(embed: discord.Embed):
+            if display['event_fields']:
+                for field_name, value, inline in display['event_fields'](event['args']):
+                    embed.add_field(name=field_name, value=value, inline=inline)
 
-            def format_address(addr: Optional[str], label: Optional[str] = None) -> str:
-                if not addr:
-                    return "Aucun"
-                base = f"[{addr}](https://basescan.org/address/{addr})"
-                if label:
-                    return f"{base} ({label})"
-                return base
+        async def send_and_track(embed: discord.Embed, view: discord.ui.View, description: str):
+            if dry_run:
+                await channel.send(embed=embed, view=view)
+                return
+            # Un échec d'envoi Discord n'empêche pas la surveillance volume
+            try:
+                await self._send_onchain_alert(event, verdict, channel, token_address, embed, view)
+            finally:
+                self._track_volume(token_address, description, deployment, event)
 
+        if verdict == "tracked":
+            logger.info(f"Adresse trackée {label} détectée : {deployment.creator_address} a déployé {name} ({symbol}) {token_address}")
+            # Alerte spéciale verte pour les adresses trackées (PRIORITÉ ABSOLUE)
             embed = discord.Embed(
-                title="🪙 Nouveau Token déployé via Fey",
-                description="La factory Fey a déployé un nouveau token sur Base.",
-                color=discord.Color.blurple(),
+                title=f"🎯 {label} Adresse Trackée",
+                description=f"Une adresse que vous surveillez a déployé un nouveau {label.lower()} !",
+                color=discord.Color.green(),
                 timestamp=datetime.now(timezone.utc)
             )
-            embed.add_field(
-                name="Token",
-                value=f"**{token_name} ({token_symbol})**",
-                inline=False
-            )
-            embed.add_field(
-                name="Contrat",
-                value=f"[{token_address}](https://basescan.org/address/{token_address})",
-                inline=False
-            )
-            embed.add_field(name="Déployeur (msgSender)", value=f"`{msg_sender}`", inline=True)
-            embed.add_field(
-                name="Admin",
-                value=f"`{token_admin}`" if token_admin else "Non communiqué",
-                inline=True
-            )
-            embed.add_field(
-                name="Tick initial",
-                value=str(starting_tick) if starting_tick is not None else "N/A",
-                inline=True
-            )
+            embed.add_field(name="Nom", value=name, inline=True)
+            embed.add_field(name="Symbole", value=symbol, inline=True)
+            embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
+            embed.add_field(name="Adresse Trackée", value=f"`{deployment.creator_address}`", inline=False)
+            embed.add_field(name="FID", value=fid if fid else "Non spécifié", inline=True)
+            add_event_fields(embed)
+            if image:
+                embed.set_thumbnail(url=image)
+            view = self._explorer_buttons(token_address)
+            await send_and_track(embed, view, f"tracké {label}")
+            logger.info(f"On-chain {label} tracked address alert sent for {name} ({symbol}) {token_address} by {deployment.creator_address}")
+            return
 
-            hook_label = None
-            if pool_hook and pool_hook.lower() == FEY_HOOK_STATIC_FEE_ADDRESS.lower():
-                hook_label = "FeyHookStaticFeeV2"
-            embed.add_field(
-                name="Hook",
-                value=format_address(pool_hook, hook_label) if pool_hook else "Aucun (deployTokenZeroSupply ?)",
-                inline=False
-            )
-            embed.add_field(
-                name="Token pairé",
-                value=format_address(paired_token),
-                inline=False
-            )
-            embed.add_field(
-                name="Locker",
-                value=format_address(locker),
-                inline=True
-            )
-            embed.add_field(
-                name="Module MEV",
-                value=format_address(mev_module),
-                inline=True
-            )
-            embed.add_field(
-                name="Supply extensions",
-                value=f"{extensions_supply:,}",
-                inline=True
+        if verdict == "keyword":
+            logger.info(f"Token {label} sans FID mais avec mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Envoi d'alerte Discord")
+            embed = discord.Embed(
+                title=f"🔑 Nouveau Token {label} (Mot-clé)",
+                description=f"Token {label} détecté sans FID mais correspondant à un mot-clé whitelisté",
+                color=discord.Color.orange(),
+                timestamp=datetime.now(timezone.utc)
             )
+            embed.add_field(name="Nom", value=name, inline=True)
+            embed.add_field(name="Symbole", value=symbol, inline=True)
+            embed.add_field(name="Contract", value=f"`{token_address}`", inline=False)
+            embed.add_field(name="Image", value=image if image else "Aucune", inline=False)
+            matched_keywords = self.keyword_matcher.find_all(name, symbol)
+            embed.add_field(name="Mot(s)-clé(s)", value=", ".join(sorted(matched_keywords)) or "N/A", inline=False)
+            add_event_fields(embed)
+            view = self._explorer_buttons(token_address)
+            await send_and_track(embed, view, f"{label} avec mot-clé")
+            logger.info(f"On-chain {label} alert sent for {name} ({symbol}) {token_address} (keyword match)")
+            return
 
-            if extensions:
-                if len(extensions) > 5:
-                    display_ext = extensions[:5]
-                    remainder = len(extensions) - 5
-                    ext_value = "\n".join(
-                        f"[{ext}](https://basescan.org/address/{ext})" for ext in display_ext
-                    )
-                    ext_value += f"\n… +{remainder} autres"
-                else:
-                    ext_value = "\n".join(
-                        f"[{ext}](https://basescan.org/address/{ext})" for ext in extensions
-                    )
-                embed.add_field(name="Extensions", value=ext_value, inline=False)
-            else:
-                embed.add_field(name="Extensions", value="Aucune", inline=False)
-
-            if pool_id:
-                embed.add_field(name="PoolId", value=f"`0x{pool_id}`", inline=False)
+        if not fid:
+            logger.info(f"Token {label} sans FID et sans mot-clé whitelisté détecté : {name} ({symbol}) {token_address} - Ajout à la surveillance volume uniquement")
+            if not dry_run:
+                self._record_onchain_alert(event, token_address)
+                self._track_volume(token_address, f"{label} sans FID", deployment, event)
+            return
 
-            if token_metadata:
-                embed.add_field(
-                    name="Metadata",
-                    value=token_metadata[:256] + ("…" if len(token_metadata) > 256 else ""),
-                    inline=False
-                )
-            if context_summary:
-                embed.add_field(name="Context", value=context_summary, inline=False)
-            elif token_context_raw:
-                embed.add_field(
-                    name="Context (raw)",
-                    value=token_context_raw[:256] + ("…" if len(token_context_raw) > 256 else ""),
-                    inline=False
-                )
+        # Alerte standard (premium ou plain)
+        is_premium = verdict == "premium"
+        embed = discord.Embed(
+            title=f"🥇 Nouveau Token {label} Premium (on-chain)" if is_premium else f"🆕 Nouveau Token {label} (on-chain)",
+            color=discord.Color.gold() if is_premium else discord.Color.purple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name="Nom du Token", value=name, inline=True)
+        embed.add_field(name="Ticker", value=symbol, inline=True)
+        embed.add_field(name="Adresse", value=f"`{token_address}`", inline=False)
+        # Ajout du lien vers la page du token sur le launchpad (Clanker.world)
+        if display['project_link']:
+            link_name, link_text, link_url = display['project_link']
+            embed.add_field(name=link_name, value=f"[{link_text}]({link_url.format(token=token_address)})", inline=False)
+        # Ajout du lien de la transaction de déploiement
+        tx_link = f"https://basescan.org/tx/{deployment.tx_hash}"
+        embed.add_field(name="Transaction", value=f"[Voir sur Basescan]({tx_link})", inline=False)
+        if image:
+            embed.set_thumbnail(url=image)
+        embed.add_field(name="FID", value=f"{fid} 🥇" if is_premium else fid, inline=True)
+        add_event_fields(embed)
+        # Ajout des boutons Ban, Remove Whitelist et marché
+        view = discord.ui.View()
+        view.add_item(discord.ui.Button(
+            style=discord.ButtonStyle.danger,
+            label="Ban",
+            custom_id=f"blacklist_{fid}"
+        ))
+        if is_premium:
+            view.add_item(discord.ui.Button(
+                style=discord.ButtonStyle.danger,
+                label="Remove Whitelist",
+                custom_id=f"removewhitelist_{fid}"
+            ))
+        market_label, market_url = display['market_button']
+        view.add_item(discord.ui.Button(
+            style=discord.ButtonStyle.primary,
+            label=market_label,
+            url=market_url.format(token=token_address)
+        ))
+        await send_and_track(embed, view, label)
+        logger.info(f"On-chain {label} alert sent for {name} ({symbol}) {token_address}")
+        if dry_run:
+            return
 
-            if token_image:
-                embed.set_thumbnail(url=token_image)
+        # Déclenchement du snipe instantané si FID match
+        snipe_monitor = self.bot.get_cog('SnipeMonitor')
 
-            tx_link = f"https://basescan.org/tx/{tx_hash}"
-            view = discord.ui.View()
-            view.add_item(
-                discord.ui.Button(
-                    style=discord.ButtonStyle.secondary,
-                    label="Token sur Basescan",
-                    url=f"https://basescan.org/address/{token_address}"
-                )
-            )
-            view.add_item(
-                discord.ui.Button(
-                    style=discord.ButtonStyle.secondary,
-                    label="Transaction",
-                    url=tx_link
-                )
-            )
-            if pool_hook:
-                view.add_item(
-                    discord.ui.Button(
-                        style=discord.ButtonStyle.secondary,
-                        label="Hook",
-                        url=f"https://basescan.org/address/{pool_hook}"
-                    )
-                )
-            if paired_token:
-                view.add_item(
-                    discord.ui.Button(
-                        style=discord.ButtonStyle.secondary,
-                        label="Token pairé",
-                        url=f"https://basescan.org/address/{paired_token}"
+        async def fire_snipe():
+            if not (snipe_monitor and fid in snipe_monitor.snipe_targets):
+                return
+            snipe = snipe_monitor.snipe_targets[fid]
+            if snipe['status'] in SNIPE_ACTIVE_STATUSES:
+                success = await snipe_monitor.send_buy_webhook(token_address, snipe['amount'], snipe['gas_fees'])
+                snipe['status'] = 'executed'
+                snipe_monitor.snipe_targets[fid] = snipe
+                snipe_monitor.sniped_contracts.add(token_address)
+                snipe_channel = self.bot.get_channel(snipe['channel_id'])
+                if snipe_channel:
+                    snipe_embed = discord.Embed(
+                        title=f"🎯 Snipe Exécuté (on-chain {label} instantané)",
+                        description=f"Token {label} trouvé pour le FID: `{fid}`",
+                        color=discord.Color.blue()
                     )
-                )
+                    snipe_embed.add_field(name="Adresse", value=token_address, inline=True)
+                    snipe_embed.add_field(name="Montant", value=f"{snipe['amount']} ETH", inline=True)
+                    snipe_embed.add_field(name="Gas Fees", value=f"{snipe['gas_fees']} ETH", inline=True)
+                    snipe_embed.add_field(name="Status", value="✅ Webhook envoyé" if success else "❌ Webhook erreur", inline=True)
+                    snipe_message = await snipe_channel.send(embed=snipe_embed)
+                    self._record_onchain_alert(event, token_address, snipe_message)
+                logger.info(f"Snipe instantané {label} exécuté pour FID {fid} sur {token_address} (webhook: {success})")
+        await self.log_engine.run_when_confirmed(event, ALERT_CONFIRMATION_DEPTHS["snipe"], fire_snipe)
+
+    @staticmethod
+    def _explorer_buttons(token_address: str) -> discord.ui.View:
+        """Boutons Basescan + Clanker World des alertes trackées / mot-clé"""
+        view = discord.ui.View()
+        view.add_item(discord.ui.Button(
+            style=discord.ButtonStyle.secondary,
+            label="Basescan",
+            url=f"https://basescan.org/token/{token_address}"
+        ))
+        view.add_item(discord.ui.Button(
+            style=discord.ButtonStyle.primary,
+            label="Lien Clanker World",
+            url=f"https://www.clanker.world/clanker/{token_address}"
+        ))
+        return view
+
+    def _track_volume(self, token_address: str, description: str, deployment: Optional["Deployment"] = None, event=None):
+        """Ajoute le token à la surveillance volume (et sa pool au flux Swap si l'event est connu)"""
+        self.tracked_clanker_tokens[token_address.lower()] = {
+            'first_seen': time.time(),
+            'alerted': False,
+            'name': deployment.name if deployment else None,
+            'symbol': deployment.symbol if deployment else None
+        }
+        self.volume_scheduler.add(token_address.lower(), self.tracked_clanker_tokens[token_address.lower()]['first_seen'])
+        self.tracked_store.mark(token_address.lower())
+        logger.info(f"[VOLUME TRACK] Ajout du token {description} {token_address.lower()} à la surveillance volume (on-chain)")
+        if event is not None:
+            asyncio.create_task(self._watch_swaps(token_address.lower(), event))
+
+    async def listen_onchain_factories(self):
+        """Écoute on-chain des factories Clanker V3, V4 et Fey via eth_subscribe("logs")."""
+        await self.bot.wait_until_ready()
+        if not self.channel:
+            self.channel = self.bot.get_channel(CHANNEL_ID)
+        channel = self.channel
+        if not channel:
+            logger.error("Could not find channel for Clanker notifications")
+            return
 
-            embed.add_field(name="Transaction", value=f"[Voir la transaction]({tx_link})", inline=False)
+        def make_handler(contract, handle_event):
+            async def handler(log):
+                event = contract.events.TokenCreated().process_log(log)
+                # Achat préparé depuis le mempool : tiré avant décodage, classement et alerte
+                await self._fire_armed_snipe(event)
+                await handle_event(event, channel)
+            return handler
+
+        self.log_engine.register(
+            "clanker_v3",
+            CLANKER_FACTORY_ADDRESS,
+            get_event_topic(CLANKER_FACTORY_ABI, "TokenCreated"),
+            make_handler(self.clanker_factory, self._handle_clanker_v3_event)
+        )
+        self.log_engine.register(
+            "clanker_v4",
+            CLANKER_FACTORY_V4_ADDRESS,
+            get_event_topic(CLANKER_FACTORY_V4_ABI, "TokenCreated"),
+            make_handler(self.clanker_factory_v4, self._handle_clanker_v4_event)
+        )
+        self.log_engine.register(
+            "fey",
+            FEY_FACTORY_ADDRESS,
+            get_event_topic(FEY_FACTORY_ABI, "TokenCreated"),
+            make_handler(self.fey_factory, self._handle_fey_token_created)
+        )
+        logger.info("Started multiplexed on-chain Clanker/Fey log subscription")
+        await self.log_engine.run()
 
-            await channel.send(embed=embed, view=view)
-            logger.info(f"[FEY] Notification envoyée pour {token_name} ({token_symbol}) {token_address}")
+    async def watch_mempool(self):
+        """Écoute des deployToken en attente (uniquement si MEMPOOL_WSS est configuré)."""
+        await self.bot.wait_until_ready()
+        logger.info("Started mempool watcher for Clanker/Fey deployToken transactions")
+        await self.mempool_watcher.run()
+
+    async def _on_pending_deploy(self, label: str, tx, token_config: Dict, snipe_monitor=None):
+        """Pré-classe un déploiement vu dans le mempool et prépare l'achat du snipe correspondant.
+
+        L'adresse du token est prédite par simulation et la connexion au webhook ouverte
+        d'avance ; l'achat part dès l'arrivée du log TokenCreated de cette tx (_fire_armed_snipe).
+        snipe_monitor permet de passer un état de test (!testmempool) à la place du cog."""
+        live = snipe_monitor is None
+        if live:
+            snipe_monitor = self.bot.get_cog('SnipeMonitor')
+        tx_hash = MempoolWatcher.tx_hash(tx)
+        deployer = token_config.get('tokenAdmin') or tx.get('from')
+        deployment = Deployment.from_token_config(
+            label,
+            None,  # adresse du token prédite plus bas, seulement si un snipe correspond
+            token_config,
+            creator_address=deployer,
+            tx_hash=tx_hash
+        )
+        name, symbol, fid = deployment.name, deployment.symbol, deployment.fid
+        verdict, rule = self.classifier.classify(deployment)
+        logger.info(f"[MEMPOOL] Déploiement en attente {name} ({symbol}) sur {label} - FID {fid}, verdict {verdict} ({rule})")
 
-            self.seen_tokens.add(token_key)
-            self.tracked_clanker_tokens[token_key] = {
-                "first_seen": time.time(),
-                "alerted": False,
-                "creator_address": msg_sender
-            }
-            logger.info(f"[FEY] Ajout du token {token_address.lower()} à la surveillance volume")
+        if verdict == "drop" or not (snipe_monitor and fid and fid in snipe_monitor.snipe_targets):
+            return
+        if snipe_monitor.snipe_targets[fid]['status'] not in SNIPE_ACTIVE_STATUSES:
+            return
+        token_address = await self.mempool_watcher.predict_token_address(tx)
+        armed = snipe_monitor.arm_snipe(fid, tx_hash, deployer, token_address)
+        if not armed:
+            return
+        if live:
+            asyncio.create_task(snipe_monitor.warm_buy_webhook())
+        logger.info(f"[MEMPOOL] Snipe armé pour FID {fid} (tx {tx_hash}, token prédit {token_address})")
+        snipe_channel = self.bot.get_channel(snipe_monitor.snipe_targets[fid]['channel_id'])
+        if snipe_channel:
+            embed = discord.Embed(
+                title="🎯 Snipe Armé (mempool)",
+                description=f"deployToken en attente détecté pour le FID: `{fid}`",
+                color=discord.Color.orange()
+            )
+            embed.add_field(name="Token", value=f"{name} ({symbol})", inline=True)
+            embed.add_field(name="Factory", value=label, inline=True)
+            embed.add_field(name="Adresse prédite", value=token_address or "inconnue (simulation échouée)", inline=False)
+            embed.add_field(name="Transaction", value=f"`{tx_hash}`", inline=False)
+            await snipe_channel.send(embed=embed)
+
+    async def _fire_armed_snipe(self, event):
+        """Tire l'achat préparé si ce log TokenCreated provient d'un deployToken armé depuis le mempool"""
+        snipe_monitor = self.bot.get_cog('SnipeMonitor')
+        if not (snipe_monitor and snipe_monitor.armed_snipes):
+            return
+        tx_hash = Web3.to_hex(event['transactionHash'])
+        token_address = Web3.to_checksum_address(event['args']['tokenAddress'])
+        fired = await snipe_monitor.fire_armed_snipe(tx_hash, token_address)
+        if not fired:
+            return
+        fid, snipe, success = fired
+        logger.info(f"Snipe pré-armé exécuté pour FID {fid} sur {token_address} (webhook: {success})")
 
+        async def notify():
+            snipe_channel = self.bot.get_channel(snipe['channel_id'])
+            if not snipe_channel:
+                return
+            snipe_embed = discord.Embed(
+                title="🎯 Snipe Exécuté (pré-armé mempool)",
+                description=f"Token trouvé pour le FID: `{fid}`",
+                color=discord.Color.blue()
+            )
+            snipe_embed.add_field(name="Adresse", value=token_address, inline=True)
+            snipe_embed.add_field(name="Montant", value=f"{snipe['amount']} ETH", inline=True)
+            snipe_embed.add_field(name="Gas Fees", value=f"{snipe['gas_fees']} ETH", inline=True)
+            snipe_embed.add_field(name="Status", value="✅ Webhook envoyé" if success else "❌ Webhook erreur", inline=True)
+            snipe_message = await snipe_channel.send(embed=snipe_embed)
+            self._record_onchain_alert(event, token_address, snipe_message)
+        # Le message Discord ne retarde pas le traitement du log
+        asyncio.create_task(notify())
+
+    async def _handle_fey_token_created(self, event, channel: discord.TextChannel, dry_run: bool = False):
+        """Traite un event TokenCreated de la factory Fey ; en dry_run (!testfey) seule l'alerte
+        est envoyée : ni dédup, ni journal et compteurs, ni suivi volume ou souscription Swap"""
+        token_address = Web3.to_checksum_address(event['args']['tokenAddress'])
+        if not dry_run and not self.seen_tokens.add(token_address.lower()):
+            logger.info(f"[FEY] Token {token_address} already processed, skipping duplicate event")
+            return
+        # L'event Fey porte les mêmes champs de token que l'event V4
+        try:
+            token_config = await self._decode_token_config(self.fey_factory, event, CLANKER_V4_EVENT_FIELDS)
+            token_admin = event['args'].get('tokenAdmin')
+            deployment = Deployment.from_token_config(
+                "fey",
+                token_address,
+                token_config,
+                creator_address=token_admin if token_admin and token_admin != ZERO_ADDRESS else event['args'].get('msgSender'),
+                tx_hash=event['transactionHash']
+            )
+            await self._handle_deployment(deployment, event, channel, dry_run)
         except Exception as e:
             logger.error(f"Error handling Fey TokenCreated event: {e}")
 
@@ -3079,9 +5329,50 @@ class ClankerMonitor(commands.Cog):
             "transactionHash": tx_hash_bytes,
         }
 
-        await self._handle_fey_token_created(fake_event, ctx.channel)
+        await self._handle_fey_token_created(fake_event, ctx.channel, dry_run=True)
         await ctx.send("✅ Alerte Fey de test envoyée.")
 
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def testmempool(self, ctx, fid: str = "4242"):
+        """Simule un deployToken V4 en attente pour tester le watcher mempool."""
+        token_config = (
+            Web3.to_checksum_address("0x1111111111111111111111111111111111111111"),  # tokenAdmin
+            "Mempool Test Token",
+            "MTEST",
+            bytes(32),  # salt
+            "https://clanker.example/token.png",
+            "",
+            json.dumps({"interface": "clanker", "platform": "farcaster", "id": fid}),
+            8453
+        )
+        pool_config = (ZERO_ADDRESS, Web3.to_checksum_address(config.WETH_ADDRESS), -230400, 200, b"")
+        locker_config = (ZERO_ADDRESS, [], [], [], [], [], [], b"")
+        mev_module_config = (ZERO_ADDRESS, b"")
+        deployment_config = (token_config, pool_config, locker_config, mev_module_config, [])
+        fake_tx = {
+            "hash": os.urandom(32),
+            "from": Web3.to_checksum_address("0x1234567890abcdef1234567890ABCDEF12345678"),
+            "to": self.clanker_factory_v4.address,
+            "input": self.clanker_factory_v4.encodeABI(fn_name="deployToken", args=[deployment_config]),
+            "value": 0,
+        }
+
+        # État de snipe jetable : les snipes réels et le webhook ne sont pas touchés
+        scratch = SnipeMonitor(self.bot)
+        scratch.snipe_targets[fid] = {
+            'amount': 0.0,
+            'gas_fees': 0.0,
+            'status': 'pending',
+            'channel_id': ctx.channel.id,
+            'created_at': datetime.now().isoformat()
+        }
+        label, token_config = self.mempool_watcher.decode_deploy(fake_tx)
+        await self._on_pending_deploy(label, fake_tx, token_config, snipe_monitor=scratch)
+        armed = scratch.armed_snipes.get(Web3.to_hex(fake_tx["hash"]))
+        predicted = (armed['token_address'] or "non prédite") if armed else "-"
+        await ctx.send(f"✅ deployToken de test décodé (FID {fid}, snipe de test: {scratch.snipe_targets[fid]['status']}, adresse: {predicted}).")
+
     @commands.command()
     async def volume(self, ctx, contract: str):
         """Affiche le volume du token sur 24h, 6h, 1h et 5min via Dexscreener."""
@@ -3107,6 +5398,13 @@ class ClankerMonitor(commands.Cog):
                 embed.add_field(name="Volume 6h", value=f"${float(volume.get('h6', 0)):,}", inline=True)
                 embed.add_field(name="Volume 1h", value=f"${float(volume.get('h1', 0)):,}", inline=True)
                 embed.add_field(name="Volume 5min", value=f"${float(volume.get('m5', 0)):,}", inline=True)
+                onchain = self.swap_volume.metrics(contract)
+                if onchain:
+                    embed.add_field(
+                        name="Volume on-chain (Swap)",
+                        value=" | ".join(f"{window}: ${onchain[window]:,.2f}" for window in VOLUME_WINDOWS),
+                        inline=False
+                    )
                 embed.add_field(name="Dexscreener", value=f"[Voir]({pair.get('url', 'https://dexscreener.com')})", inline=False)
                 await ctx.send(embed=embed)
         except Exception as e:
@@ -3115,41 +5413,16 @@ class ClankerMonitor(commands.Cog):
 
     @commands.command()
     async def testvolumealert(self, ctx):
-        """Simule une alerte de volume Clanker dépassant 5000 USD sur 5 minutes."""
+        """Simule une alerte de volume Clanker dépassant le seuil sur 5 minutes."""
         contract_address = "0xFAKEFAKEFAKEFAKEFAKEFAKEFAKEFAKEFAKEFAKEFAKE"
         name = "TokenTest"
         symbol = "TST"
-        volume_5m = 12345.67
-        dexscreener_url = f"https://dexscreener.com/base/{contract_address}"
-        embed = discord.Embed(
-            title="🚨 Volume Clanker élevé!",
-            description=f"Le token {name} ({symbol}) a dépassé 5000$ de volume sur 5 minutes!",
-            color=discord.Color.red(),
-            timestamp=datetime.now(timezone.utc)
-        )
-        embed.add_field(name="Contract", value=f"`{contract_address}`", inline=False)
-        embed.add_field(name="Volume (5min)", value=f"${volume_5m:,.2f}", inline=False)
-        embed.add_field(name="Dexscreener", value=f"[Voir]({dexscreener_url})", inline=False)
-        
-        # Créer la vue avec les boutons
-        view = discord.ui.View()
-        
-        # Bouton Basescan
-        basescan_button = discord.ui.Button(
-            style=discord.ButtonStyle.secondary,
-            label="Basescan",
-            url=f"https://basescan.org/token/{contract_address}"
-        )
-        view.add_item(basescan_button)
-        
-        # Bouton Clanker World
-        clanker_button = discord.ui.Button(
-            style=discord.ButtonStyle.primary,
-            label="Lien Clanker World",
-            url=f"https://www.clanker.world/clanker/{contract_address}"
+        metrics = {'1m': 4800.0, 'prev_1m': 2100.0, '5m': 12345.67, '1h': 15000.0, '24h': 15000.0}
+        embed, view = self._velocity_embed(
+            contract_address,
+            f"Le token {name} ({symbol}) a dépassé {self.volume_5m_threshold:g}$ de volume sur 5 minutes!",
+            metrics
         )
-        view.add_item(clanker_button)
-        
         await ctx.send(embed=embed, view=view)
 
     @commands.command()
@@ -3161,7 +5434,7 @@ class ClankerMonitor(commands.Cog):
             
         embed = discord.Embed(
             title="🥇 Liste des FIDs Premium",
-            description="\n".join(f"• FID: {fid}" for fid in sorted(self.whitelisted_fids)),
+            description="\n".join(f"• FID: {fid}" for fid in self.whitelisted_fids),
             color=discord.Color.gold()
         )
         await ctx.send(embed=embed)
@@ -3178,8 +5451,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send("❌ Ce FID est banni. Veuillez d'abord le débannir avec !unbanfid.")
             return
 
-        self.whitelisted_fids.add(fid)
-        self._save_whitelisted_fids()  # Sauvegarder immédiatement après modification
+        await self._write_through('whitelisted_fids', 'add', fid)
         await ctx.send(f"✅ FID {fid} ajouté à la whitelist avec succès.")
 
     @commands.command()
@@ -3187,8 +5459,7 @@ class ClankerMonitor(commands.Cog):
     async def removewhitelist(self, ctx, fid: str):
         """Retirer un FID de la whitelist."""
         if fid in self.whitelisted_fids:
-            self.whitelisted_fids.remove(fid)
-            self._save_whitelisted_fids()  # Sauvegarder immédiatement après modification
+            await self._write_through('whitelisted_fids', 'remove', fid)
             await ctx.send(f"✅ FID {fid} retiré de la whitelist avec succès.")
         else:
             await ctx.send("❌ Ce FID n'est pas dans la whitelist.")
@@ -3344,77 +5615,7 @@ class ClankerMonitor(commands.Cog):
         status_msg = await ctx.send(f"📥 Traitement de {len(ctx.message.attachments)} fichier(s) en cours...")
 
         try:
-            # Statistiques globales
-            total_stats = {
-                'added': set(),
-                'invalid': [],
-                'banned': [],
-                'already_whitelisted': []
-            }
-            
-            # Statistiques par fichier
-            file_stats = {}
-
-            # Traiter chaque fichier
-            for attachment in ctx.message.attachments:
-                # Statistiques pour ce fichier
-                file_stats[attachment.filename] = {
-                    'added': set(),
-                    'invalid': [],
-                    'banned': [],
-                    'already_whitelisted': []
-                }
-
-                # Télécharger et lire le contenu du fichier
-                content = await attachment.read()
-                content = content.decode('utf-8')
-                
-                # Liste des FIDs à traiter
-                fids_to_process = []
-                
-                # Traiter selon le format du fichier
-                if attachment.filename.endswith('.json'):
-                    try:
-                        json_data = json.loads(content)
-                        if isinstance(json_data, list):
-                            fids_to_process = [str(fid).strip() for fid in json_data]
-                        else:
-                            file_stats[attachment.filename]['invalid'].append("Format JSON invalide")
-                            total_stats['invalid'].append("Format JSON invalide")
-                            continue
-                    except json.JSONDecodeError:
-                        file_stats[attachment.filename]['invalid'].append("JSON invalide")
-                        total_stats['invalid'].append("JSON invalide")
-                        continue
-                else:  # .txt
-                    fids_to_process = [line.strip() for line in content.split('\n') if line.strip()]
-
-                # Traiter chaque FID
-                for fid in fids_to_process:
-                    if not fid:  # Ignorer les lignes vides
-                        continue
-                        
-                    if not str(fid).isdigit():
-                        file_stats[attachment.filename]['invalid'].append(fid)
-                        total_stats['invalid'].append(fid)
-                        continue
-                        
-                    if fid in self.banned_fids:
-                        file_stats[attachment.filename]['banned'].append(fid)
-                        total_stats['banned'].append(fid)
-                        continue
-                        
-                    if fid in self.whitelisted_fids:
-                        file_stats[attachment.filename]['already_whitelisted'].append(fid)
-                        total_stats['already_whitelisted'].append(fid)
-                        continue
-                        
-                    file_stats[attachment.filename]['added'].add(fid)
-                    total_stats['added'].add(fid)
-
-            # Ajouter tous les nouveaux FIDs à la whitelist
-            self.whitelisted_fids.update(total_stats['added'])
-            self._save_whitelisted_fids()
+            file_stats, total_stats = await self._import_fid_files(ctx.message.attachments, 'whitelisted_fids', 'banned_fids')
 
             # Créer un embed avec le résumé global
             embed = discord.Embed(
@@ -3430,17 +5631,23 @@ class ClankerMonitor(commands.Cog):
                 inline=False
             )
 
-            if total_stats['already_whitelisted']:
+            embed.add_field(
+                name="⚡ Débit",
+                value=f"{total_stats['entries']} entrées traitées en {total_stats['elapsed_ms']:.0f} ms ({total_stats['rate']:,.0f} FIDs/s)",
+                inline=False
+            )
+
+            if total_stats['existing']:
                 embed.add_field(
                     name="ℹ️ Total déjà whitelistés",
-                    value=f"{len(total_stats['already_whitelisted'])} FIDs déjà dans la whitelist",
+                    value=f"{len(total_stats['existing'])} FIDs déjà dans la whitelist",
                     inline=False
                 )
 
-            if total_stats['banned']:
+            if total_stats['conflict']:
                 embed.add_field(
                     name="⚠️ Total FIDs bannis (ignorés)",
-                    value=f"{len(total_stats['banned'])} FIDs sont bannis et n'ont pas été ajoutés",
+                    value=f"{len(total_stats['conflict'])} FIDs sont bannis et n'ont pas été ajoutés",
                     inline=False
                 )
 
@@ -3457,10 +5664,10 @@ class ClankerMonitor(commands.Cog):
                 details = []
                 if stats['added']:
                     details.append(f"✅ Ajoutés: {len(stats['added'])}")
-                if stats['already_whitelisted']:
-                    details.append(f"ℹ️ Déjà whitelistés: {len(stats['already_whitelisted'])}")
-                if stats['banned']:
-                    details.append(f"⚠️ Bannis: {len(stats['banned'])}")
+                if stats['existing']:
+                    details.append(f"ℹ️ Déjà whitelistés: {len(stats['existing'])}")
+                if stats['conflict']:
+                    details.append(f"⚠️ Bannis: {len(stats['conflict'])}")
                 if stats['invalid']:
                     details.append(f"❌ Invalides: {len(stats['invalid'])}")
                 
@@ -3493,10 +5700,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"ℹ️ Le mot-clé '{keyword}' est déjà dans la whitelist.")
             return
         
-        # Ajouter à la base de données
-        self.db.add_keyword(keyword)
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('keyword_whitelist', 'add', keyword)
         await ctx.send(f"✅ Mot-clé '{keyword}' ajouté à la whitelist. Les projets sans FID contenant ce mot-clé dans leur nom ou symbole seront maintenant affichés.")
         logger.info(f"Keyword '{keyword}' added to whitelist by {ctx.author}")
 
@@ -3509,10 +5713,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"ℹ️ Le mot-clé '{keyword}' n'est pas dans la whitelist.")
             return
         
-        # Retirer de la base de données
-        self.db.remove_keyword(keyword)
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('keyword_whitelist', 'remove', keyword)
         await ctx.send(f"✅ Mot-clé '{keyword}' retiré de la whitelist.")
         logger.info(f"Keyword '{keyword}' removed from whitelist by {ctx.author}")
 
@@ -3553,10 +5754,7 @@ class ClankerMonitor(commands.Cog):
             return
         
         count = len(self.keyword_whitelist)
-        # Vider la base de données
-        self.db.clear_keywords()
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('keyword_whitelist', 'clear')
         await ctx.send(f"✅ Whitelist de mots-clés vidée. {count} mot(s)-clé(s) supprimé(s).")
         logger.info(f"Keyword whitelist cleared by {ctx.author} - {count} keywords removed")
 
@@ -3573,15 +5771,15 @@ class ClankerMonitor(commands.Cog):
             json_keywords = self._load_keyword_whitelist()
             
             # Effectuer la migration
-            self._migrate_json_to_db()
+            await self.db.run(self._migrate_json_to_db)
             
             # Recharger les données
-            self._refresh_data_from_db()
+            await self._reload_state()
             
             # Compter les données après migration
-            db_banned = self.db.get_banned_fids()
-            db_whitelisted = self.db.get_whitelisted_fids()
-            db_keywords = self.db.get_keyword_whitelist()
+            db_banned = await self.db.run(self.db.get_banned_fids)
+            db_whitelisted = await self.db.run(self.db.get_whitelisted_fids)
+            db_keywords = await self.db.run(self.db.get_keyword_whitelist)
             
             embed = discord.Embed(
                 title="✅ Migration Terminée",
@@ -3614,6 +5812,49 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"❌ Erreur lors de la migration: {str(e)}")
             logger.error(f"Error during manual migration: {e}")
 
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def classifierstats(self, ctx):
+        """Affiche le coût d'évaluation et la répartition des verdicts du classifieur"""
+        classifier = self.classifier
+        average_us = classifier.total_ns / classifier.evaluations / 1000 if classifier.evaluations else 0
+        embed = discord.Embed(
+            title="🧮 Classifieur de Déploiements",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Évaluations", value=str(classifier.evaluations), inline=True)
+        embed.add_field(name="Coût moyen", value=f"{average_us:.1f} µs", inline=True)
+        embed.add_field(name="Coût max", value=f"{classifier.max_ns / 1000:.1f} µs", inline=True)
+        embed.add_field(
+            name="Règles (dans l'ordre)",
+            value="\n".join(f"`{name}` → {verdict}" for name, _, verdict in classifier.rules) + "\n`default` → plain",
+            inline=False
+        )
+        embed.add_field(
+            name="Verdicts",
+            value="\n".join(f"**{verdict}:** {count}" for verdict, count in sorted(classifier.verdict_counts.items())) or "Aucun",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def rpcstatus(self, ctx):
+        """Affiche la santé des endpoints RPC (latence, erreurs, courses gagnées)"""
+        embed = discord.Embed(
+            title="🛰️ Santé des Endpoints RPC",
+            color=discord.Color.blue()
+        )
+        for rank, endpoint in enumerate(w3.provider.ranked_endpoints(), start=1):
+            latency = f"{endpoint.latency * 1000:.0f} ms" if endpoint.latency is not None else "N/A"
+            status = "⛔ Écarté" if endpoint.is_demoted else "✅ Actif"
+            embed.add_field(
+                name=f"#{rank} {endpoint.url.split('//')[-1].split('/')[0]}",
+                value=f"{status}\n**Latence:** {latency}\n**Erreurs:** {endpoint.error_rate:.0%} ({endpoint.errors}/{endpoint.requests})\n**Courses gagnées:** {endpoint.wins}",
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def checkdb(self, ctx):
@@ -3634,8 +5875,7 @@ class ClankerMonitor(commands.Cog):
             
             # Test de connexion
             try:
-                conn = self.db._get_connection()
-                conn.close()
+                await self.db.run(self.db.ping)
                 connection_status = "✅ **Connecté**"
                 connection_color = discord.Color.green()
             except Exception as e:
@@ -3650,11 +5890,11 @@ class ClankerMonitor(commands.Cog):
             
             # Informations sur les données
             try:
-                banned_count = len(self.db.get_banned_fids())
-                whitelisted_count = len(self.db.get_whitelisted_fids())
-                keywords_count = len(self.db.get_keyword_whitelist())
-                volume_threshold = self.db.get_volume_threshold()
-                emergency_threshold = self.db.get_emergency_call_threshold()
+                banned_count = len(await self.db.run(self.db.get_banned_fids))
+                whitelisted_count = len(await self.db.run(self.db.get_whitelisted_fids))
+                keywords_count = len(await self.db.run(self.db.get_keyword_whitelist))
+                volume_threshold = await self.db.run(self.db.get_volume_threshold)
+                emergency_threshold = await self.db.run(self.db.get_emergency_call_threshold)
                 
                 embed.add_field(
                     name="📈 Données Stockées",
@@ -3667,21 +5907,22 @@ class ClankerMonitor(commands.Cog):
                     value=f"**Seuil Volume:** {volume_threshold:,.0f} USD\n**Seuil Appel:** {emergency_threshold:,.0f} USD",
                     inline=False
                 )
+
+                fid_bytes = self.banned_fids.nbytes() + self.whitelisted_fids.nbytes()
+                embed.add_field(
+                    name="🧮 FIDs en Mémoire",
+                    value=f"**Chargement:** {self.fid_sets_load_ms:.1f} ms\n"
+                          f"**Mémoire:** {fid_bytes / 1024:.1f} Ko ({len(self.banned_fids) + len(self.whitelisted_fids)} FIDs)",
+                    inline=False
+                )
                 
                 # Test d'écriture
                 test_key = f"test_connection_{int(time.time())}"
-                self.db.set_preference(test_key, "test_value")
-                test_result = self.db.get_preference(test_key)
+                await self.db.run(self.db.set_preference, test_key, "test_value")
+                test_result = await self.db.run(self.db.get_preference, test_key)
                 if test_result == "test_value":
                     # Nettoyer le test
-                    conn = self.db._get_connection()
-                    c = conn.cursor()
-                    if db_type == 'postgresql':
-                        c.execute("DELETE FROM bot_preferences WHERE key = %s", (test_key,))
-                    else:
-                        c.execute("DELETE FROM bot_preferences WHERE key = ?", (test_key,))
-                    conn.commit()
-                    conn.close()
+                    await self.db.run(self.db.delete_preference, test_key)
                     
                     write_status = "✅ **Lecture/Écriture OK**"
                 else:
@@ -3745,11 +5986,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"ℹ️ L'adresse `{address}` est déjà trackée.")
             return
         
-        # Ajouter à la base de données
-        self.db.add_tracked_address(address)
-        
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('tracked_addresses', 'add', address)
         
         await ctx.send(f"✅ Adresse `{address}` ajoutée à la liste des adresses trackées. Vous recevrez une alerte spéciale verte quand cette adresse déploiera un clanker.")
         logger.info(f"Address {address} added to tracked addresses by {ctx.author}")
@@ -3774,11 +6011,7 @@ class ClankerMonitor(commands.Cog):
             await ctx.send(f"ℹ️ L'adresse `{address}` n'est pas trackée.")
             return
         
-        # Retirer de la base de données
-        self.db.remove_tracked_address(address)
-        
-        # Rafraîchir les données en mémoire
-        self._refresh_data_from_db()
+        await self._write_through('tracked_addresses', 'remove', address)
         
         await ctx.send(f"✅ Adresse `{address}` retirée de la liste des adresses trackées.")
         logger.info(f"Address {address} removed from tracked addresses by {ctx.author}")
@@ -3840,77 +6073,7 @@ class ClankerMonitor(commands.Cog):
         status_msg = await ctx.send(f"📥 Traitement de {len(ctx.message.attachments)} fichier(s) en cours...")
 
         try:
-            # Statistiques globales
-            total_stats = {
-                'added': set(),
-                'invalid': [],
-                'whitelisted': [],
-                'already_banned': []
-            }
-            
-            # Statistiques par fichier
-            file_stats = {}
-
-            # Traiter chaque fichier
-            for attachment in ctx.message.attachments:
-                # Statistiques pour ce fichier
-                file_stats[attachment.filename] = {
-                    'added': set(),
-                    'invalid': [],
-                    'whitelisted': [],
-                    'already_banned': []
-                }
-
-                # Télécharger et lire le contenu du fichier
-                content = await attachment.read()
-                content = content.decode('utf-8')
-                
-                # Liste des FIDs à traiter
-                fids_to_process = []
-                
-                # Traiter selon le format du fichier
-                if attachment.filename.endswith('.json'):
-                    try:
-                        json_data = json.loads(content)
-                        if isinstance(json_data, list):
-                            fids_to_process = [str(fid).strip() for fid in json_data]
-                        else:
-                            file_stats[attachment.filename]['invalid'].append("Format JSON invalide")
-                            total_stats['invalid'].append("Format JSON invalide")
-                            continue
-                    except json.JSONDecodeError:
-                        file_stats[attachment.filename]['invalid'].append("JSON invalide")
-                        total_stats['invalid'].append("JSON invalide")
-                        continue
-                else:  # .txt
-                    fids_to_process = [line.strip() for line in content.split('\n') if line.strip()]
-
-                # Traiter chaque FID
-                for fid in fids_to_process:
-                    if not fid:  # Ignorer les lignes vides
-                        continue
-                    
-                    if not str(fid).isdigit():
-                        file_stats[attachment.filename]['invalid'].append(fid)
-                        total_stats['invalid'].append(fid)
-                        continue
-                    
-                    if fid in self.whitelisted_fids:
-                        file_stats[attachment.filename]['whitelisted'].append(fid)
-                        total_stats['whitelisted'].append(fid)
-                        continue
-                    
-                    if fid in self.banned_fids:
-                        file_stats[attachment.filename]['already_banned'].append(fid)
-                        total_stats['already_banned'].append(fid)
-                        continue
-                    
-                    file_stats[attachment.filename]['added'].add(fid)
-                    total_stats['added'].add(fid)
-
-            # Ajouter tous les nouveaux FIDs à la banlist
-            self.banned_fids.update(total_stats['added'])
-            self._save_banned_fids()
+            file_stats, total_stats = await self._import_fid_files(ctx.message.attachments, 'banned_fids', 'whitelisted_fids')
 
             # Créer un embed avec le résumé global
             embed = discord.Embed(
@@ -3926,17 +6089,23 @@ class ClankerMonitor(commands.Cog):
                 inline=False
             )
 
-            if total_stats['already_banned']:
+            embed.add_field(
+                name="⚡ Débit",
+                value=f"{total_stats['entries']} entrées traitées en {total_stats['elapsed_ms']:.0f} ms ({total_stats['rate']:,.0f} FIDs/s)",
+                inline=False
+            )
+
+            if total_stats['existing']:
                 embed.add_field(
                     name="ℹ️ Total déjà bannis",
-                    value=f"{len(total_stats['already_banned'])} FIDs déjà dans la banlist",
+                    value=f"{len(total_stats['existing'])} FIDs déjà dans la banlist",
                     inline=False
                 )
 
-            if total_stats['whitelisted']:
+            if total_stats['conflict']:
                 embed.add_field(
                     name="⚠️ Total FIDs whitelistés (ignorés)",
-                    value=f"{len(total_stats['whitelisted'])} FIDs sont whitelistés et n'ont pas été bannis",
+                    value=f"{len(total_stats['conflict'])} FIDs sont whitelistés et n'ont pas été bannis",
                     inline=False
                 )
 
@@ -3953,10 +6122,10 @@ class ClankerMonitor(commands.Cog):
                 details = []
                 if stats['added']:
                     details.append(f"✅ Bannis: {len(stats['added'])}")
-                if stats['already_banned']:
-                    details.append(f"ℹ️ Déjà bannis: {len(stats['already_banned'])}")
-                if stats['whitelisted']:
-                    details.append(f"⚠️ Whitelistés: {len(stats['whitelisted'])}")
+                if stats['existing']:
+                    details.append(f"ℹ️ Déjà bannis: {len(stats['existing'])}")
+                if stats['conflict']:
+                    details.append(f"⚠️ Whitelistés: {len(stats['conflict'])}")
                 if stats['invalid']:
                     details.append(f"❌ Invalides: {len(stats['invalid'])}")
                 
@@ -4013,33 +6182,33 @@ class ClankerMonitor(commands.Cog):
 
     async def ensure_weth(self, amount_wei):
         """Wrap de l'ETH en WETH si le solde WETH est insuffisant."""
-        weth_balance = w3.eth.get_balance(config.WETH_ADDRESS)
+        weth_balance = await w3.eth.get_balance(config.WETH_ADDRESS)
         if weth_balance < amount_wei:
-            tx = weth.functions.deposit().build_transaction({
+            tx = await weth.functions.deposit().build_transaction({
                 'from': config.WALLET_ADDRESS,
                 'value': amount_wei,
                 'gas': 60000,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': w3.eth.get_transaction_count(config.WALLET_ADDRESS),
+                'gasPrice': await w3.eth.gas_price,
+                'nonce': await w3.eth.get_transaction_count(config.WALLET_ADDRESS),
             })
             signed_tx = w3.eth.account.sign_transaction(tx, config.WALLET_PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = await w3.eth.send_raw_transaction(signed_tx.rawTransaction)
             logger.info(f"ETH wrapped to WETH, tx: {tx_hash.hex()}")
             return tx_hash.hex()
         return None
 
     async def ensure_approve(self, amount_wei):
         """Approve le routeur Uniswap V3 pour le WETH si besoin."""
-        allowance = weth.functions.allowance(config.WALLET_ADDRESS, config.UNISWAP_V3_ROUTER).call()
+        allowance = await weth.functions.allowance(config.WALLET_ADDRESS, config.UNISWAP_V3_ROUTER).call()
         if allowance < amount_wei:
-            tx = weth.functions.approve(config.UNISWAP_V3_ROUTER, 2**256-1).build_transaction({
+            tx = await weth.functions.approve(config.UNISWAP_V3_ROUTER, 2**256-1).build_transaction({
                 'from': config.WALLET_ADDRESS,
                 'gas': 60000,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': w3.eth.get_transaction_count(config.WALLET_ADDRESS),
+                'gasPrice': await w3.eth.gas_price,
+                'nonce': await w3.eth.get_transaction_count(config.WALLET_ADDRESS),
             })
             signed_tx = w3.eth.account.sign_transaction(tx, config.WALLET_PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = await w3.eth.send_raw_transaction(signed_tx.rawTransaction)
             logger.info(f"Approve WETH for router, tx: {tx_hash.hex()}")
             return tx_hash.hex()
         return None
@@ -4075,14 +6244,14 @@ class ClankerMonitor(commands.Cog):
                 'amountOutMinimum': 0,  # à ajuster pour le slippage
                 'sqrtPriceLimitX96': 0
             }
-            tx = router.functions.exactInputSingle(params).build_transaction({
+            tx = await router.functions.exactInputSingle(params).build_transaction({
                 'from': config.WALLET_ADDRESS,
                 'gas': config.GAS_LIMIT,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': w3.eth.get_transaction_count(config.WALLET_ADDRESS),
+                'gasPrice': await w3.eth.gas_price,
+                'nonce': await w3.eth.get_transaction_count(config.WALLET_ADDRESS),
             })
             signed_tx = w3.eth.account.sign_transaction(tx, config.WALLET_PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = await w3.eth.send_raw_transaction(signed_tx.rawTransaction)
             embed = discord.Embed(
                 title="🔄 Transaction Envoyée",
                 description=f"Hash: {tx_hash.hex()}\nMontant: {amount} WETH",
@@ -4110,14 +6279,14 @@ class ClankerMonitor(commands.Cog):
                 'amountOutMinimum': 0,  # à ajuster pour le slippage
                 'sqrtPriceLimitX96': 0
             }
-            tx = router.functions.exactInputSingle(params).build_transaction({
+            tx = await router.functions.exactInputSingle(params).build_transaction({
                 'from': config.WALLET_ADDRESS,
                 'gas': config.GAS_LIMIT,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': w3.eth.get_transaction_count(config.WALLET_ADDRESS),
+                'gasPrice': await w3.eth.gas_price,
+                'nonce': await w3.eth.get_transaction_count(config.WALLET_ADDRESS),
             })
             signed_tx = w3.eth.account.sign_transaction(tx, config.WALLET_PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = await w3.eth.send_raw_transaction(signed_tx.rawTransaction)
             if self.channel:
                 embed = discord.Embed(
                     title="🎯 Snipe Exécuté",
@@ -4207,19 +6376,19 @@ class ClankerMonitor(commands.Cog):
                 rewards_config
             )
             contract = self.clanker_factory
-            value = self.w3_ws.to_wei(devbuy_eth, 'ether') if devbuy_eth > 0 else 0
+            value = self.w3_async.to_wei(devbuy_eth, 'ether') if devbuy_eth > 0 else 0
             tx = contract.functions.deployToken(deployment_config)
-            tx_dict = tx.build_transaction({
+            tx_dict = await tx.build_transaction({
                 'from': creator_admin,
                 'value': value,
-                'nonce': self.w3_ws.eth.get_transaction_count(creator_admin),
+                'nonce': await self.w3_async.eth.get_transaction_count(creator_admin),
                 'gas': 2_500_000,
-                'gasPrice': self.w3_ws.eth.gas_price
+                'gasPrice': await self.w3_async.eth.gas_price
             })
-            signed = self.w3_ws.eth.account.sign_transaction(tx_dict, config.WALLET_PRIVATE_KEY)
-            tx_hash = self.w3_ws.eth.send_raw_transaction(signed.rawTransaction)
+            signed = self.w3_async.eth.account.sign_transaction(tx_dict, config.WALLET_PRIVATE_KEY)
+            tx_hash = await self.w3_async.eth.send_raw_transaction(signed.rawTransaction)
             await ctx.send(f"✅ Transaction envoyée ! Hash : `{tx_hash.hex()}`. Attente du déploiement...")
-            receipt = self.w3_ws.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
+            receipt = await self.w3_async.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
             logs = contract.events.TokenCreated().process_receipt(receipt)
             if logs:
                 token_addr = logs[0]['args']['tokenAddress']
@@ -4235,25 +6404,90 @@ class SnipeMonitor(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.snipe_targets = {}
+        # Snipes armés depuis le mempool, par hash de la tx deployToken (fid, déployeur, adresse prédite)
+        self.armed_snipes: Dict[str, Dict] = {}
+        # Tokens déjà achetés (tous chemins confondus) : le poller API ne les re-snipe pas
+        self.sniped_contracts = DedupeIndex(journal_path=None)
+        self.webhook_session: Optional[aiohttp.ClientSession] = None
         self.is_monitoring = False
         self.channel = None
 
-    async def send_buy_webhook(self, token_address: str, amount_eth: float, gas_fees: float = None):
-        url = "https://clankersniper-production.up.railway.app/buy_webhook"
+    @staticmethod
+    def _buy_payload(token_address: str, amount_eth: float, gas_fees: float = None) -> Dict:
         payload = {
             "token_address": token_address,
             "amount_eth": amount_eth
         }
         if gas_fees is not None:
             payload["gas_fees"] = gas_fees
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                if resp.status == 200:
-                    return True
-                else:
-                    text = await resp.text()
-                    logger.error(f"Erreur webhook: {resp.status} - {text}")
-                    return False
+        return payload
+
+    def _get_webhook_session(self) -> aiohttp.ClientSession:
+        if self.webhook_session is None or self.webhook_session.closed:
+            self.webhook_session = aiohttp.ClientSession()
+        return self.webhook_session
+
+    async def _post_buy_webhook(self, payload: Dict) -> bool:
+        async with self._get_webhook_session().post(BUY_WEBHOOK_URL, json=payload) as resp:
+            if resp.status == 200:
+                return True
+            else:
+                text = await resp.text()
+                logger.error(f"Erreur webhook: {resp.status} - {text}")
+                return False
+
+    async def send_buy_webhook(self, token_address: str, amount_eth: float, gas_fees: float = None):
+        return await self._post_buy_webhook(self._buy_payload(token_address, amount_eth, gas_fees))
+
+    async def warm_buy_webhook(self):
+        """Ouvre la connexion (TCP + TLS) vers le webhook avant le tir ; le statut de la réponse est ignoré"""
+        try:
+            async with self._get_webhook_session().head(BUY_WEBHOOK_URL) as resp:
+                await resp.read()
+        except Exception as e:
+            logger.debug(f"Préchauffage du webhook impossible: {e}")
+
+    def arm_snipe(self, fid: str, tx_hash: str, deployer: Optional[str], token_address: Optional[str]) -> Optional[Dict]:
+        """Arme le snipe du FID ciblé pour ce deployToken en attente (adresse du token prédite)"""
+        self._expire_armed_snipes()
+        target = self.snipe_targets.get(fid)
+        if not target or target['status'] not in SNIPE_ACTIVE_STATUSES:
+            return None
+        armed = {
+            'fid': fid,
+            'deployer': deployer.lower() if deployer else None,
+            'token_address': token_address,
+            'armed_at': time.time()
+        }
+        self.armed_snipes[tx_hash] = armed
+        target['status'] = 'armed'
+        return armed
+
+    def _expire_armed_snipes(self):
+        """Oublie les tx jamais incluses ; le snipe repasse en 'pending' s'il n'a plus de tx armée"""
+        limit = time.time() - MEMPOOL_ARM_TTL
+        for tx_hash in [h for h, armed in self.armed_snipes.items() if armed['armed_at'] < limit]:
+            fid = self.armed_snipes.pop(tx_hash)['fid']
+            target = self.snipe_targets.get(fid)
+            if target and target['status'] == 'armed' and not any(a['fid'] == fid for a in self.armed_snipes.values()):
+                target['status'] = 'pending'
+
+    async def fire_armed_snipe(self, tx_hash: str, token_address: str) -> Optional[tuple]:
+        """Envoie l'achat préparé pour cette tx ; renvoie (fid, snipe, succès) ou None"""
+        armed = self.armed_snipes.pop(tx_hash, None)
+        if not armed:
+            return None
+        fid = armed['fid']
+        target = self.snipe_targets.get(fid)
+        if not target or target['status'] not in SNIPE_ACTIVE_STATUSES:
+            return None
+        if armed['token_address'] and armed['token_address'].lower() != token_address.lower():
+            logger.warning(f"[MEMPOOL] Adresse prédite {armed['token_address']} différente du token créé {token_address}")
+        target['status'] = 'executed'  # avant l'envoi : les autres chemins ne retirent pas
+        self.sniped_contracts.add(token_address)
+        # Montant et gas lus au tir : un !editsnipe fait après l'armement est pris en compte
+        success = await self._post_buy_webhook(self._buy_payload(token_address, target['amount'], target['gas_fees']))
+        return fid, target, success
 
     @commands.command(name="buywebhook")
     @commands.has_permissions(administrator=True)
@@ -4267,7 +6501,9 @@ class SnipeMonitor(commands.Cog):
 
     async def monitor_new_clankers(self):
         """Surveille les nouveaux Clankers via l'API et déclenche le sniping si correspondance FID"""
-        seen_contracts = set()
+        # Seuls les tokens effectivement snipés sont écartés : un token vu on-chain sans
+        # achat (alerte filtrée, erreur de décodage...) reste snipable depuis l'API
+        seen_contracts = self.sniped_contracts
         while self.is_monitoring:
             try:
                 async with aiohttp.ClientSession() as session:
@@ -4285,7 +6521,7 @@ class SnipeMonitor(commands.Cog):
                                 continue
                             if contract in seen_contracts:
                                 continue
-                            if fid in self.snipe_targets and self.snipe_targets[fid]["status"] == "pending":
+                            if fid in self.snipe_targets and self.snipe_targets[fid]["status"] in SNIPE_ACTIVE_STATUSES:
                                 target = self.snipe_targets[fid]
                                 success = await self.send_buy_webhook(contract, target['amount'], target['gas_fees'])
                                 target['status'] = 'executed'
@@ -4358,7 +6594,7 @@ class SnipeMonitor(commands.Cog):
         )
 
         for fid, data in self.snipe_targets.items():
-            if data['status'] == 'pending':
+            if data['status'] in SNIPE_ACTIVE_STATUSES:
                 embed.add_field(
                     name=f"FID: {fid}",
                     value=f"Montant: {data['amount']} ETH\nStatus: {data['status']}\nCréé le: {data['created_at']}",
@@ -4375,7 +6611,7 @@ class SnipeMonitor(commands.Cog):
             await ctx.send(f"❌ Aucun snipe trouvé pour le FID: {fid}")
             return
 
-        if self.snipe_targets[fid]['status'] != 'pending':
+        if self.snipe_targets[fid]['status'] not in SNIPE_ACTIVE_STATUSES:
             await ctx.send(f"❌ Ce snipe n'est plus en attente (status: {self.snipe_targets[fid]['status']})")
             return
 
@@ -4390,7 +6626,7 @@ class SnipeMonitor(commands.Cog):
             await ctx.send(f"❌ Aucun snipe trouvé pour le FID: {fid}")
             return
 
-        if self.snipe_targets[fid]['status'] != 'pending':
+        if self.snipe_targets[fid]['status'] not in SNIPE_ACTIVE_STATUSES:
             await ctx.send(f"❌ Ce snipe n'est plus en attente (status: {self.snipe_targets[fid]['status']})")
             return
 
@@ -4510,6 +6746,13 @@ class Bot(commands.Bot):
             
             # Redémarrer le bot
             await self.close()
+
+            # Rendre les connexions DB avant de remplacer le processus
+            clanker_monitor = self.get_cog('ClankerMonitor')
+            if clanker_monitor:
+                await clanker_monitor.deployment_journal.flush()
+                await clanker_monitor.tracked_store.flush()
+                clanker_monitor.db.close()
             
             # Redémarrer le processus Python
             python = sys.executable
@@ -4532,15 +6775,9 @@ class Bot(commands.Bot):
         
         # Cache initial tokens before starting monitoring
         try:
-            headers = {
-                'Accept': '*/*',
-                'User-Agent': 'Mozilla/5.0'
-            }
-            
             logger.info("Caching initial tokens...")
-            response = requests.get(DEXSCREENER_API_URL, headers=headers)
-            response.raise_for_status()
-            tokens = response.json()
+            # Premier appel du poller : la liste sert de référence, le tick suivant ne la retraite pas
+            tokens, _ = await token_monitor.profile_poller.fetch()
             
             # Add all current tokens to seen_tokens
             for token in tokens:
@@ -4551,34 +6788,31 @@ class Bot(commands.Bot):
                     token_monitor.seen_tokens.add(token_key)
             
             logger.info(f"Cached {len(token_monitor.seen_tokens)} initial tokens")
-            
-            # Cache initial Clanker tokens
-            logger.info("Caching initial Clanker tokens...")
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{CLANKER_API_URL}/tokens", params={"page": 1, "sort": "desc"})
-                response.raise_for_status()
-                data = response.json()
-                if "data" in data:
-                    for token in data["data"]:
-                        token_address = token.get('contract_address')
-                        if token_address:
-                            clanker_monitor.seen_tokens.add(token_address)
-                
-                logger.info(f"Cached {len(clanker_monitor.seen_tokens)} initial Clanker tokens")
+            # Les tokens Clanker déjà traités sont rechargés depuis le journal de DedupeIndex ;
+            # ceux déployés pendant l'arrêt sont rattrapés (et alertés) par le backfill on-chain
+            logger.info(f"Loaded {len(clanker_monitor.seen_tokens)} seen Clanker tokens from journal")
                 
         except Exception as e:
             logger.error(f"Error caching initial tokens: {e}")
         
+        # Reprise des tokens sous surveillance volume et des compteurs de déploiements avant de relancer les tâches
+        await clanker_monitor.restore_tracked_tokens()
+        await clanker_monitor.seed_deploy_counters()
+        
         # Start monitoring tasks
         token_monitor.monitor_tokens.start()
         token_monitor.check_trump_posts.start()
         # clanker_monitor.monitor_clanker.start()  # Supprimé car remplacé par l'écoute on-chain
         clanker_monitor.monitor_clanker_volumes.start()
         # snipe_monitor.monitor_snipes.start()  # Cette ligne est supprimée car nous n'utilisons plus monitor_snipes
-        # Lancer la tâche d'écoute on-chain
-        asyncio.create_task(clanker_monitor.listen_onchain_clanker())
-        asyncio.create_task(clanker_monitor.listen_onchain_clanker_v4())
-        asyncio.create_task(clanker_monitor.listen_fey_factory())
+        # Lancer la tâche d'écoute on-chain (eth_subscribe)
+        asyncio.create_task(clanker_monitor.listen_onchain_factories())
+        asyncio.create_task(clanker_monitor.watch_swap_volumes())
+        if MEMPOOL_WSS:
+            asyncio.create_task(clanker_monitor.watch_mempool())
+        asyncio.create_task(clanker_monitor.watch_state_changes())
+        asyncio.create_task(clanker_monitor.deployment_journal.run())
+        asyncio.create_task(clanker_monitor.tracked_store.run())
 
     async def on_ready(self):
         """Called when the bot is ready."""
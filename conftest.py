@@ -0,0 +1,10 @@
+import os
+
+# bot.py lit sa configuration à l'import : valeurs factices pour les tests hors ligne
+os.environ.setdefault('DISCORD_TOKEN', 'test')
+os.environ.setdefault('DISCORD_CHANNEL_ID', '1')
+os.environ.setdefault('CHANNEL_ID', '1')
+os.environ.setdefault('ADMIN_ROLE_ID', '1')
+os.environ.setdefault('WALLET_PRIVATE_KEY', '0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318')
+os.environ.setdefault('WALLET_ADDRESS', '0x2c7536E3605D9C16a7a3D7b1898e529396a65c23')
+os.environ.setdefault('RPC_HTTP_URLS', 'http://127.0.0.1:9')
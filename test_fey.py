@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+import bot
+from test_mempool import FakeBot, FakeChannel
+
+FEY_TOKEN = "0xfE0000000000000000000000000000000000FE00"
+
+
+class FailingChannel(FakeChannel):
+    async def send(self, *args, **kwargs):
+        raise RuntimeError("discord indisponible")
+
+
+class FakeCtx:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def send(self, *args, **kwargs):
+        await self.channel.send(*args, **kwargs)
+
+
+def fey_event(fid="4242"):
+    return AttributeDict({
+        'args': AttributeDict({
+            'msgSender': "0x1234567890AbcdEF1234567890aBcdef12345678",
+            'tokenAddress': FEY_TOKEN,
+            'tokenAdmin': "0x1111111111111111111111111111111111111111",
+            'tokenImage': "https://fey.example/token.png",
+            'tokenName': "Fey Token",
+            'tokenSymbol': "FEY",
+            'tokenMetadata': "{}",
+            'tokenContext': '{"platform":"test","id":"%s"}' % fid,
+            'startingTick': 0,
+            'poolHook': bot.FEY_HOOK_STATIC_FEE_ADDRESS,
+            'poolId': HexBytes(b'\x9f' * 32),
+            'pairedToken': "0x4200000000000000000000000000000000000006",
+            'locker': bot.ZERO_ADDRESS,
+            'mevModule': bot.ZERO_ADDRESS,
+            'extensionsSupply': 0,
+            'extensions': [],
+        }),
+        'transactionHash': HexBytes(b'\xc5' * 32),
+        'blockNumber': 100,
+        'blockHash': HexBytes(b'\xaa' * 32),
+        'logIndex': 0,
+    })
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_testfey_dry_run_has_no_side_effects():
+    async def scenario():
+        fake_bot = FakeBot()
+        monitor = bot.ClankerMonitor(fake_bot)
+        ctx = FakeCtx(FakeChannel())
+        await monitor.testfey.callback(monitor, ctx)
+        embeds = [embed for embed in ctx.channel.sent if embed is not None]
+        assert len(embeds) == 1
+        fields = {field.name: field.value for field in embeds[0].fields}
+        assert "FeyHookStaticFeeV2" in fields["Hook"]
+        assert "Lien Clanker" not in fields
+        assert FEY_TOKEN.lower() not in monitor.seen_tokens
+        assert monitor.deployment_journal.pending == []
+        assert monitor.tracked_clanker_tokens == {}
+        assert monitor.fid_deploy_counter.top('24h', 1) == []
+        # Rejouable : le même token de test n'est pas dédupliqué
+        await monitor.testfey.callback(monitor, ctx)
+        assert len([embed for embed in ctx.channel.sent if embed is not None]) == 2
+    asyncio.run(scenario())
+
+
+def test_fey_send_failure_still_journals_and_tracks():
+    async def scenario():
+        fake_bot = FakeBot()
+        monitor = bot.ClankerMonitor(fake_bot)
+        event = fey_event()
+        monitor.log_engine.log_received_at[bot.LogSubscriptionEngine._log_key(event)] = 1000.0
+        await monitor._handle_fey_token_created(event, FailingChannel())
+        await asyncio.sleep(0)  # souscription Swap lancée en tâche de fond
+        token_key = FEY_TOKEN.lower()
+        assert token_key in monitor.tracked_clanker_tokens
+        assert monitor.tracked_clanker_tokens[token_key]['pool_id'] == '0x' + '9f' * 32
+        [row] = monitor.deployment_journal.pending
+        assert row['launchpad'] == 'fey' and row['fid'] == '4242' and row['verdict'] == 'plain'
+        assert row['creator_address'] == "0x1111111111111111111111111111111111111111"
+        # Doublon ignoré
+        await monitor._handle_fey_token_created(event, FailingChannel())
+        assert len(monitor.deployment_journal.pending) == 1
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import pytest
+
+import bot
+
+
+def test_insert_and_delete_at_the_ends():
+    fids = bot.FidSet(["50", "20"])
+    fids.add(10)            # avant le premier
+    fids.add("90")          # après le dernier
+    fids.add(0)
+    fids.add(bot.FidSet.MAX_FID)
+    assert list(fids) == ["0", "10", "20", "50", "90", str(bot.FidSet.MAX_FID)]
+
+    fids.discard("0")       # premier
+    fids.discard(bot.FidSet.MAX_FID)  # dernier
+    assert list(fids) == ["10", "20", "50", "90"]
+    fids.remove("10")
+    fids.remove(90)
+    assert list(fids) == ["20", "50"]
+    assert "10" not in fids and 90 not in fids and "20" in fids
+
+
+def test_empty_and_single_element():
+    fids = bot.FidSet()
+    fids.discard("1")
+    assert len(fids) == 0 and "1" not in fids
+    fids.add("1")
+    fids.add("1")
+    assert list(fids) == ["1"]
+    fids.remove("1")
+    assert len(fids) == 0
+    with pytest.raises(KeyError):
+        fids.remove("1")
+
+
+def test_invalid_fids():
+    fids = bot.FidSet(["12", "abc", -1, bot.FidSet.MAX_FID + 1, True])
+    assert list(fids) == ["12"]
+    assert "abc" not in fids and None not in fids
+    with pytest.raises(ValueError):
+        fids.add("abc")
+
+
+def test_set_operations():
+    a = bot.FidSet(["1", "3", "5"])
+    b = bot.FidSet(["3", "4"])
+    assert list(a | b) == ["1", "3", "4", "5"]
+    assert list(a & b) == ["3"]
+    assert list(a - b) == ["1", "5"]
+    assert not a.isdisjoint(b)
+    a.update(["0", "9"])
+    assert list(a) == ["0", "1", "3", "5", "9"]
@@ -0,0 +1,38 @@
+import random
+
+import bot
+
+
+def brute_force(keywords, *texts):
+    return {keyword.lower() for keyword in keywords for text in texts if keyword and keyword.lower() in (text or "").lower()}
+
+
+def test_overlapping_keywords():
+    matcher = bot.KeywordMatcher(["he", "she", "his", "hers"])
+    assert matcher.find_all("ushers") == {"he", "she", "hers"}
+    assert matcher.find_all("ahishers") == {"his", "he", "she", "hers"}
+
+
+def test_suffix_keywords():
+    # "at" est suffixe de "cat" et "bc" est au milieu d'un chemin qui échoue ("abcd" sur "abce")
+    matcher = bot.KeywordMatcher(["cat", "at", "abcd", "bc"])
+    assert matcher.find_all("CAT") == {"cat", "at"}
+    assert matcher.find_all("abce") == {"bc"}
+    assert matcher.find_all("xabcdx") == {"abcd", "bc"}
+
+
+def test_several_texts_and_empty_matcher():
+    matcher = bot.KeywordMatcher(["pepe", "Moon"])
+    assert matcher.find_all("Based Pepe", "MOONCAT") == {"pepe", "moon"}
+    assert matcher.find_all("", None) == set()
+    assert bot.KeywordMatcher([]).find_all("anything") == set()
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    keywords = ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(12)]
+    matcher = bot.KeywordMatcher(keywords)
+    for _ in range(200):
+        name = "".join(rng.choice("abc") for _ in range(rng.randint(0, 10)))
+        symbol = "".join(rng.choice("AB") for _ in range(rng.randint(0, 4)))
+        assert matcher.find_all(name, symbol) == brute_force(keywords, name, symbol)
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+import bot
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'mempool_pending_deploys.json')
+with open(FIXTURE_PATH) as f:
+    CASES = json.load(f)['cases']
+
+SUBSCRIPTION_ID = CASES[0]['message']['params']['subscription']
+TRACKED_DEPLOYER = Web3.to_checksum_address("0x7a2c6b1e4d3f5a6b7c8d9e0f1a2b3c4d5e6f7a8b")
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append(kwargs.get('embed'))
+
+
+class FakeBot:
+    def __init__(self):
+        self.cogs = {}
+        self.channel = FakeChannel()
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+class FakeEth:
+    """eth_call rejoué depuis la fixture (résultat de deployToken pour chaque tx enregistrée)"""
+
+    def __init__(self):
+        self.results = {case['message']['params']['result']['input']: case['eth_call_result'] for case in CASES}
+        self.calls = []
+
+    async def call(self, transaction, block_identifier):
+        self.calls.append((transaction, block_identifier))
+        return HexBytes(self.results[transaction['data']])
+
+
+class FakeRPC:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+async def make_monitors():
+    fake_bot = FakeBot()
+    clanker_monitor = bot.ClankerMonitor(fake_bot)
+    snipe_monitor = bot.SnipeMonitor(fake_bot)
+    fake_bot.cogs['SnipeMonitor'] = snipe_monitor
+    clanker_monitor.whitelisted_fids = bot.FidSet(["202"])
+    clanker_monitor.tracked_addresses = {TRACKED_DEPLOYER}
+    clanker_monitor.mempool_watcher.rpc_w3 = FakeRPC()
+    for fid in ("101", "202", "303", "404"):
+        snipe_monitor.snipe_targets[fid] = {
+            'amount': 0.1, 'gas_fees': 0.01, 'channel_id': 1, 'user_id': 1,
+            'status': 'pending', 'created_at': 'test'
+        }
+    posted = []
+
+    async def post(payload):
+        posted.append(payload)
+        return True
+
+    async def warm():
+        return None
+
+    snipe_monitor._post_buy_webhook = post
+    snipe_monitor.warm_buy_webhook = warm
+    return clanker_monitor, snipe_monitor, posted
+
+
+def token_created_event(case):
+    return AttributeDict({
+        'transactionHash': HexBytes(case['token_created']['transactionHash']),
+        'args': AttributeDict({'tokenAddress': Web3.to_checksum_address(case['token_created']['args']['tokenAddress'])}),
+        'blockNumber': 100,
+        'blockHash': HexBytes(b'\xaa' * 32),
+        'logIndex': 0,
+    })
+
+
+@pytest.fixture(autouse=True)
+def isolated_cwd(tmp_path, monkeypatch):
+    # Base SQLite et journal de dédup créés dans un répertoire jetable
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize('case', CASES, ids=[f"{c['label']}-{c['fid']}" for c in CASES])
+def test_decode_recorded_pending_deploy(case):
+    async def scenario():
+        clanker_monitor, _, _ = await make_monitors()
+        tx = AttributeDict.recursive(case['message']['params'])['result']
+        label, token_config = clanker_monitor.mempool_watcher.decode_deploy(tx)
+        assert label == case['label']
+        assert bot.Deployment.extract_fid(token_config['context']) == case['fid']
+    asyncio.run(scenario())
+
+
+def test_replay_arms_and_fires_on_token_created():
+    async def scenario():
+        clanker_monitor, snipe_monitor, posted = await make_monitors()
+        classifier = clanker_monitor.classifier
+        for case in CASES:
+            before = dict(classifier.verdict_counts)
+            await clanker_monitor.mempool_watcher.handle_response(
+                AttributeDict.recursive(case['message']['params']), SUBSCRIPTION_ID
+            )
+            verdicts = {k: v - before.get(k, 0) for k, v in classifier.verdict_counts.items() if v != before.get(k, 0)}
+            assert verdicts == {case['verdict']: 1}
+
+            tx_hash = case['message']['params']['result']['hash']
+            armed = snipe_monitor.armed_snipes.get(tx_hash)
+            if not case['armed']:
+                assert armed is None
+                assert case['fid'] not in snipe_monitor.snipe_targets
+                continue
+            assert armed['fid'] == case['fid']
+            assert armed['deployer'] == case['message']['params']['result']['from'].lower()
+            assert armed['token_address'] == Web3.to_checksum_address(case['token_address'])
+            assert snipe_monitor.snipe_targets[case['fid']]['status'] == 'armed'
+
+        # Le snipe armé part sur le log TokenCreated de la même tx, avec le montant courant
+        snipe_monitor.snipe_targets["202"]['amount'] = 0.25
+        for case in CASES:
+            await clanker_monitor._fire_armed_snipe(token_created_event(case))
+        await asyncio.sleep(0)
+        fired = {payload['token_address'].lower(): payload for payload in posted}
+        for case in CASES:
+            if case['armed']:
+                assert snipe_monitor.snipe_targets[case['fid']]['status'] == 'executed'
+                assert case['token_address'].lower() in fired
+                assert case['token_address'] in snipe_monitor.sniped_contracts
+        assert fired[CASES[1]['token_address'].lower()]['amount_eth'] == 0.25
+        assert len(posted) == sum(1 for case in CASES if case['armed'])
+        assert not snipe_monitor.armed_snipes
+    asyncio.run(scenario())
+
+
+def test_banned_fid_is_not_armed():
+    async def scenario():
+        clanker_monitor, snipe_monitor, _ = await make_monitors()
+        clanker_monitor.banned_fids = bot.FidSet(["101"])
+        case = CASES[0]
+        await clanker_monitor.mempool_watcher.handle_response(
+            AttributeDict.recursive(case['message']['params']), SUBSCRIPTION_ID
+        )
+        assert not snipe_monitor.armed_snipes
+        assert snipe_monitor.snipe_targets["101"]['status'] == 'pending'
+    asyncio.run(scenario())
+
+
+def test_token_created_without_armed_tx_fires_nothing():
+    async def scenario():
+        clanker_monitor, snipe_monitor, posted = await make_monitors()
+        await clanker_monitor._fire_armed_snipe(token_created_event(CASES[1]))
+        assert not posted
+        assert snipe_monitor.snipe_targets["202"]['status'] == 'pending'
+    asyncio.run(scenario())
@@ -0,0 +1,137 @@
+import asyncio
+
+from aiohttp import web
+
+import bot
+
+
+async def serve(handlers, delay=0.0, status=200):
+    """Serveur JSON-RPC local : handlers method -> fonction(params), délai et statut HTTP réglables"""
+    calls = []
+
+    async def rpc(request):
+        body = await request.json()
+        calls.append(body["method"])
+        if delay:
+            await asyncio.sleep(delay)
+        if status != 200:
+            return web.Response(status=status, text="boom")
+        handler = handlers.get(body["method"])
+        if handler is None:
+            return web.json_response({"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32601, "message": "method not found"}})
+        return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": handler(body["params"])})
+
+    app = web.Application()
+    app.router.add_post("/", rpc)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}", calls
+
+
+TX = {"hash": "0x" + "11" * 32, "blockNumber": "0x10"}
+
+
+def test_first_valid_response_wins():
+    async def scenario():
+        fast_null, fast_url, _ = await serve({"eth_getTransactionByHash": lambda p: None, "eth_getBalance": lambda p: "0x1"}, delay=0.01)
+        slow, slow_url, _ = await serve({"eth_getTransactionByHash": lambda p: TX, "eth_getBalance": lambda p: "0x2"}, delay=0.2)
+        failing, failing_url, _ = await serve({}, status=500)
+        try:
+            provider = bot.RacingHTTPProvider([fast_url, slow_url, failing_url])
+            by_url = {endpoint.url: endpoint for endpoint in provider.endpoints}
+
+            # Un null (tx pas encore propagée) ne clôt pas la course : la réponse non nulle gagne
+            response = await provider.make_request("eth_getTransactionByHash", [TX["hash"]])
+            assert response["result"] == TX
+            assert by_url[slow_url].wins == 1
+            assert by_url[fast_url].wins == 0
+
+            # Réponse non nulle la plus rapide
+            response = await provider.make_request("eth_getBalance", ["0x" + "22" * 20, "latest"])
+            assert response["result"] == "0x1"
+            assert by_url[fast_url].wins == 1
+            await asyncio.sleep(0.3)  # requêtes perdantes terminées en tâche de fond
+            assert by_url[failing_url].errors == 2
+            assert by_url[fast_url].latency < by_url[slow_url].latency
+        finally:
+            for runner in (fast_null, slow, failing):
+                await runner.cleanup()
+    asyncio.run(scenario())
+
+
+def test_all_null_returns_null_response():
+    async def scenario():
+        runners = [await serve({"eth_getTransactionReceipt": lambda p: None}) for _ in range(2)]
+        try:
+            provider = bot.RacingHTTPProvider([url for _, url, _ in runners])
+            response = await provider.make_request("eth_getTransactionReceipt", ["0x" + "33" * 32])
+            assert "result" in response and response["result"] is None
+        finally:
+            for runner, _, _ in runners:
+                await runner.cleanup()
+    asyncio.run(scenario())
+
+
+def test_ewma_latency_and_error_rate():
+    endpoint = bot.RPCEndpointHealth("http://127.0.0.1:9")
+    assert endpoint.score == 0.0  # jamais mesuré : essayé en premier
+    endpoint.record_success(0.1)
+    assert endpoint.latency == 0.1
+    endpoint.record_success(0.2)
+    assert abs(endpoint.latency - (0.1 + bot.RPC_LATENCY_EWMA_ALPHA * 0.1)) < 1e-12
+    endpoint.record_error()
+    assert abs(endpoint.error_rate - bot.RPC_LATENCY_EWMA_ALPHA) < 1e-12
+    endpoint.record_success(0.12)
+    assert abs(endpoint.error_rate - bot.RPC_LATENCY_EWMA_ALPHA * (1 - bot.RPC_LATENCY_EWMA_ALPHA)) < 1e-12
+    assert endpoint.requests == 4 and endpoint.errors == 1
+    assert endpoint.score == endpoint.latency * (1 + 10 * endpoint.error_rate)
+
+
+def test_demotion_after_error_rate_threshold():
+    healthy = bot.RPCEndpointHealth("http://127.0.0.1:1")
+    flaky = bot.RPCEndpointHealth("http://127.0.0.1:2")
+    healthy.record_success(0.5)
+    flaky.record_success(0.01)
+    errors = 0
+    while flaky.error_rate <= bot.RPC_DEMOTE_ERROR_RATE:
+        assert not flaky.is_demoted
+        flaky.record_error()
+        errors += 1
+    assert flaky.is_demoted
+    assert errors == 4  # 1 - 0.8^4 > 0.5 avec alpha = 0.2
+    provider = bot.RacingHTTPProvider(["http://127.0.0.1:1", "http://127.0.0.1:2"])
+    provider.endpoints = [flaky, healthy]
+    assert provider.ranked_endpoints() == [healthy, flaky]
+
+
+def test_writes_fail_over_in_rank_order():
+    async def scenario():
+        failing, failing_url, failing_calls = await serve({}, status=500)
+        first, first_url, first_calls = await serve({"eth_sendRawTransaction": lambda p: "0x" + "44" * 32})
+        second, second_url, second_calls = await serve({"eth_sendRawTransaction": lambda p: "0x" + "55" * 32})
+        try:
+            provider = bot.RacingHTTPProvider([second_url, first_url, failing_url])
+            by_url = {endpoint.url: endpoint for endpoint in provider.endpoints}
+            # Rang imposé par la latence mesurée : failing, first, second
+            by_url[failing_url].latency = 0.01
+            by_url[first_url].latency = 0.02
+            by_url[second_url].latency = 0.03
+            response = await provider.make_request("eth_sendRawTransaction", ["0xdeadbeef"])
+            assert response["result"] == "0x" + "44" * 32
+            assert failing_calls == ["eth_sendRawTransaction"]
+            assert first_calls == ["eth_sendRawTransaction"]
+            assert second_calls == []  # une seule écriture réussie, pas de diffusion en course
+            assert by_url[failing_url].errors == 1
+
+            # Lectures non mises en concurrence (eth_getLogs) : un seul endpoint, le mieux classé
+            by_url[failing_url].demoted_until = float("inf")
+            await provider.make_request("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "0x2"}])
+            assert first_calls == ["eth_sendRawTransaction", "eth_getLogs"]
+            assert second_calls == []
+        finally:
+            for runner in (failing, first, second):
+                await runner.cleanup()
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import bot
+
+WINDOWS = {'short': 10, 'long': 30}
+
+
+def make_counter():
+    return bot.SlidingWindowCounter(WINDOWS, bucket_seconds=5)
+
+
+def test_eviction_at_window_boundary():
+    counter = make_counter()
+    assert counter.add("fid", now=0) == {'short': 1, 'long': 1}
+    # Dernier instant où le bucket [0, 5) est encore dans la fenêtre courte de 10 s
+    assert counter.counts("fid", now=9.999) == {'short': 1, 'long': 1}
+    # Pile sur la frontière : le bucket sort de la fenêtre courte, pas de la longue
+    assert counter.counts("fid", now=10) == {'short': 0, 'long': 1}
+    assert "fid" not in counter.totals['short']
+    assert counter.counts("fid", now=29.999) == {'short': 0, 'long': 1}
+    assert counter.counts("fid", now=30) == {'short': 0, 'long': 0}
+    assert counter.totals == {'short': {}, 'long': {}}
+
+
+def test_same_bucket_counts_accumulate_and_expire_together():
+    counter = make_counter()
+    counter.add("a", now=5)
+    counter.add("a", now=9.5)
+    counter.add("b", now=9.9)
+    assert counter.top('short', now=9.9) == [("a", 2), ("b", 1)]
+    assert counter.top('short', now=15) == []
+    assert counter.top('long', 2, now=15) == [("a", 2)]
+
+
+def test_replayed_event_counts_only_in_windows_that_cover_it():
+    counter = make_counter()
+    counter.add("fid", now=20)
+    # Log rattrapé, 15 s avant le bucket courant : hors fenêtre courte, dans la longue
+    assert counter.add("fid", now=5) == {'short': 1, 'long': 2}
+    # Plus vieux que la plus grande fenêtre : ignoré
+    assert counter.add("fid", now=-20) == {'short': 1, 'long': 2}
+    assert counter.counts("fid", now=35) == {'short': 0, 'long': 1}
+
+
+def test_silence_longer_than_largest_window_resets():
+    counter = make_counter()
+    counter.add("fid", now=0)
+    counter.add("fid", now=12)
+    assert counter.counts("fid", now=1000) == {'short': 0, 'long': 0}
+    assert counter.add("fid", now=1001) == {'short': 1, 'long': 1}
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+import bot
+
+WINDOWS = {'1m': 60, '5m': 300}
+BUCKET = 10
+
+
+def brute_force(swaps, now):
+    """Sommes par fenêtre recalculées depuis tous les swaps (bucket courant inclus)"""
+    current = int(now // BUCKET)
+    sums = {}
+    for name, seconds in WINDOWS.items():
+        span = seconds // BUCKET
+        sums[name] = sum(amount for at, amount in swaps if current - span < int(at // BUCKET) <= current)
+    return sums
+
+
+def test_wrap_around_matches_brute_force():
+    ring = bot.VolumeRingBuffer(WINDOWS, BUCKET)
+    assert ring.size == 30
+    rng = random.Random(3)
+    swaps = []
+    now = 0.0
+    # Plus de trois tours d'anneau, avec des trous de plusieurs buckets
+    while now < 3.5 * ring.size * BUCKET:
+        now += rng.choice([0.5, 3, 10, 25, 70])
+        amount = rng.uniform(1, 1000)
+        ring.add(amount, now)
+        swaps.append((now, amount))
+        metrics = ring.metrics(now)
+        for name, expected in brute_force(swaps, now).items():
+            assert metrics[name] == pytest.approx(expected)
+
+
+def test_bucket_reused_after_wrap_starts_empty():
+    ring = bot.VolumeRingBuffer(WINDOWS, BUCKET)
+    ring.add(100.0, now=0)
+    # Un tour plus tard, même index dans l'anneau : l'ancien volume n'est pas repris
+    ring.add(5.0, now=ring.size * BUCKET - 1)
+    ring.add(7.0, now=ring.size * BUCKET)
+    assert ring.current % ring.size == 0
+    assert ring.buckets[0] == 7.0
+    assert ring.metrics(ring.size * BUCKET) == pytest.approx({'1m': 12.0, '5m': 12.0, 'prev_1m': 0.0})
+
+
+def test_prev_minute_and_long_silence():
+    ring = bot.VolumeRingBuffer(WINDOWS, BUCKET)
+    ring.add(40.0, now=0)
+    ring.add(60.0, now=65)
+    assert ring.metrics(65) == pytest.approx({'1m': 60.0, '5m': 100.0, 'prev_1m': 40.0})
+    assert ring.metrics(65 + 10 * ring.size * BUCKET) == pytest.approx({'1m': 0.0, '5m': 0.0, 'prev_1m': 0.0})